@@ -14,6 +14,7 @@ from datetime import datetime
 
 N_VEHICLES = 2
 SIM_TIME = 300#s
+OUTPUT_FORMAT = 'csv'  # csv, parquet (requer pyarrow)
 
 timestamp = datetime.now().strftime('%Y-%m-%d_%Hh-%Mm-%Ss')
 experiment_dir = f'data/assincrono/exp_{timestamp}'
@@ -48,7 +49,12 @@ def plot_and_save_imu(agent_name, data, save_dir):
         return
 
     df = pd.DataFrame(clean_data)
-    df.to_csv(f"{save_dir}/imu.csv", index=False)
+    if OUTPUT_FORMAT == 'parquet':
+        # timestamp em float64, leituras do sensor em float32 (precisão nativa do CARLA)
+        df = df.astype({col: 'float32' for col in df.columns if col != 'timestamp'})
+        df.to_parquet(f"{save_dir}/imu.parquet", index=False, compression='zstd')
+    else:
+        df.to_csv(f"{save_dir}/imu.csv", index=False)
 
     # Plot
     plt.figure(figsize=(12, 6))
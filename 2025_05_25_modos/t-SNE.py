@@ -1,12 +1,19 @@
+import os
 import pandas as pd
 from sklearn.manifold import TSNE
 import matplotlib.pyplot as plt
 
-csv_assincrono = 'data/assincrono/exp_2025-05-26_00h-43m-28s/imu.csv'
-csv_sincrono = 'data/sincrono/exp_2025-05-26_00h-56m-54s/imu.csv'
+def carregar_imu(exp_dir):
+    # imu.parquet é colunar e tipado, muito mais rápido que reprocessar o CSV
+    if os.path.exists(f'{exp_dir}/imu.parquet'):
+        return pd.read_parquet(f'{exp_dir}/imu.parquet')
+    return pd.read_csv(f'{exp_dir}/imu.csv', engine='pyarrow')
 
-df_assincrono = pd.read_csv(csv_assincrono)
-df_sincrono = pd.read_csv(csv_sincrono)
+exp_assincrono = 'data/assincrono/exp_2025-05-26_00h-43m-28s'
+exp_sincrono = 'data/sincrono/exp_2025-05-26_00h-56m-54s'
+
+df_assincrono = carregar_imu(exp_assincrono)
+df_sincrono = carregar_imu(exp_sincrono)
 
 # pontos1 = df_assincrono.drop(columns=['timestamp']).values.tolist()
 # pontos2 = df_sincrono.drop(columns=['timestamp']).values.tolist()
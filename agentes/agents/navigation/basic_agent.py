@@ -10,10 +10,13 @@ It can also make use of the global route planner to follow a specifed route
 """
 
 import carla
+import numpy as np
 from shapely.geometry import Polygon
 
 from agents.navigation.local_planner import LocalPlanner, RoadOption
 from agents.navigation.global_route_planner import GlobalRoutePlanner
+from agents.navigation.route_service import RouteService
+from agents.tools import opendrive
 from agents.tools.misc import (get_speed, is_within_distance,
                                get_trafficlight_trigger_location,
                                compute_distance)
@@ -36,13 +39,14 @@ class BasicAgent(object):
             :param opt_dict: dictionary in case some of its parameters want to be changed.
                 This also applies to parameters related to the LocalPlanner.
             :param map_inst: carla.Map instance to avoid the expensive call of getting it.
-            :param grp_inst: GlobalRoutePlanner instance to avoid the expensive call of getting it.
+            :param grp_inst: GlobalRoutePlanner or RouteService instance to avoid the expensive call of getting it.
+                By default the planner of RouteService.shared is used.
 
         """
         self._vehicle = vehicle
         self._world = self._vehicle.get_world()
         if map_inst:
-            if isinstance(map_inst, carla.Map):
+            if isinstance(map_inst, (carla.Map, opendrive.Map)):
                 self._map = map_inst
             else:
                 print("Warning: Ignoring the given map as it is not a 'carla.Map'")
@@ -63,6 +67,7 @@ class BasicAgent(object):
         self._speed_ratio = 1
         self._max_brake = 0.5
         self._offset = 0
+        self._route_landmarks = 0
 
         # Change parameters according to the dictionary
         opt_dict['target_speed'] = target_speed
@@ -86,17 +91,24 @@ class BasicAgent(object):
             self._max_brake = opt_dict['max_brake']
         if 'offset' in opt_dict:
             self._offset = opt_dict['offset']
+        if 'route_landmarks' in opt_dict:
+            self._route_landmarks = opt_dict['route_landmarks']
 
         # Initialize the planners
         self._local_planner = LocalPlanner(self._vehicle, opt_dict=opt_dict, map_inst=self._map)
+        # Agents without a planner of their own share the graph of the process-wide RouteService
         if grp_inst:
             if isinstance(grp_inst, GlobalRoutePlanner):
                 self._global_planner = grp_inst
+            elif isinstance(grp_inst, RouteService):
+                self._global_planner = grp_inst.planner
             else:
-                print("Warning: Ignoring the given map as it is not a 'carla.Map'")
-                self._global_planner = GlobalRoutePlanner(self._map, self._sampling_resolution)
+                print("Warning: Ignoring the given planner as it is not a 'GlobalRoutePlanner' or 'RouteService'")
+                self._global_planner = RouteService.shared(
+                    self._map, self._sampling_resolution, landmarks=self._route_landmarks).planner
         else:
-            self._global_planner = GlobalRoutePlanner(self._map, self._sampling_resolution)
+            self._global_planner = RouteService.shared(
+                self._map, self._sampling_resolution, landmarks=self._route_landmarks).planner
 
         # Get the static elements of the scene
         self._lights_list = self._world.get_actors().filter("*traffic_light*")
@@ -155,8 +167,8 @@ class BasicAgent(object):
             start_location = self._vehicle.get_location()
             clean_queue = False
 
-        start_waypoint = self._map.get_waypoint(start_location)
-        end_waypoint = self._map.get_waypoint(end_location)
+        start_waypoint = self._global_planner.get_waypoint(start_location)
+        end_waypoint = self._global_planner.get_waypoint(end_location)
 
         route_trace = self.trace_route(start_waypoint, end_waypoint)
         self._local_planner.set_global_plan(route_trace, clean_queue=clean_queue)
@@ -280,14 +292,14 @@ class BasicAgent(object):
                 return (True, self._last_traffic_light)
 
         ego_vehicle_location = self._vehicle.get_location()
-        ego_vehicle_waypoint = self._map.get_waypoint(ego_vehicle_location)
+        ego_vehicle_waypoint = self._global_planner.get_waypoint(ego_vehicle_location)
 
         for traffic_light in lights_list:
             if traffic_light.id in self._lights_map:
                 trigger_wp = self._lights_map[traffic_light.id]
             else:
                 trigger_location = get_trafficlight_trigger_location(traffic_light)
-                trigger_wp = self._map.get_waypoint(trigger_location)
+                trigger_wp = self._global_planner.get_waypoint(trigger_location)
                 self._lights_map[traffic_light.id] = trigger_wp
 
             if trigger_wp.transform.location.distance(ego_vehicle_location) > max_distance:
@@ -331,14 +343,12 @@ class BasicAgent(object):
             p2 = ego_location + carla.Location(l_ext * r_vec.x, l_ext * r_vec.y)
             route_bb.extend([[p1.x, p1.y, p1.z], [p2.x, p2.y, p2.z]])
 
-            for wp, _ in self._local_planner.get_plan():
-                if ego_location.distance(wp.transform.location) > max_distance:
-                    break
-
-                r_vec = wp.transform.get_right_vector()
-                p1 = wp.transform.location + carla.Location(r_ext * r_vec.x, r_ext * r_vec.y)
-                p2 = wp.transform.location + carla.Location(l_ext * r_vec.x, l_ext * r_vec.y)
-                route_bb.extend([[p1.x, p1.y, p1.z], [p2.x, p2.y, p2.z]])
+            # both sides of the plan waypoints until the first one farther than max_distance
+            plan_xyz, plan_right = self._local_planner.get_plan_geometry(ego_location, max_distance)
+            sides = np.repeat(plan_xyz, 2, axis=0)
+            sides[0::2, :2] += r_ext * plan_right
+            sides[1::2, :2] += l_ext * plan_right
+            route_bb.extend(sides.tolist())
 
             # Two points don't create a polygon, nothing to check
             if len(route_bb) < 3:
@@ -357,7 +367,7 @@ class BasicAgent(object):
 
         ego_transform = self._vehicle.get_transform()
         ego_location = ego_transform.location
-        ego_wpt = self._map.get_waypoint(ego_location)
+        ego_wpt = self._global_planner.get_waypoint(ego_location)
 
         # Get the right offset
         if ego_wpt.lane_id < 0 and lane_offset != 0:
@@ -382,7 +392,7 @@ class BasicAgent(object):
             if target_transform.location.distance(ego_location) > max_distance:
                 continue
 
-            target_wpt = self._map.get_waypoint(target_transform.location, lane_type=carla.LaneType.Any)
+            target_wpt = self._global_planner.get_waypoint(target_transform.location, lane_type=carla.LaneType.Any)
 
             # General approach for junctions and vehicles invading other lanes due to the offset
             if (use_bbs or target_wpt.is_junction) and route_polygon:
@@ -250,7 +250,7 @@ class BehaviorAgent(BasicAgent):
             self._behavior.tailgate_counter -= 1
 
         ego_vehicle_loc = self._vehicle.get_location()
-        ego_vehicle_wp = self._map.get_waypoint(ego_vehicle_loc)
+        ego_vehicle_wp = self._global_planner.get_waypoint(ego_vehicle_loc)
 
         # 1: Red lights and stops behavior
         if self.traffic_light_manager():
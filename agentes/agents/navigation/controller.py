@@ -8,7 +8,11 @@
 from collections import deque
 import math
 import numpy as np
-import carla
+try:
+    import carla
+except ImportError:
+    # planning without the CARLA client library, see agents.tools.opendrive
+    from agents.tools import opendrive as carla
 from agents.tools.misc import get_speed
 
 
@@ -8,79 +8,312 @@
 This module provides GlobalRoutePlanner implementation.
 """
 
+import hashlib
 import math
+import os
+import pickle
+import threading
+from collections import OrderedDict
 import numpy as np
-import networkx as nx
 
-import carla
+try:
+    import carla
+except ImportError:
+    # planning without the CARLA client library, see agents.tools.opendrive
+    from agents.tools import opendrive as carla
 from agents.navigation.local_planner import RoadOption
+from agents.navigation.route_graph import RouteGraph
+from agents.navigation.waypoint_index import WaypointIndex
 from agents.tools.misc import vector
 
+# agentes/data/.route_graphs, whatever the working directory
+GRAPH_CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                '..', '..', 'data', '.route_graphs'))
+GRAPH_CACHE_VERSION = 5  # bump when the cached graph layout changes
+TURN_THRESHOLD = math.radians(35)
+
+
+def _xyz(location):
+    return (location.x, location.y, location.z)
+
+
+# id(map) -> (map, digest); the map is kept alive so that its id is not reused
+_map_digests = OrderedDict()
+_map_digests_lock = threading.Lock()
+MAP_DIGEST_CACHE_SIZE = 16
+
+
+def map_digest(wmap):
+    """
+    Short hash of the OpenDRIVE content of wmap, which tells apart different maps
+    loaded under the same name. Memoized per map object, since hashing means
+    fetching and reading the whole OpenDRIVE.
+    """
+    key = id(wmap)
+    with _map_digests_lock:
+        if key in _map_digests:
+            _map_digests.move_to_end(key)
+            return _map_digests[key][1]
+    digest = hashlib.sha1(wmap.to_opendrive().encode('utf-8')).hexdigest()[:16]
+    with _map_digests_lock:
+        _map_digests[key] = (wmap, digest)
+        while len(_map_digests) > MAP_DIGEST_CACHE_SIZE:
+            _map_digests.popitem(last=False)
+    return digest
+
+
+def search_route(graph, start, end, heuristic=None):
+    """
+    A* search over graph between two edges returned by GlobalRoutePlanner.localize
+    return      :   path as list of node ids (as int) of graph
+    """
+    route = graph.astar(start[0], end[0], heuristic=heuristic)
+    route.append(end[1])
+    return route
+
+
 class GlobalRoutePlanner(object):
     """
     This class provides a very high level route plan.
     """
 
-    def __init__(self, wmap, sampling_resolution):
+    def __init__(self, wmap, sampling_resolution, cache_dir=GRAPH_CACHE_DIR, landmarks=0, route_cache_size=128):
+        """
+        :param wmap: carla.Map to plan on
+        :param sampling_resolution: distance between the waypoints of each graph edge
+        :param cache_dir: folder where the built graph is stored, keyed by map name,
+            OpenDRIVE content hash and sampling resolution (None disables the cache)
+        :param landmarks: number of landmarks of the ALT heuristic used by the route search
+            (see RouteGraph.build_landmarks); 0 uses the Euclidean distance
+        :param route_cache_size: number of routes kept by the LRU route cache (0 disables it)
+        """
         self._sampling_resolution = sampling_resolution
         self._wmap = wmap
         self._topology = None
         self._graph = None
         self._id_map = None
         self._road_id_to_edge = None
-
-        self._intersection_end_node = -1
-        self._previous_decision = RoadOption.VOID
-
-        # Build the graph
-        self._build_topology()
-        self._build_graph()
-        self._find_loose_ends()
-        self._lane_change_link()
+        self._waypoint_index = None
+        self._heuristic = 'alt' if landmarks else 'euclidean'
+
+        # LRU cache {(start edge, end edge): (route nodes, road options)}, valid for one graph version
+        self._route_cache = OrderedDict()
+        self._route_cache_size = route_cache_size
+        self._route_cache_version = None
+        self._route_cache_lock = threading.Lock()
+
+        # Build the graph, unless a previous run already stored it
+        cache_path = self._cache_path(cache_dir) if cache_dir else None
+        if cache_path is None or not self._load_cache(cache_path):
+            self._build_topology()
+            self._build_graph()
+            self._find_loose_ends()
+            self._lane_change_link()
+            self._graph.freeze()
+            self._build_turn_table()
+            # the waypoints now live in the graph arrays
+            self._topology = None
+            if cache_path is not None:
+                self._save_cache(cache_path)
+        # the landmark tables are stored in the graph, so they go to the cache with it
+        if landmarks and len(self._graph.landmarks) != min(landmarks, len(self._graph)):
+            self._graph.build_landmarks(landmarks)
+            if cache_path is not None:
+                self._save_cache(cache_path)
+        self._build_waypoint_index()
+
+    @property
+    def graph(self):
+        """RouteGraph the routes are searched on"""
+        return self._graph
+
+    @property
+    def heuristic(self):
+        """Heuristic of the route search ('euclidean' or 'alt', see RouteGraph.astar)"""
+        return self._heuristic
 
     def trace_route(self, origin, destination):
         """
         This method returns list of (carla.Waypoint, RoadOption)
         from origin to destination
         """
+        start, end = self.localize(origin), self.localize(destination)
+        route, road_options = self._route(start, end)
+        return self.trace_path(route, origin, destination, road_options)
+
+    def _route(self, start, end):
+        """
+        Route nodes and road options between two edges returned by localize,
+        searched only when they are not in the route cache
+        """
+        cached = self.cached_route(start, end)
+        if cached is not None:
+            return cached
+        return self.store_route(start, end, self._search(start, end))
+
+    def cached_route(self, start, end):
+        """
+        (route nodes, road options) of the route cache, or None
+        """
+        with self._route_cache_lock:
+            if self._route_cache_version != self._graph.version:
+                self._route_cache.clear()
+                self._route_cache_version = self._graph.version
+            entry = self._route_cache.get((start, end))
+            if entry is not None:
+                self._route_cache.move_to_end((start, end))
+            return entry
+
+    def store_route(self, start, end, route):
+        """
+        Computes the road options of a searched route and stores both in the route cache
+        """
+        route = tuple(route)
+        state = {'previous_decision': RoadOption.VOID, 'intersection_end_node': -1}
+        road_options = tuple(self._turn_decision(i, route, state=state) for i in range(len(route) - 1))
+        entry = (route, road_options)
+        if self._route_cache_size > 0:
+            with self._route_cache_lock:
+                if self._route_cache_version == self._graph.version:
+                    self._route_cache[(start, end)] = entry
+                    self._route_cache.move_to_end((start, end))
+                    while len(self._route_cache) > self._route_cache_size:
+                        self._route_cache.popitem(last=False)
+        return entry
+
+    def trace_path(self, route, origin, destination, road_options=None):
+        """
+        This method turns a route of graph nodes (see _path_search) into the list of
+        (carla.Waypoint, RoadOption) from origin to destination, starting and ending
+        at the exact origin and destination.
+        road_options are the turn decisions of each step of the route (see store_route);
+        when missing they are computed here. The turn decision state lives in this call
+        only, so several routes can be traced concurrently over the same graph.
+        """
+        graph = self._graph
         route_trace = []
-        route = self._path_search(origin, destination)
+        if road_options is None:
+            state = {'previous_decision': RoadOption.VOID, 'intersection_end_node': -1}
+            road_options = [self._turn_decision(i, route, state=state) for i in range(len(route) - 1)]
         current_waypoint = self._wmap.get_waypoint(origin)
         destination_waypoint = self._wmap.get_waypoint(destination)
+        destination_xyz = np.array(_xyz(destination), dtype=np.float32)
+        destination_lane = (destination_waypoint.road_id, destination_waypoint.section_id, destination_waypoint.lane_id)
 
         for i in range(len(route) - 1):
-            road_option = self._turn_decision(i, route)
-            edge = self._graph.edges[route[i], route[i+1]]
-            path = []
+            road_option = road_options[i]
+            edge = graph.edge(route[i], route[i+1])
 
-            if edge['type'] != RoadOption.LANEFOLLOW and edge['type'] != RoadOption.VOID:
+            if graph.type[edge] != RoadOption.LANEFOLLOW and graph.type[edge] != RoadOption.VOID:
                 route_trace.append((current_waypoint, road_option))
-                exit_wp = edge['exit_waypoint']
-                n1, n2 = self._road_id_to_edge[exit_wp.road_id][exit_wp.section_id][exit_wp.lane_id]
-                next_edge = self._graph.edges[n1, n2]
-                if next_edge['path']:
-                    closest_index = self._find_closest_in_list(current_waypoint, next_edge['path'])
-                    closest_index = min(len(next_edge['path'])-1, closest_index+5)
-                    current_waypoint = next_edge['path'][closest_index]
+                exit_row = graph.exit[edge]
+                n1, n2 = self._road_id_to_edge[int(graph.wp_road[exit_row])][int(graph.wp_section[exit_row])][
+                    int(graph.wp_lane[exit_row])]
+                next_edge = graph.edge(n1, n2)
+                path = graph.path(next_edge)
+                if len(path):
+                    closest_index = graph.closest(path, _xyz(current_waypoint.transform.location))
+                    closest_index = min(len(path)-1, closest_index+5)
+                    current_waypoint = self._waypoint(path[closest_index])
                 else:
-                    current_waypoint = next_edge['exit_waypoint']
+                    current_waypoint = self._waypoint(graph.exit[next_edge])
                 route_trace.append((current_waypoint, road_option))
 
             else:
-                path = path + [edge['entry_waypoint']] + edge['path'] + [edge['exit_waypoint']]
-                closest_index = self._find_closest_in_list(current_waypoint, path)
-                for waypoint in path[closest_index:]:
-                    current_waypoint = waypoint
+                path = graph.lane(edge)
+                closest_index = graph.closest(path, _xyz(current_waypoint.transform.location))
+                destination_index = None
+                for row in path[closest_index:]:
+                    current_waypoint = self._waypoint(row)
                     route_trace.append((current_waypoint, road_option))
-                    if len(route)-i <= 2 and waypoint.transform.location.distance(destination) < 2*self._sampling_resolution:
+                    if len(route)-i <= 2 and np.linalg.norm(graph.wp_xyz[row] - destination_xyz) < 2*self._sampling_resolution:
                         break
-                    elif len(route)-i <= 2 and current_waypoint.road_id == destination_waypoint.road_id and current_waypoint.section_id == destination_waypoint.section_id and current_waypoint.lane_id == destination_waypoint.lane_id:
-                        destination_index = self._find_closest_in_list(destination_waypoint, path)
+                    elif len(route)-i <= 2 and (graph.wp_road[row], graph.wp_section[row], graph.wp_lane[row]) == destination_lane:
+                        if destination_index is None:
+                            destination_index = graph.closest(path, _xyz(destination_waypoint.transform.location))
                         if closest_index > destination_index:
                             break
 
         return route_trace
 
+    def get_waypoint(self, location, project_to_road=True, lane_type=carla.LaneType.Driving):
+        """
+        Same as carla.Map.get_waypoint, answered locally by the waypoint index of
+        the graph whenever possible (see WaypointIndex)
+        """
+        return self._waypoint_index.get_waypoint(location, project_to_road, lane_type)
+
+    def _waypoint(self, row):
+        """
+        carla.Waypoint of a row of the waypoint table of the graph
+        """
+        graph = self._graph
+        waypoint = self._wmap.get_waypoint_xodr(int(graph.wp_road[row]), int(graph.wp_lane[row]), float(graph.wp_s[row]))
+        if waypoint is None:
+            x, y, z = graph.wp_xyz[row].tolist()
+            waypoint = self._wmap.get_waypoint(carla.Location(x=x, y=y, z=z))
+        return waypoint
+
+    def _build_waypoint_index(self):
+        """
+        Builds the spatial index over the waypoints of the lane following edges of the graph
+        """
+        graph = self._graph
+        lanes = [graph.lane(edge) for edge in np.flatnonzero(graph.type == RoadOption.LANEFOLLOW)]
+        self._waypoint_index = WaypointIndex(self._wmap, graph.wp_xyz, graph.wp_lane_width, lanes, self._waypoint,
+                                             graph.wp_road, graph.wp_lane, graph.wp_s)
+
+    def _cache_path(self, cache_dir):
+        """
+        Path of the graph cache file for the current map and sampling resolution
+        """
+        name = os.path.basename(self._wmap.name) or 'map'
+        return os.path.join(cache_dir, f'{name}_{map_digest(self._wmap)}_{self._sampling_resolution:g}.pkl')
+
+    def _save_cache(self, cache_path):
+        """
+        Stores the graph in cache_path
+        """
+        cache = {
+            'version': GRAPH_CACHE_VERSION,
+            'graph': self._graph,
+            'id_map': self._id_map,
+            'road_id_to_edge': self._road_id_to_edge,
+        }
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # the cache only saves time, planning goes on without it
+            print(f"Warning: could not store the route graph cache in '{cache_path}': {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load_cache(self, cache_path):
+        """
+        Restores the graph from cache_path.
+        Returns False when there is no usable cache, so the graph has to be built
+        """
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            with open(cache_path, 'rb') as file:
+                cache = pickle.load(file)
+            if not isinstance(cache, dict) or cache.get('version') != GRAPH_CACHE_VERSION:
+                return False
+            graph, id_map, road_id_to_edge = cache['graph'], cache['id_map'], cache['road_id_to_edge']
+        except Exception:
+            # unreadable, truncated or written by an incompatible version: build it again
+            return False
+
+        self._graph = graph
+        self._id_map = id_map
+        self._road_id_to_edge = road_id_to_edge
+        return True
+
     def _build_topology(self):
         """
         This function retrieves topology from the server as a list of
@@ -93,38 +326,44 @@ class GlobalRoutePlanner(object):
         - exitxyz (tuple): (x,y,z) of exit point of road segment
         - path (list of carla.Waypoint):  list of waypoints between entry to exit, separated by the resolution
         """
-        self._topology = []
         # Retrieving waypoints to construct a detailed topology
-        for segment in self._wmap.get_topology():
-            wp1, wp2 = segment[0], segment[1]
-            l1, l2 = wp1.transform.location, wp2.transform.location
-            # Rounding off to avoid floating point imprecision
-            x1, y1, z1, x2, y2, z2 = np.round([l1.x, l1.y, l1.z, l2.x, l2.y, l2.z], 0)
-            wp1.transform.location, wp2.transform.location = l1, l2
-            seg_dict = dict()
-            seg_dict['entry'], seg_dict['exit'] = wp1, wp2
-            seg_dict['entryxyz'], seg_dict['exitxyz'] = (x1, y1, z1), (x2, y2, z2)
-            seg_dict['path'] = []
-            endloc = wp2.transform.location
-            if wp1.transform.location.distance(endloc) > self._sampling_resolution:
-                w = wp1.next(self._sampling_resolution)[0]
-                while w.transform.location.distance(endloc) > self._sampling_resolution:
-                    seg_dict['path'].append(w)
-                    next_ws = w.next(self._sampling_resolution)
-                    if len(next_ws) == 0:
-                        break
-                    w = next_ws[0]
-            else:
-                next_wps = wp1.next(self._sampling_resolution)
-                if len(next_wps) == 0:
-                    continue
-                seg_dict['path'].append(next_wps[0])
-            self._topology.append(seg_dict)
+        segments = [self._sample_segment(segment) for segment in self._wmap.get_topology()]
+        self._topology = [seg_dict for seg_dict in segments if seg_dict is not None]
+
+    def _sample_segment(self, segment):
+        """
+        This function samples the waypoints of one topology segment (see _build_topology),
+        returning None when the segment has no waypoint after its entry
+        """
+        wp1, wp2 = segment[0], segment[1]
+        l1, l2 = wp1.transform.location, wp2.transform.location
+        # Rounding off to avoid floating point imprecision
+        x1, y1, z1, x2, y2, z2 = np.round([l1.x, l1.y, l1.z, l2.x, l2.y, l2.z], 0)
+        wp1.transform.location, wp2.transform.location = l1, l2
+        seg_dict = dict()
+        seg_dict['entry'], seg_dict['exit'] = wp1, wp2
+        seg_dict['entryxyz'], seg_dict['exitxyz'] = (x1, y1, z1), (x2, y2, z2)
+        seg_dict['path'] = []
+        endloc = wp2.transform.location
+        if wp1.transform.location.distance(endloc) > self._sampling_resolution:
+            w = wp1.next(self._sampling_resolution)[0]
+            while w.transform.location.distance(endloc) > self._sampling_resolution:
+                seg_dict['path'].append(w)
+                next_ws = w.next(self._sampling_resolution)
+                if len(next_ws) == 0:
+                    break
+                w = next_ws[0]
+        else:
+            next_wps = wp1.next(self._sampling_resolution)
+            if len(next_wps) == 0:
+                return None
+            seg_dict['path'].append(next_wps[0])
+        return seg_dict
 
     def _build_graph(self):
         """
-        This function builds a networkx graph representation of topology, creating several class attributes:
-        - graph (networkx.DiGraph): networkx graph representing the world map, with:
+        This function builds the RouteGraph representation of topology, creating several class attributes:
+        - graph (RouteGraph): graph representing the world map, with:
             Node properties:
                 vertex: (x,y,z) position in world map
             Edge properties:
@@ -136,7 +375,8 @@ class GlobalRoutePlanner(object):
         - road_id_to_edge (dictionary): map from road id to edge in the graph
         """
 
-        self._graph = nx.DiGraph()
+        # edge lengths count waypoints, one every sampling_resolution meters
+        self._graph = RouteGraph(unit=self._sampling_resolution)
         self._id_map = dict()  # Map with structure {(x,y,z): id, ... }
         self._road_id_to_edge = dict()  # Map with structure {road_id: {lane_id: edge, ... }, ... }
 
@@ -150,9 +390,7 @@ class GlobalRoutePlanner(object):
             for vertex in entry_xyz, exit_xyz:
                 # Adding unique nodes and populating id_map
                 if vertex not in self._id_map:
-                    new_id = len(self._id_map)
-                    self._id_map[vertex] = new_id
-                    self._graph.add_node(new_id, vertex=vertex)
+                    self._id_map[vertex] = self._graph.add_node(vertex)
             n1 = self._id_map[entry_xyz]
             n2 = self._id_map[exit_xyz]
             if road_id not in self._road_id_to_edge:
@@ -169,105 +407,126 @@ class GlobalRoutePlanner(object):
                 n1, n2,
                 length=len(path) + 1, path=path,
                 entry_waypoint=entry_wp, exit_waypoint=exit_wp,
-                entry_vector=np.array(
-                    [entry_carla_vector.x, entry_carla_vector.y, entry_carla_vector.z]),
-                exit_vector=np.array(
-                    [exit_carla_vector.x, exit_carla_vector.y, exit_carla_vector.z]),
+                entry_vector=[entry_carla_vector.x, entry_carla_vector.y, entry_carla_vector.z],
+                exit_vector=[exit_carla_vector.x, exit_carla_vector.y, exit_carla_vector.z],
                 net_vector=vector(entry_wp.transform.location, exit_wp.transform.location),
-                intersection=intersection, type=RoadOption.LANEFOLLOW)
+                intersection=intersection, road_option=RoadOption.LANEFOLLOW)
 
     def _find_loose_ends(self):
         """
         This method finds road segments that have an unconnected end, and
-        adds them to the internal graph representation
+        adds them to the internal graph representation.
         """
-        count_loose_ends = 0
-        hop_resolution = self._sampling_resolution
+        loose_ends = []
         for segment in self._topology:
             end_wp = segment['exit']
-            exit_xyz = segment['exitxyz']
             road_id, section_id, lane_id = end_wp.road_id, end_wp.section_id, end_wp.lane_id
             if road_id in self._road_id_to_edge \
                     and section_id in self._road_id_to_edge[road_id] \
                     and lane_id in self._road_id_to_edge[road_id][section_id]:
                 pass
             else:
-                count_loose_ends += 1
                 if road_id not in self._road_id_to_edge:
                     self._road_id_to_edge[road_id] = dict()
                 if section_id not in self._road_id_to_edge[road_id]:
                     self._road_id_to_edge[road_id][section_id] = dict()
-                n1 = self._id_map[exit_xyz]
-                n2 = -1*count_loose_ends
-                self._road_id_to_edge[road_id][section_id][lane_id] = (n1, n2)
-                next_wp = end_wp.next(hop_resolution)
-                path = []
-                while next_wp is not None and next_wp \
-                        and next_wp[0].road_id == road_id \
-                        and next_wp[0].section_id == section_id \
-                        and next_wp[0].lane_id == lane_id:
-                    path.append(next_wp[0])
-                    next_wp = next_wp[0].next(hop_resolution)
-                if path:
-                    n2_xyz = (path[-1].transform.location.x,
-                              path[-1].transform.location.y,
-                              path[-1].transform.location.z)
-                    self._graph.add_node(n2, vertex=n2_xyz)
-                    self._graph.add_edge(
-                        n1, n2,
-                        length=len(path) + 1, path=path,
-                        entry_waypoint=end_wp, exit_waypoint=path[-1],
-                        entry_vector=None, exit_vector=None, net_vector=None,
-                        intersection=end_wp.is_junction, type=RoadOption.LANEFOLLOW)
+                # placeholder, so later segments ending on the same lane are not loose ends
+                self._road_id_to_edge[road_id][section_id][lane_id] = None
+                loose_ends.append(segment)
+
+        paths = [self._loose_end_path(segment['exit']) for segment in loose_ends]
+        for segment, path in zip(loose_ends, paths):
+            end_wp = segment['exit']
+            n1 = self._id_map[segment['exitxyz']]
+            if path:
+                n2_xyz = (path[-1].transform.location.x,
+                          path[-1].transform.location.y,
+                          path[-1].transform.location.z)
+                n2 = self._graph.add_node(n2_xyz)
+                self._graph.add_edge(
+                    n1, n2,
+                    length=len(path) + 1, path=path,
+                    entry_waypoint=end_wp, exit_waypoint=path[-1],
+                    intersection=end_wp.is_junction, road_option=RoadOption.LANEFOLLOW)
+            else:
+                # dead end without a node of its own
+                n2 = -1
+            self._road_id_to_edge[end_wp.road_id][end_wp.section_id][end_wp.lane_id] = (n1, n2)
+
+    def _loose_end_path(self, end_wp):
+        """
+        This method returns the waypoints after end_wp that are still on its lane
+        """
+        road_id, section_id, lane_id = end_wp.road_id, end_wp.section_id, end_wp.lane_id
+        next_wp = end_wp.next(self._sampling_resolution)
+        path = []
+        while next_wp is not None and next_wp \
+                and next_wp[0].road_id == road_id \
+                and next_wp[0].section_id == section_id \
+                and next_wp[0].lane_id == lane_id:
+            path.append(next_wp[0])
+            next_wp = next_wp[0].next(self._sampling_resolution)
+        return path
 
     def _lane_change_link(self):
         """
         This method places zero cost links in the topology graph
         representing availability of lane changes.
         """
+        for links in (self._segment_lane_changes(segment) for segment in self._topology):
+            for n1, n2, waypoint, next_waypoint, next_road_option in links:
+                self._graph.add_edge(
+                    n1, n2, entry_waypoint=waypoint,
+                    exit_waypoint=next_waypoint, intersection=False,
+                    path=[], length=0, road_option=next_road_option)
+
+    def _segment_lane_changes(self, segment):
+        """
+        This method returns the lane change links of a segment as a list of
+        (n1, n2, waypoint, next_waypoint, RoadOption)
+        """
+        links = []
+        left_found, right_found = False, False
+
+        for waypoint in segment['path']:
+            if not segment['entry'].is_junction:
+                next_waypoint, next_road_option, next_segment = None, None, None
+
+                if waypoint.right_lane_marking and waypoint.right_lane_marking.lane_change & carla.LaneChange.Right and not right_found:
+                    next_waypoint = waypoint.get_right_lane()
+                    if next_waypoint is not None \
+                            and next_waypoint.lane_type == carla.LaneType.Driving \
+                            and waypoint.road_id == next_waypoint.road_id:
+                        next_road_option = RoadOption.CHANGELANERIGHT
+                        next_segment = self.localize(next_waypoint.transform.location)
+                        if next_segment is not None:
+                            links.append((self._id_map[segment['entryxyz']], next_segment[0], waypoint,
+                                          next_waypoint, next_road_option))
+                            right_found = True
+                if waypoint.left_lane_marking and waypoint.left_lane_marking.lane_change & carla.LaneChange.Left and not left_found:
+                    next_waypoint = waypoint.get_left_lane()
+                    if next_waypoint is not None \
+                            and next_waypoint.lane_type == carla.LaneType.Driving \
+                            and waypoint.road_id == next_waypoint.road_id:
+                        next_road_option = RoadOption.CHANGELANELEFT
+                        next_segment = self.localize(next_waypoint.transform.location)
+                        if next_segment is not None:
+                            links.append((self._id_map[segment['entryxyz']], next_segment[0], waypoint,
+                                          next_waypoint, next_road_option))
+                            left_found = True
+            if left_found and right_found:
+                break
+        return links
 
-        for segment in self._topology:
-            left_found, right_found = False, False
-
-            for waypoint in segment['path']:
-                if not segment['entry'].is_junction:
-                    next_waypoint, next_road_option, next_segment = None, None, None
-
-                    if waypoint.right_lane_marking and waypoint.right_lane_marking.lane_change & carla.LaneChange.Right and not right_found:
-                        next_waypoint = waypoint.get_right_lane()
-                        if next_waypoint is not None \
-                                and next_waypoint.lane_type == carla.LaneType.Driving \
-                                and waypoint.road_id == next_waypoint.road_id:
-                            next_road_option = RoadOption.CHANGELANERIGHT
-                            next_segment = self._localize(next_waypoint.transform.location)
-                            if next_segment is not None:
-                                self._graph.add_edge(
-                                    self._id_map[segment['entryxyz']], next_segment[0], entry_waypoint=waypoint,
-                                    exit_waypoint=next_waypoint, intersection=False, exit_vector=None,
-                                    path=[], length=0, type=next_road_option, change_waypoint=next_waypoint)
-                                right_found = True
-                    if waypoint.left_lane_marking and waypoint.left_lane_marking.lane_change & carla.LaneChange.Left and not left_found:
-                        next_waypoint = waypoint.get_left_lane()
-                        if next_waypoint is not None \
-                                and next_waypoint.lane_type == carla.LaneType.Driving \
-                                and waypoint.road_id == next_waypoint.road_id:
-                            next_road_option = RoadOption.CHANGELANELEFT
-                            next_segment = self._localize(next_waypoint.transform.location)
-                            if next_segment is not None:
-                                self._graph.add_edge(
-                                    self._id_map[segment['entryxyz']], next_segment[0], entry_waypoint=waypoint,
-                                    exit_waypoint=next_waypoint, intersection=False, exit_vector=None,
-                                    path=[], length=0, type=next_road_option, change_waypoint=next_waypoint)
-                                left_found = True
-                if left_found and right_found:
-                    break
-
-    def _localize(self, location):
+    def localize(self, location):
         """
         This function finds the road segment that a given location
         is part of, returning the edge it belongs to
         """
-        waypoint = self._wmap.get_waypoint(location)
+        if self._waypoint_index is not None:
+            waypoint = self._waypoint_index.get_waypoint(location)
+        else:
+            waypoint = self._wmap.get_waypoint(location)
         edge = None
         try:
             edge = self._road_id_to_edge[waypoint.road_id][waypoint.section_id][waypoint.lane_id]
@@ -275,15 +534,6 @@ class GlobalRoutePlanner(object):
             pass
         return edge
 
-    def _distance_heuristic(self, n1, n2):
-        """
-        Distance heuristic calculator for path searching
-        in self._graph
-        """
-        l1 = np.array(self._graph.nodes[n1]['vertex'])
-        l2 = np.array(self._graph.nodes[n2]['vertex'])
-        return np.linalg.norm(l1-l2)
-
     def _path_search(self, origin, destination):
         """
         This function finds the shortest path connecting origin and destination
@@ -293,13 +543,15 @@ class GlobalRoutePlanner(object):
         return      :   path as list of node ids (as int) of the graph self._graph
         connecting origin and destination
         """
-        start, end = self._localize(origin), self._localize(destination)
+        start, end = self.localize(origin), self.localize(destination)
+        return self._search(start, end)
 
-        route = nx.astar_path(
-            self._graph, source=start[0], target=end[0],
-            heuristic=self._distance_heuristic, weight='length')
-        route.append(end[1])
-        return route
+    def _search(self, start, end):
+        """
+        A* search between two edges returned by localize
+        return      :   path as list of node ids (as int) of the graph self._graph
+        """
+        return search_route(self._graph, start, end, self._heuristic)
 
     def _successive_last_intersection_edge(self, index, route):
         """
@@ -312,10 +564,10 @@ class GlobalRoutePlanner(object):
         last_intersection_edge = None
         last_node = None
         for node1, node2 in [(route[i], route[i+1]) for i in range(index, len(route)-1)]:
-            candidate_edge = self._graph.edges[node1, node2]
+            candidate_edge = self._graph.edge(node1, node2)
             if node1 == route[index]:
                 last_intersection_edge = candidate_edge
-            if candidate_edge['type'] == RoadOption.LANEFOLLOW and candidate_edge['intersection']:
+            if self._graph.type[candidate_edge] == RoadOption.LANEFOLLOW and self._graph.intersection[candidate_edge]:
                 last_intersection_edge = candidate_edge
                 last_node = node2
             else:
@@ -323,76 +575,117 @@ class GlobalRoutePlanner(object):
 
         return last_node, last_intersection_edge
 
-    def _turn_decision(self, index, route, threshold=math.radians(35)):
+    def _turn(self, current_edge, next_edge, tail_edge, threshold=TURN_THRESHOLD):
+        """
+        This method returns the turn decision (RoadOption) and the deviation angle when
+        leaving current_edge through the intersection edge next_edge, the intersection
+        ending at tail_edge (see _successive_last_intersection_edge).
+        The deviation is NaN when an edge has no exit vector, the decision being then
+        the type of tail_edge
+        """
+        graph = self._graph
+        cv, nv = graph.exit_vector[current_edge], graph.exit_vector[tail_edge]
+        if np.isnan(cv).any() or np.isnan(nv).any():
+            return RoadOption(int(graph.type[tail_edge])), float('nan')
+        decision = None
+        cross_list = []
+        for select_edge in graph.successors(graph.dst[current_edge]):
+            if graph.type[select_edge] == RoadOption.LANEFOLLOW:
+                if graph.dst[select_edge] != graph.dst[next_edge]:
+                    sv = graph.net_vector[select_edge]
+                    # loose ends have no net vector
+                    if not np.isnan(sv).any():
+                        cross_list.append(np.cross(cv, sv)[2])
+        next_cross = np.cross(cv, nv)[2]
+        deviation = math.acos(np.clip(
+            np.dot(cv, nv)/(np.linalg.norm(cv)*np.linalg.norm(nv)), -1.0, 1.0))
+        if not cross_list:
+            cross_list.append(0)
+        if deviation < threshold:
+            decision = RoadOption.STRAIGHT
+        elif cross_list and next_cross < min(cross_list):
+            decision = RoadOption.LEFT
+        elif cross_list and next_cross > max(cross_list):
+            decision = RoadOption.RIGHT
+        elif next_cross < 0:
+            decision = RoadOption.LEFT
+        elif next_cross > 0:
+            decision = RoadOption.RIGHT
+        return decision, deviation
+
+    def _build_turn_table(self):
+        """
+        This method precomputes _turn for every lane following edge entering an intersection
+        and every edge that can end that intersection, in the table
+        graph.turns = {(current edge, next edge, tail edge): (RoadOption value, deviation)}
+        """
+        graph = self._graph
+        lanefollow = graph.type == RoadOption.LANEFOLLOW
+        junction = lanefollow & graph.intersection
+        turns = {}
+        for current_edge in np.flatnonzero(lanefollow & ~graph.intersection).tolist():
+            for next_edge in graph.successors(graph.dst[current_edge]).tolist():
+                if not junction[next_edge]:
+                    continue
+                # edges reachable through successive intersection edges from next_edge
+                tails, stack = set(), [next_edge]
+                while stack:
+                    edge = stack.pop()
+                    if edge not in tails:
+                        tails.add(edge)
+                        stack.extend(e for e in graph.successors(graph.dst[edge]).tolist() if junction[e])
+                for tail_edge in tails:
+                    decision, deviation = self._turn(current_edge, next_edge, tail_edge)
+                    turns[(current_edge, next_edge, tail_edge)] = (
+                        None if decision is None else int(decision), deviation)
+        graph.turns = turns
+
+    def _turn_decision(self, index, route, threshold=TURN_THRESHOLD, state=None):
         """
         This method returns the turn decision (RoadOption) for pair of edges
-        around current index of route list
+        around current index of route list.
+        state holds the previous decision and intersection end node of the route being traced
         """
+        if state is None:
+            state = {'previous_decision': RoadOption.VOID, 'intersection_end_node': -1}
 
+        graph = self._graph
         decision = None
         previous_node = route[index-1]
         current_node = route[index]
         next_node = route[index+1]
-        next_edge = self._graph.edges[current_node, next_node]
+        next_edge = graph.edge(current_node, next_node)
         if index > 0:
-            if self._previous_decision != RoadOption.VOID \
-                    and self._intersection_end_node > 0 \
-                    and self._intersection_end_node != previous_node \
-                    and next_edge['type'] == RoadOption.LANEFOLLOW \
-                    and next_edge['intersection']:
-                decision = self._previous_decision
+            if state['previous_decision'] != RoadOption.VOID \
+                    and state['intersection_end_node'] > 0 \
+                    and state['intersection_end_node'] != previous_node \
+                    and graph.type[next_edge] == RoadOption.LANEFOLLOW \
+                    and graph.intersection[next_edge]:
+                decision = state['previous_decision']
             else:
-                self._intersection_end_node = -1
-                current_edge = self._graph.edges[previous_node, current_node]
-                calculate_turn = current_edge['type'] == RoadOption.LANEFOLLOW and not current_edge[
-                    'intersection'] and next_edge['type'] == RoadOption.LANEFOLLOW and next_edge['intersection']
+                state['intersection_end_node'] = -1
+                current_edge = graph.edge(previous_node, current_node)
+                calculate_turn = graph.type[current_edge] == RoadOption.LANEFOLLOW and not graph.intersection[
+                    current_edge] and graph.type[next_edge] == RoadOption.LANEFOLLOW and graph.intersection[next_edge]
                 if calculate_turn:
+                    first_edge = next_edge
                     last_node, tail_edge = self._successive_last_intersection_edge(index, route)
-                    self._intersection_end_node = last_node
+                    state['intersection_end_node'] = last_node
                     if tail_edge is not None:
                         next_edge = tail_edge
-                    cv, nv = current_edge['exit_vector'], next_edge['exit_vector']
-                    if cv is None or nv is None:
-                        return next_edge['type']
-                    cross_list = []
-                    for neighbor in self._graph.successors(current_node):
-                        select_edge = self._graph.edges[current_node, neighbor]
-                        if select_edge['type'] == RoadOption.LANEFOLLOW:
-                            if neighbor != route[index+1]:
-                                sv = select_edge['net_vector']
-                                cross_list.append(np.cross(cv, sv)[2])
-                    next_cross = np.cross(cv, nv)[2]
-                    deviation = math.acos(np.clip(
-                        np.dot(cv, nv)/(np.linalg.norm(cv)*np.linalg.norm(nv)), -1.0, 1.0))
-                    if not cross_list:
-                        cross_list.append(0)
-                    if deviation < threshold:
-                        decision = RoadOption.STRAIGHT
-                    elif cross_list and next_cross < min(cross_list):
-                        decision = RoadOption.LEFT
-                    elif cross_list and next_cross > max(cross_list):
-                        decision = RoadOption.RIGHT
-                    elif next_cross < 0:
-                        decision = RoadOption.LEFT
-                    elif next_cross > 0:
-                        decision = RoadOption.RIGHT
+                    key = (current_edge, first_edge, next_edge)
+                    if threshold == TURN_THRESHOLD and key in graph.turns:
+                        option, deviation = graph.turns[key]
+                        decision = None if option is None else RoadOption(option)
+                    else:
+                        decision, deviation = self._turn(current_edge, first_edge, next_edge, threshold)
+                    if math.isnan(deviation):
+                        return decision
                 else:
-                    decision = next_edge['type']
+                    decision = RoadOption(int(graph.type[next_edge]))
 
         else:
-            decision = next_edge['type']
+            decision = RoadOption(int(graph.type[next_edge]))
 
-        self._previous_decision = decision
+        state['previous_decision'] = decision
         return decision
-
-    def _find_closest_in_list(self, current_waypoint, waypoint_list):
-        min_distance = float('inf')
-        closest_index = -1
-        for i, waypoint in enumerate(waypoint_list):
-            distance = waypoint.transform.location.distance(
-                current_waypoint.transform.location)
-            if distance < min_distance:
-                min_distance = distance
-                closest_index = i
-
-        return closest_index
@@ -8,9 +8,15 @@
 from enum import IntEnum
 from collections import deque
 import random
+import numpy as np
 
-import carla
+try:
+    import carla
+except ImportError:
+    # planning without the CARLA client library, see agents.tools.opendrive
+    from agents.tools import opendrive as carla
 from agents.navigation.controller import VehiclePIDController
+from agents.tools import opendrive
 from agents.tools.misc import draw_waypoints, get_speed
 
 
@@ -58,7 +64,7 @@ class LocalPlanner(object):
         self._vehicle = vehicle
         self._world = self._vehicle.get_world()
         if map_inst:
-            if isinstance(map_inst, carla.Map):
+            if isinstance(map_inst, (carla.Map, opendrive.Map)):
                 self._map = map_inst
             else:
                 print("Warning: Ignoring the given map as it is not a 'carla.Map'")
@@ -71,6 +77,11 @@ class LocalPlanner(object):
         self.target_road_option = None
 
         self._waypoints_queue = deque(maxlen=10000)
+        # geometry of the queue, one row per entry: location, right vector (x, y)
+        # and arc length along the plan (see _append_to_plan)
+        self._plan_xyz = np.zeros((0, 3))
+        self._plan_right = np.zeros((0, 2))
+        self._plan_arc = np.zeros(0)
         self._min_waypoint_queue_length = 100
         self._stop_waypoint_creation = False
 
@@ -135,7 +146,7 @@ class LocalPlanner(object):
         # Compute the current vehicle waypoint
         current_waypoint = self._map.get_waypoint(self._vehicle.get_location())
         self.target_waypoint, self.target_road_option = (current_waypoint, RoadOption.LANEFOLLOW)
-        self._waypoints_queue.append((self.target_waypoint, self.target_road_option))
+        self._append_to_plan([(self.target_waypoint, self.target_road_option)])
 
     def set_speed(self, speed):
         """
@@ -169,8 +180,9 @@ class LocalPlanner(object):
         available_entries = self._waypoints_queue.maxlen - len(self._waypoints_queue)
         k = min(available_entries, k)
 
+        new_entries = []
+        last_waypoint = self._waypoints_queue[-1][0]
         for _ in range(k):
-            last_waypoint = self._waypoints_queue[-1][0]
             next_waypoints = list(last_waypoint.next(self._sampling_radius))
 
             if len(next_waypoints) == 0:
@@ -187,7 +199,89 @@ class LocalPlanner(object):
                 next_waypoint = next_waypoints[road_options_list.index(
                     road_option)]
 
-            self._waypoints_queue.append((next_waypoint, road_option))
+            new_entries.append((next_waypoint, road_option))
+            last_waypoint = next_waypoint
+
+        self._append_to_plan(new_entries)
+
+    def _append_to_plan(self, entries):
+        """
+        Appends (carla.Waypoint, RoadOption) entries to the waypoints queue and their
+        geometry to the plan arrays
+
+        :param entries: list of (carla.Waypoint, RoadOption)
+        :return:
+        """
+        if not entries:
+            return
+        self._waypoints_queue.extend(entries)
+
+        xyz = np.empty((len(entries), 3))
+        right = np.empty((len(entries), 2))
+        for i, (waypoint, _) in enumerate(entries):
+            transform = waypoint.transform
+            r_vec = transform.get_right_vector()
+            xyz[i] = (transform.location.x, transform.location.y, transform.location.z)
+            right[i] = (r_vec.x, r_vec.y)
+
+        # arc length continues from the last waypoint already in the plan
+        if len(self._plan_xyz):
+            steps = np.linalg.norm(np.diff(np.vstack((self._plan_xyz[-1:], xyz)), axis=0), axis=1)
+            arc = self._plan_arc[-1] + np.cumsum(steps)
+        else:
+            arc = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(xyz, axis=0), axis=1))))
+
+        self._plan_xyz = np.vstack((self._plan_xyz, xyz))
+        self._plan_right = np.vstack((self._plan_right, right))
+        self._plan_arc = np.concatenate((self._plan_arc, arc))
+
+    def _pop_plan(self, count):
+        """Removes the first count entries of the waypoints queue and of the plan arrays"""
+        for _ in range(count):
+            self._waypoints_queue.popleft()
+        # slices are views, purging does not copy the arrays
+        self._plan_xyz = self._plan_xyz[count:]
+        self._plan_right = self._plan_right[count:]
+        self._plan_arc = self._plan_arc[count:]
+
+    def _count_within(self, location, distance, inclusive=False):
+        """
+        Number of leading waypoints of the plan that are closer than distance to location.
+
+        Waypoints closer than distance to location are at most 2 * distance apart, so the
+        distances are computed over windows of about that arc length (binary search on the
+        cumulative arc length), moving to the next window only while every waypoint of
+        the current one is within distance.
+
+        :param location: carla.Location
+        :param distance: distance in meters
+        :param inclusive: also count the waypoints exactly at distance
+        :return: int
+        """
+        point = np.array([location.x, location.y, location.z])
+        size = len(self._plan_arc)
+        start = 0
+        while start < size:
+            end = np.searchsorted(self._plan_arc, self._plan_arc[start] + 2 * distance, side='right')
+            end = max(int(end), start + 1)
+            distances = np.linalg.norm(self._plan_xyz[start:end] - point, axis=1)
+            outside = distances > distance if inclusive else distances >= distance
+            if outside.any():
+                return start + int(np.argmax(outside))
+            start = end
+        return size
+
+    def get_plan_geometry(self, location, max_distance):
+        """
+        Returns the locations and right vectors of the leading waypoints of the plan
+        that are within max_distance of location
+
+        :param location: carla.Location
+        :param max_distance: distance in meters
+        :return: (n, 3) array of locations and (n, 2) array of right vectors (x, y)
+        """
+        count = self._count_within(location, max_distance, inclusive=True)
+        return self._plan_xyz[:count], self._plan_right[:count]
 
     def set_global_plan(self, current_plan, stop_waypoint_creation=True, clean_queue=True):
         """
@@ -201,7 +295,7 @@ class LocalPlanner(object):
         :return:
         """
         if clean_queue:
-            self._waypoints_queue.clear()
+            self._pop_plan(len(self._waypoints_queue))
 
         # Remake the waypoints queue if the new plan has a higher length than the queue
         new_plan_length = len(current_plan) + len(self._waypoints_queue)
@@ -211,8 +305,7 @@ class LocalPlanner(object):
                 new_waypoint_queue.append(wp)
             self._waypoints_queue = new_waypoint_queue
 
-        for elem in current_plan:
-            self._waypoints_queue.append(elem)
+        self._append_to_plan(list(current_plan))
 
         self._stop_waypoint_creation = stop_waypoint_creation
 
@@ -240,22 +333,16 @@ class LocalPlanner(object):
         vehicle_speed = get_speed(self._vehicle) / 3.6
         self._min_distance = self._base_min_distance + self._distance_ratio * vehicle_speed
 
-        num_waypoint_removed = 0
-        for waypoint, _ in self._waypoints_queue:
-
-            if len(self._waypoints_queue) - num_waypoint_removed == 1:
-                min_distance = 1  # Don't remove the last waypoint until very close by
-            else:
-                min_distance = self._min_distance
-
-            if veh_location.distance(waypoint.transform.location) < min_distance:
-                num_waypoint_removed += 1
-            else:
-                break
+        queue_length = len(self._waypoints_queue)
+        num_waypoint_removed = self._count_within(veh_location, self._min_distance)
+        if queue_length and num_waypoint_removed >= queue_length - 1:
+            # Don't remove the last waypoint until very close by
+            last_distance = np.linalg.norm(
+                self._plan_xyz[-1] - (veh_location.x, veh_location.y, veh_location.z))
+            num_waypoint_removed = queue_length - 1 + int(last_distance < 1)
 
         if num_waypoint_removed > 0:
-            for _ in range(num_waypoint_removed):
-                self._waypoints_queue.popleft()
+            self._pop_plan(num_waypoint_removed)
 
         # Get the target waypoint and move using the PID controllers. Stop if no target waypoint
         if len(self._waypoints_queue) == 0:
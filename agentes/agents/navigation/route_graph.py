@@ -0,0 +1,322 @@
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+This module provides RouteGraph, the array-based route graph of the GlobalRoutePlanner.
+"""
+
+import heapq
+import math
+import operator
+
+import numpy as np
+
+
+class NoRouteError(Exception):
+    """Raised when there is no path between two nodes of the RouteGraph"""
+
+
+class RouteGraph(object):
+    """
+    Directed graph of the road network stored in NumPy arrays.
+
+    Nodes are integer ids (0..n_nodes-1) with their (x,y,z) position in `vertices`.
+    Edges are integer ids with one entry per edge in `src`, `dst`, `length`, `type`
+    (RoadOption value), `intersection` and the unit vectors `entry_vector`, `exit_vector`
+    and `net_vector` (NaN when the edge has none). The outgoing edges of node n are
+    `out_edges[indptr[n]:indptr[n+1]]` (CSR adjacency).
+
+    Waypoints are not kept as carla.Waypoint objects but as rows of a waypoint table:
+    location (`wp_xyz`), OpenDRIVE coordinates (`wp_road`, `wp_section`, `wp_lane`, `wp_s`)
+    and `wp_lane_width`. Each edge points to its entry and exit rows (`entry`, `exit`) and
+    to the rows of its path, `path_start[e]:path_end[e]`.
+
+    build_landmarks() precomputes the distance tables of the ALT heuristic (A*, landmarks,
+    triangle inequality): graph distances from and to a few landmark nodes, which bound the
+    distance between any two nodes from below, usually much tighter than the straight line.
+
+    Nodes and edges are added with add_node/add_edge, then freeze() builds the arrays.
+    Adding an edge between two nodes that are already connected replaces it, as in a
+    networkx.DiGraph.
+
+    `unit` is the length in meters of one unit of edge length (the sampling resolution
+    of the GlobalRoutePlanner, whose edge lengths count waypoints). The Euclidean
+    heuristic divides the distances by it so it stays in the units of the edge lengths.
+
+    `turns` is the table of turn decisions filled by the GlobalRoutePlanner.
+
+    `version` changes whenever the graph or its landmark tables change, so results
+    computed over the graph (e.g. cached routes) can be checked against it.
+    """
+
+    version = 0
+
+    def __init__(self, unit=1.0):
+        self.unit = unit
+        self._vertices = []
+        self._edges = []
+        self._edge_ids = {}
+        self._waypoints = []
+        self.landmarks = np.zeros(0, dtype=np.int32)
+        self.landmark_from = np.zeros((0, 0), dtype=np.float32)
+        self.landmark_to = np.zeros((0, 0), dtype=np.float32)
+        self.turns = {}
+
+    # Construction
+
+    def add_node(self, vertex):
+        """Adds a node at vertex (x,y,z) and returns its id"""
+        self.version += 1
+        self._vertices.append(tuple(vertex))
+        return len(self._vertices) - 1
+
+    def add_waypoints(self, waypoints):
+        """Adds carla.Waypoint objects to the waypoint table and returns their rows"""
+        first = len(self._waypoints)
+        for waypoint in waypoints:
+            location = waypoint.transform.location
+            self._waypoints.append((location.x, location.y, location.z, waypoint.road_id, waypoint.section_id,
+                                    waypoint.lane_id, waypoint.s, waypoint.lane_width))
+        return list(range(first, len(self._waypoints)))
+
+    def add_edge(self, n1, n2, length, entry_waypoint, exit_waypoint, path, road_option, intersection,
+                 entry_vector=None, exit_vector=None, net_vector=None):
+        """
+        Adds the edge n1 -> n2.
+
+            :param length: weight of the edge in the route search
+            :param entry_waypoint: carla.Waypoint at the start of the edge
+            :param exit_waypoint: carla.Waypoint at the end of the edge
+            :param path: list of carla.Waypoint between entry and exit
+            :param road_option: RoadOption of the edge
+        """
+        self.version += 1
+        entry = self.add_waypoints([entry_waypoint])[0]
+        exit_ = self.add_waypoints([exit_waypoint])[0]
+        rows = self.add_waypoints(path)
+        path_start = rows[0] if rows else len(self._waypoints)
+        edge = (n1, n2, length, int(road_option.value), bool(intersection), entry, exit_,
+                path_start, path_start + len(rows), entry_vector, exit_vector, net_vector)
+        if (n1, n2) in self._edge_ids:
+            self._edges[self._edge_ids[(n1, n2)]] = edge
+        else:
+            self._edge_ids[(n1, n2)] = len(self._edges)
+            self._edges.append(edge)
+
+    def freeze(self):
+        """Converts the nodes, edges and waypoints added so far into arrays"""
+        self.version += 1
+        nan3 = (np.nan, np.nan, np.nan)
+
+        def vectors(column):
+            return np.array([nan3 if e[column] is None else tuple(e[column]) for e in self._edges],
+                            dtype=np.float64).reshape(-1, 3)
+
+        self.vertices = np.array(self._vertices, dtype=np.float64).reshape(-1, 3)
+        edges = self._edges
+        self.src = np.array([e[0] for e in edges], dtype=np.int32)
+        self.dst = np.array([e[1] for e in edges], dtype=np.int32)
+        self.length = np.array([e[2] for e in edges], dtype=np.float32)
+        self.type = np.array([e[3] for e in edges], dtype=np.int8)
+        self.intersection = np.array([e[4] for e in edges], dtype=bool)
+        self.entry = np.array([e[5] for e in edges], dtype=np.int32)
+        self.exit = np.array([e[6] for e in edges], dtype=np.int32)
+        self.path_start = np.array([e[7] for e in edges], dtype=np.int32)
+        self.path_end = np.array([e[8] for e in edges], dtype=np.int32)
+        self.entry_vector, self.exit_vector, self.net_vector = vectors(9), vectors(10), vectors(11)
+
+        # CSR adjacency, keeping the insertion order of the edges of each node
+        order = np.argsort(self.src, kind='stable').astype(np.int32)
+        self.out_edges = order
+        self.indptr = np.zeros(len(self.vertices) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.src, minlength=len(self.vertices)), out=self.indptr[1:])
+
+        table = self._waypoints
+        self.wp_xyz = np.array([w[:3] for w in table], dtype=np.float32).reshape(-1, 3)
+        self.wp_road = np.array([w[3] for w in table], dtype=np.int32)
+        self.wp_section = np.array([w[4] for w in table], dtype=np.int32)
+        self.wp_lane = np.array([w[5] for w in table], dtype=np.int32)
+        self.wp_s = np.array([w[6] for w in table], dtype=np.float64)
+        self.wp_lane_width = np.array([w[7] for w in table], dtype=np.float32)
+
+        self._edge_ids = {(int(n1), int(n2)): e for e, (n1, n2) in enumerate(zip(self.src, self.dst))}
+        self.in_edges = np.argsort(self.dst, kind='stable').astype(np.int32)
+        self.in_indptr = np.zeros(len(self.vertices) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.dst, minlength=len(self.vertices)), out=self.in_indptr[1:])
+        self._vertices, self._edges, self._waypoints = None, None, None
+
+    # Queries
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def edge(self, n1, n2):
+        """Id of the edge n1 -> n2 (KeyError if there is none)"""
+        return self._edge_ids[(n1, n2)]
+
+    def successors(self, node):
+        """Ids of the edges leaving node"""
+        return self.out_edges[self.indptr[node]:self.indptr[node + 1]]
+
+    def path(self, edge):
+        """Waypoint rows of the path of edge (without entry and exit)"""
+        return np.arange(self.path_start[edge], self.path_end[edge])
+
+    def lane(self, edge):
+        """Waypoint rows of edge from entry to exit"""
+        return np.concatenate(([self.entry[edge]], self.path(edge), [self.exit[edge]]))
+
+    def closest(self, rows, xyz):
+        """Position in rows of the waypoint closest to xyz (first one on ties)"""
+        distances = np.linalg.norm(self.wp_xyz[rows] - np.asarray(xyz, dtype=np.float32), axis=1)
+        return int(np.argmin(distances))
+
+    def dijkstra(self, source, reverse=False):
+        """
+        Distances (in edge lengths) from source to every node, or from every node
+        to source if reverse. Unreachable nodes get inf.
+        """
+        if reverse:
+            indptr, edges, other = self.in_indptr, self.in_edges, self.src
+        else:
+            indptr, edges, other = self.indptr, self.out_edges, self.dst
+        distances = np.full(len(self.vertices), np.inf)
+        distances[source] = 0.0
+        queue = [(0.0, source)]
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if cost > distances[node]:
+                continue
+            node_edges = edges[indptr[node]:indptr[node + 1]]
+            for neighbor, weight in zip(other[node_edges].tolist(), self.length[node_edges].tolist()):
+                if cost + weight < distances[neighbor]:
+                    distances[neighbor] = cost + weight
+                    heapq.heappush(queue, (cost + weight, neighbor))
+        return distances
+
+    def build_landmarks(self, count):
+        """
+        Chooses count landmarks spread over the map (farthest point sampling of the
+        vertices) and stores the graph distances from and to each of them
+        """
+        self.version += 1
+        count = min(count, len(self.vertices))
+        landmarks = []
+        nearest = np.full(len(self.vertices), np.inf)
+        candidate = int(np.argmax(np.linalg.norm(self.vertices - self.vertices.mean(axis=0), axis=1)))
+        for _ in range(count):
+            landmarks.append(candidate)
+            nearest = np.minimum(nearest, np.linalg.norm(self.vertices - self.vertices[candidate], axis=1))
+            candidate = int(np.argmax(nearest))
+        self.landmarks = np.array(landmarks, dtype=np.int32)
+        self.landmark_from = np.array([self.dijkstra(l) for l in landmarks], dtype=np.float32).reshape(-1, len(self.vertices))
+        self.landmark_to = np.array([self.dijkstra(l, reverse=True) for l in landmarks],
+                                    dtype=np.float32).reshape(-1, len(self.vertices))
+
+    def heuristic(self, target, kind='euclidean'):
+        """
+        Estimated cost from every node to target.
+
+            :param kind: 'euclidean' (distance between the vertices, in edge length units)
+                or 'alt' (landmark lower bounds, see build_landmarks)
+        """
+        if kind == 'euclidean' or not len(self.landmarks):
+            return np.linalg.norm(self.vertices - self.vertices[target], axis=1) / self.unit
+        if kind != 'alt':
+            raise ValueError(f"Unknown heuristic '{kind}', use 'euclidean' or 'alt'")
+        # d(n, t) >= d(L, t) - d(L, n) and d(n, t) >= d(n, L) - d(t, L); pairs with an
+        # unreachable side give no bound
+        with np.errstate(invalid='ignore'):
+            bounds = np.concatenate([self.landmark_from[:, [target]] - self.landmark_from,
+                                     self.landmark_to - self.landmark_to[:, [target]]])
+        bounds[~np.isfinite(bounds)] = 0.0
+        return np.maximum(bounds.max(axis=0), 0.0).astype(np.float64)
+
+    def _estimate(self, target, kind):
+        """
+        Function returning the estimate of heuristic(target, kind) for one node, computed
+        only for the nodes the search reaches (and memoized), so a query does not pay for
+        the whole graph before expanding its first node
+        """
+        if kind not in ('euclidean', 'alt'):
+            raise ValueError(f"Unknown heuristic '{kind}', use 'euclidean' or 'alt'")
+        memo = {}
+        if kind == 'euclidean' or not len(self.landmarks):
+            # vertices as Python tuples, made once per graph
+            if getattr(self, '_vertex_list', (None,))[0] is not self.vertices:
+                self._vertex_list = (self.vertices, [tuple(v) for v in self.vertices.tolist()])
+            vertices, unit = self._vertex_list[1], self.unit
+            target_vertex = vertices[target]
+
+            def estimate(node):
+                value = memo.get(node)
+                if value is None:
+                    value = memo[node] = math.dist(vertices[node], target_vertex) / unit
+                return value
+            return estimate
+
+        # bound_i(node) = offsets_i(target) + rows[node, i] for the 2k landmark bounds of
+        # heuristic(); unreachable sides become -inf so they never give a bound. The rows
+        # are made once per landmark table
+        if getattr(self, '_landmark_rows', (None,))[0] is not self.landmark_from:
+            rows = np.hstack([-self.landmark_from.T, self.landmark_to.T]).astype(np.float64)
+            rows[rows == np.inf] = -np.inf
+            self._landmark_rows = (self.landmark_from, rows)
+        rows = self._landmark_rows[1]
+        offsets = np.concatenate([self.landmark_from[:, target], -self.landmark_to[:, target]]).astype(np.float64)
+        offsets[offsets == np.inf] = -np.inf
+        offsets = offsets.tolist()
+
+        def estimate(node):
+            value = memo.get(node)
+            if value is None:
+                value = memo[node] = max(0.0, max(map(operator.add, offsets, rows[node].tolist())))
+            return value
+        return estimate
+
+    def astar(self, source, target, heuristic=None, stats=None):
+        """
+        A* search from source to target weighted by the edge lengths.
+
+            :param heuristic: array with the estimated cost from every node to target,
+                or the kind given to heuristic() (Euclidean distance if None), which is
+                then evaluated only for the nodes the search reaches
+            :param stats: dictionary that receives the number of 'expanded' nodes
+            :return: list of node ids from source to target
+        """
+        if heuristic is None or isinstance(heuristic, str):
+            estimate = self._estimate(target, heuristic or 'euclidean')
+        else:
+            estimate = np.asarray(heuristic).tolist().__getitem__
+        indptr, out_edges, dst, length = self.indptr, self.out_edges, self.dst, self.length
+
+        costs = {source: 0.0}
+        parents = {source: None}
+        closed = set()
+        counter = 0
+        queue = [(estimate(source), counter, 0.0, source)]
+        while queue:
+            _, _, cost, node = heapq.heappop(queue)
+            if node == target:
+                if stats is not None:
+                    stats['expanded'] = len(closed)
+                route = []
+                while node is not None:
+                    route.append(node)
+                    node = parents[node]
+                return route[::-1]
+            if node in closed:
+                continue
+            closed.add(node)
+            edges = out_edges[indptr[node]:indptr[node + 1]]
+            for neighbor, weight in zip(dst[edges].tolist(), length[edges].tolist()):
+                new_cost = cost + weight
+                if neighbor not in closed and new_cost < costs.get(neighbor, float('inf')):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = node
+                    counter += 1
+                    heapq.heappush(queue, (new_cost + estimate(neighbor), counter, new_cost, neighbor))
+        if stats is not None:
+            stats['expanded'] = len(closed)
+        raise NoRouteError(f"No route between nodes {source} and {target}")
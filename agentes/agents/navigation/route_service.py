@@ -0,0 +1,138 @@
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+This module provides RouteService, a process-wide route planner shared by all agents.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from agents.navigation.global_route_planner import GlobalRoutePlanner, GRAPH_CACHE_DIR, map_digest, search_route
+
+# graph used by the search processes (see _init_search_worker)
+_worker_graph = None
+
+
+def _init_search_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _search_worker(start, end, heuristic):
+    """
+    A* search between two localized edges over the graph of the worker process
+    """
+    return search_route(_worker_graph, start, end, heuristic)
+
+
+class RouteService(object):
+    """
+    RouteService holds a single GlobalRoutePlanner per map and sampling resolution,
+    shared by every agent of the process, and answers batches of route queries
+    concurrently.
+
+    With executor='thread' each query is traced in a thread pool over the shared graph.
+    With executor='process' the A* searches run in a process pool, each worker holding
+    a copy of the RouteGraph, and the waypoints of the plans are filled in by the calling
+    process, which holds the carla.Map.
+    """
+
+    _services = {}
+    _services_lock = threading.Lock()
+
+    def __init__(self, planner, workers=None, executor='thread'):
+        """
+            :param planner: GlobalRoutePlanner to share
+            :param workers: size of the pool (defaults to the number of CPUs)
+            :param executor: 'thread' or 'process'
+        """
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor '{executor}', use 'thread' or 'process'")
+        self._planner = planner
+        self._workers = workers or os.cpu_count() or 1
+        self._executor_type = executor
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, wmap, sampling_resolution=2.0, workers=None, executor='thread', cache_dir=GRAPH_CACHE_DIR,
+               landmarks=0):
+        """
+        Returns the service of the given map and sampling resolution, building its
+        GlobalRoutePlanner the first time it is requested (the other arguments only
+        apply to that first call). Maps are told apart by name and OpenDRIVE content.
+        """
+        key = (wmap.name, map_digest(wmap), sampling_resolution)
+        with cls._services_lock:
+            if key not in cls._services:
+                planner = GlobalRoutePlanner(wmap, sampling_resolution, cache_dir=cache_dir, landmarks=landmarks)
+                cls._services[key] = cls(planner, workers=workers, executor=executor)
+            return cls._services[key]
+
+    @classmethod
+    def close_all(cls):
+        """Shuts down the pools of every shared service"""
+        with cls._services_lock:
+            for service in cls._services.values():
+                service.close()
+            cls._services.clear()
+
+    @property
+    def planner(self):
+        """Shared GlobalRoutePlanner"""
+        return self._planner
+
+    def trace_route(self, origin, destination):
+        """
+        This method returns list of (carla.Waypoint, RoadOption)
+        from origin to destination, as GlobalRoutePlanner.trace_route
+        """
+        return self._planner.trace_route(origin, destination)
+
+    def trace_routes(self, queries):
+        """
+        Traces a batch of routes concurrently.
+
+            :param queries: list of (origin, destination) carla.Location pairs
+            :return: list with the (carla.Waypoint, RoadOption) plan of each query, in order
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        executor = self._get_executor()
+        if self._executor_type == 'thread':
+            futures = [executor.submit(self._planner.trace_route, origin, destination)
+                       for origin, destination in queries]
+            return [future.result() for future in futures]
+
+        # localization needs the carla.Map, so it stays in this process; only the
+        # routes missing from the route cache of the planner are searched
+        planner = self._planner
+        edges = [(planner.localize(origin), planner.localize(destination)) for origin, destination in queries]
+        routes = [planner.cached_route(start, end) for start, end in edges]
+        futures = {i: executor.submit(_search_worker, start, end, planner.heuristic)
+                   for i, ((start, end), cached) in enumerate(zip(edges, routes)) if cached is None}
+        for i, future in futures.items():
+            routes[i] = planner.store_route(*edges[i], future.result())
+        return [planner.trace_path(route, origin, destination, road_options)
+                for (route, road_options), (origin, destination) in zip(routes, queries)]
+
+    def close(self):
+        """Shuts down the pool, which is created again by the next batch"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self._executor_type == 'thread':
+                    self._executor = ThreadPoolExecutor(self._workers)
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        self._workers, initializer=_init_search_worker, initargs=(self._planner.graph,))
+            return self._executor
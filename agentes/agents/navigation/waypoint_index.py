@@ -0,0 +1,123 @@
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+
+"""
+This module provides WaypointIndex, a client-side replacement for carla.Map.get_waypoint
+over the lane waypoints sampled by the GlobalRoutePlanner.
+"""
+
+import numpy as np
+
+try:
+    import carla
+except ImportError:
+    # planning without the CARLA client library, see agents.tools.opendrive
+    from agents.tools import opendrive as carla
+
+
+class WaypointIndex(object):
+    """
+    Uniform grid over the driving lane waypoints of the route graph (see RouteGraph).
+
+    A query looks at the lane segments (pairs of consecutive waypoints of a graph edge)
+    in the 3x3 cells around the location and projects the location on the nearest one,
+    so the lane is chosen by the lateral distance to its center line and not by the
+    distance to the sampled points. The waypoint returned is the one of the lane at the
+    OpenDRIVE s of the projection, interpolated between the ends of the segment. When the index can not give the same answer as the
+    map (no segment within one cell, lane types other than Driving requested for a
+    location outside every driving lane, project_to_road=False) the query goes to the map.
+    """
+
+    def __init__(self, wmap, xyz, lane_width, lanes, waypoint, road_ids, lane_ids, s, cell_size=10.0):
+        """
+            :param wmap: carla.Map used for the queries the index can not answer
+            :param xyz: (n, 3) array with the locations of the waypoints
+            :param lane_width: array with the lane width at each waypoint
+            :param lanes: iterable of arrays of rows of xyz, consecutive along a lane
+            :param waypoint: function returning the carla.Waypoint of a row of xyz
+            :param road_ids: array with the OpenDRIVE road id of each row of xyz
+            :param lane_ids: array with the OpenDRIVE lane id of each row of xyz
+            :param s: array with the OpenDRIVE s of each row of xyz
+            :param cell_size: side of the grid cells, in meters
+        """
+        self._wmap = wmap
+        self._waypoint = waypoint
+        self._cell_size = cell_size
+        # segment i goes from row starts[i] to row ends[i] (the same row for the last one of a lane)
+        lanes = [np.asarray(lane, dtype=np.int64) for lane in lanes if len(lane)]
+        starts = np.concatenate(lanes) if lanes else np.zeros(0, dtype=np.int64)
+        ends = np.concatenate([np.append(lane[1:], lane[-1]) for lane in lanes]) if lanes else starts
+        self._rows = np.stack([starts, ends], axis=1)
+        self._starts = np.asarray(xyz, dtype=np.float64)[starts]
+        self._ends = np.asarray(xyz, dtype=np.float64)[ends]
+        self._half_widths = np.asarray(lane_width, dtype=np.float64)[starts] / 2
+        self._road_ids = np.asarray(road_ids)
+        self._lane_ids = np.asarray(lane_ids)
+        self._s = np.asarray(s, dtype=np.float64)
+
+        # each segment goes in every cell touched by its bounding box
+        self._cells = {}
+        low = np.floor(np.minimum(self._starts, self._ends)[:, :2] / cell_size).astype(np.int64)
+        high = np.floor(np.maximum(self._starts, self._ends)[:, :2] / cell_size).astype(np.int64)
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(low, high)):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self._cells.setdefault((cx, cy), []).append(i)
+        self._cells = {cell: np.array(ids, dtype=np.int64) for cell, ids in self._cells.items()}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=carla.LaneType.Driving):
+        """
+        Same as carla.Map.get_waypoint, answered locally whenever possible.
+
+            :param location: carla.Location to localize
+            :param project_to_road: project the location to the nearest lane
+            :param lane_type: carla.LaneType flags accepted
+            :return: carla.Waypoint
+        """
+        driving_only = int(lane_type) == int(carla.LaneType.Driving)
+        if project_to_road and int(lane_type) & int(carla.LaneType.Driving):
+            found = self._nearest(location)
+            if found is not None:
+                segment, t, distance = found
+                # other lane types may be nearer than a driving lane the location is not on
+                if driving_only or distance <= self._half_widths[segment]:
+                    return self._projection(segment, t)
+        return self._wmap.get_waypoint(location, project_to_road=project_to_road, lane_type=lane_type)
+
+    def _projection(self, segment, t):
+        """carla.Waypoint at the fraction t of segment"""
+        start, end = self._rows[segment]
+        if self._road_ids[start] == self._road_ids[end] and self._lane_ids[start] == self._lane_ids[end]:
+            s = (1 - t) * self._s[start] + t * self._s[end]
+            waypoint = self._wmap.get_waypoint_xodr(int(self._road_ids[start]), int(self._lane_ids[start]), float(s))
+            if waypoint is not None:
+                return waypoint
+        # the segment crosses to another road (or s is off the lane): nearest end
+        return self._waypoint(int(end if t > 0.5 else start))
+
+    def _nearest(self, location):
+        """(segment, position 0..1 of the projection on it, distance to it) of the nearest segment within one cell"""
+        cx = int(np.floor(location.x / self._cell_size))
+        cy = int(np.floor(location.y / self._cell_size))
+        ids = [self._cells[(x, y)] for x in range(cx - 1, cx + 2) for y in range(cy - 1, cy + 2)
+               if (x, y) in self._cells]
+        if not ids:
+            return None
+        ids = np.unique(np.concatenate(ids))
+
+        point = np.array([location.x, location.y, location.z])
+        starts, ends = self._starts[ids], self._ends[ids]
+        direction = ends - starts
+        squared = np.einsum('ij,ij->i', direction, direction)
+        t = np.einsum('ij,ij->i', point - starts, direction) / np.where(squared > 0, squared, 1.0)
+        t = np.clip(t, 0.0, 1.0)
+        distances = np.linalg.norm(starts + t[:, None] * direction - point, axis=1)
+
+        best = int(np.argmin(distances))
+        if distances[best] > self._cell_size:
+            return None
+        return int(ids[best]), float(t[best]), float(distances[best])
@@ -10,7 +10,11 @@
 
 import math
 import numpy as np
-import carla
+try:
+    import carla
+except ImportError:
+    # planning without the CARLA client library, see agents.tools.opendrive
+    from agents.tools import opendrive as carla
 
 def draw_waypoints(world, waypoints, z=0.5):
     """
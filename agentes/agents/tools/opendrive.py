@@ -0,0 +1,659 @@
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Offline OpenDRIVE map with the part of the carla.Map / carla.Waypoint API used by
+the GlobalRoutePlanner and the LocalPlanner, so routes can be planned (and the route
+graph cache built) from a .xodr file without a CARLA server or client library.
+
+    from agents.tools.opendrive import Map
+    wmap = Map.from_file('maps/map.xodr')
+    grp = GlobalRoutePlanner(wmap, 2.0)
+
+Supported: plan view geometries (line, arc, spiral, poly3, paramPoly3), elevation,
+lane offsets, lane sections and widths, lane and road links, junction connections and
+road mark lane changes. Coordinates follow CARLA (the y axis and the headings of
+OpenDRIVE are mirrored) and traffic drives on the right.
+
+When the carla module is missing, the planner modules import this one in its place,
+so it also provides the small value types they use (Location, Rotation, Transform,
+LaneType, LaneChange, VehicleControl...).
+"""
+
+import bisect
+import math
+import os
+import xml.etree.ElementTree as ET
+from enum import IntEnum
+
+import numpy as np
+
+
+# carla value types
+
+class Vector3D(object):
+    """3D vector, as carla.Vector3D"""
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, value):
+        return type(self)(self.x * value, self.y * value, self.z * value)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})'
+
+    def length(self):
+        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+
+    def distance(self, other):
+        return (self - other).length()
+
+
+class Location(Vector3D):
+    """Position in meters, as carla.Location"""
+
+
+class Rotation(object):
+    """Rotation in degrees, as carla.Rotation"""
+
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch, self.yaw, self.roll = float(pitch), float(yaw), float(roll)
+
+    def __repr__(self):
+        return f'Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})'
+
+    def get_forward_vector(self):
+        pitch, yaw = math.radians(self.pitch), math.radians(self.yaw)
+        return Vector3D(math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw), math.sin(pitch))
+
+    def get_right_vector(self):
+        yaw = math.radians(self.yaw)
+        return Vector3D(-math.sin(yaw), math.cos(yaw), 0.0)
+
+    def get_up_vector(self):
+        pitch, yaw = math.radians(self.pitch), math.radians(self.yaw)
+        return Vector3D(-math.sin(pitch) * math.cos(yaw), -math.sin(pitch) * math.sin(yaw), math.cos(pitch))
+
+
+class Transform(object):
+    """Location and rotation, as carla.Transform"""
+
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def __repr__(self):
+        return f'Transform({self.location}, {self.rotation})'
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+    def get_right_vector(self):
+        return self.rotation.get_right_vector()
+
+    def get_up_vector(self):
+        return self.rotation.get_up_vector()
+
+
+class VehicleControl(object):
+    """Vehicle commands, as carla.VehicleControl"""
+
+    def __init__(self, throttle=0.0, steer=0.0, brake=0.0, hand_brake=False, reverse=False,
+                 manual_gear_shift=False, gear=0):
+        self.throttle, self.steer, self.brake = throttle, steer, brake
+        self.hand_brake, self.reverse = hand_brake, reverse
+        self.manual_gear_shift, self.gear = manual_gear_shift, gear
+
+
+class LaneType(IntEnum):
+    """Lane types with the flag values of carla.LaneType"""
+    NONE = 0x1
+    Driving = 0x1 << 1
+    Stop = 0x1 << 2
+    Shoulder = 0x1 << 3
+    Biking = 0x1 << 4
+    Sidewalk = 0x1 << 5
+    Border = 0x1 << 6
+    Restricted = 0x1 << 7
+    Parking = 0x1 << 8
+    Bidirectional = 0x1 << 9
+    Median = 0x1 << 10
+    Special1 = 0x1 << 11
+    Special2 = 0x1 << 12
+    Special3 = 0x1 << 13
+    RoadWorks = 0x1 << 14
+    Tram = 0x1 << 15
+    Rail = 0x1 << 16
+    Entry = 0x1 << 17
+    Exit = 0x1 << 18
+    OffRamp = 0x1 << 19
+    OnRamp = 0x1 << 20
+    Any = -2
+
+
+class LaneChange(IntEnum):
+    """Permitted lane changes, as carla.LaneChange"""
+    NONE = 0
+    Right = 1
+    Left = 2
+    Both = 3
+
+
+class LaneMarking(object):
+    """Road mark of a lane border, as carla.LaneMarking"""
+
+    def __init__(self, type='None', lane_change=LaneChange.NONE, width=0.0, color='Standard'):
+        self.type, self.lane_change, self.width, self.color = type, lane_change, width, color
+
+
+LANE_TYPES = {lane_type.name.lower(): lane_type for lane_type in LaneType if lane_type is not LaneType.Any}
+LANE_TYPES.update({'none': LaneType.NONE, 'bidirectional': LaneType.Bidirectional, 'offramp': LaneType.OffRamp,
+                   'onramp': LaneType.OnRamp, 'roadworks': LaneType.RoadWorks})
+
+
+# OpenDRIVE elements
+
+def _polynomial(records, ds):
+    """Value and derivative of the cubic record (start, a, b, c, d) covering ds"""
+    if not records:
+        return 0.0, 0.0
+    index = max(bisect.bisect_right([r[0] for r in records], ds) - 1, 0)
+    start, a, b, c, d = records[index]
+    u = ds - start
+    return a + b * u + c * u ** 2 + d * u ** 3, b + 2 * c * u + 3 * d * u ** 2
+
+
+def _coefficients(element, start='s'):
+    return (float(element.get(start, 0.0)), float(element.get('a', 0.0)), float(element.get('b', 0.0)),
+            float(element.get('c', 0.0)), float(element.get('d', 0.0)))
+
+
+class _Geometry(object):
+    """One plan view record: (x, y, heading) of the reference line at a distance ds from its start"""
+
+    def __init__(self, element):
+        self.s = float(element.get('s'))
+        self.x, self.y = float(element.get('x')), float(element.get('y'))
+        self.hdg = float(element.get('hdg'))
+        self.length = float(element.get('length'))
+        shape = element[0] if len(element) else None
+        self.kind = shape.tag if shape is not None else 'line'
+        self.curvature = float(shape.get('curvature', 0.0)) if self.kind == 'arc' else 0.0
+        self._table = None
+        if self.kind in ('spiral', 'poly3', 'paramPoly3'):
+            self._table = self._sample(shape)
+
+    def _sample(self, shape):
+        """Arc length, local position and heading tables of the curved geometries"""
+        count = max(32, int(math.ceil(self.length / 0.25)) + 1)
+        if self.kind == 'spiral':
+            k0, k1 = float(shape.get('curvStart')), float(shape.get('curvEnd'))
+            s = np.linspace(0.0, self.length, count)
+            heading = k0 * s + (k1 - k0) * s ** 2 / (2 * self.length) if self.length > 0 else np.zeros(count)
+            du, dv = np.cos(heading), np.sin(heading)
+            u = np.concatenate(([0.0], np.cumsum((du[1:] + du[:-1]) / 2 * np.diff(s))))
+            v = np.concatenate(([0.0], np.cumsum((dv[1:] + dv[:-1]) / 2 * np.diff(s))))
+            return s, u, v, heading
+
+        if self.kind == 'poly3':
+            # u is not the arc length: sample u a bit past the length and cut at the length
+            coefficients = [(0.0, 1.0, 0.0, 0.0), tuple(float(shape.get(k)) for k in 'abcd')]
+            p = np.linspace(0.0, self.length * 1.5, int(count * 1.5))
+        else:
+            coefficients = [tuple(float(shape.get(f'{k}U')) for k in 'abcd'),
+                            tuple(float(shape.get(f'{k}V')) for k in 'abcd')]
+            end = 1.0 if shape.get('pRange', 'normalized') == 'normalized' else self.length
+            p = np.linspace(0.0, end, count)
+        (au, bu, cu, du), (av, bv, cv, dv) = coefficients
+        if self.kind == 'poly3':
+            au, bu, cu, du = 0.0, 1.0, 0.0, 0.0
+        u = au + bu * p + cu * p ** 2 + du * p ** 3
+        v = av + bv * p + cv * p ** 2 + dv * p ** 3
+        heading = np.unwrap(np.arctan2(bv + 2 * cv * p + 3 * dv * p ** 2, bu + 2 * cu * p + 3 * du * p ** 2))
+        s = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(u), np.diff(v)))))
+        if s[-1] > 0:
+            # the sampled curve length may differ slightly from the declared one
+            s *= self.length / s[-1] if self.kind != 'poly3' else 1.0
+        return s, u, v, heading
+
+    def evaluate(self, ds):
+        ds = min(max(ds, 0.0), self.length)
+        if self._table is None:
+            if self.curvature == 0.0:
+                return self.x + ds * math.cos(self.hdg), self.y + ds * math.sin(self.hdg), self.hdg
+            k = self.curvature
+            heading = self.hdg + k * ds
+            return (self.x + (math.sin(heading) - math.sin(self.hdg)) / k,
+                    self.y + (math.cos(self.hdg) - math.cos(heading)) / k, heading)
+        s, u, v, heading = self._table
+        lu, lv, lh = np.interp(ds, s, u), np.interp(ds, s, v), np.interp(ds, s, heading)
+        cos_h, sin_h = math.cos(self.hdg), math.sin(self.hdg)
+        return self.x + lu * cos_h - lv * sin_h, self.y + lu * sin_h + lv * cos_h, self.hdg + lh
+
+
+class _Lane(object):
+    def __init__(self, element):
+        self.id = int(element.get('id'))
+        self.type = LANE_TYPES.get(element.get('type', 'none').lower(), LaneType.NONE)
+        self.widths = sorted(_coefficients(w, 'sOffset') for w in element.findall('width'))
+        link = element.find('link')
+        predecessor = link.find('predecessor') if link is not None else None
+        successor = link.find('successor') if link is not None else None
+        self.predecessor = int(predecessor.get('id')) if predecessor is not None else None
+        self.successor = int(successor.get('id')) if successor is not None else None
+        self.marks = sorted((float(m.get('sOffset', 0.0)), m.get('type', 'none'), m.get('laneChange', 'both'),
+                             float(m.get('width', 0.0) or 0.0)) for m in element.findall('roadMark'))
+
+    def width(self, ds):
+        return _polynomial(self.widths, ds)[0]
+
+    def mark(self, ds):
+        if not self.marks:
+            return None
+        index = max(bisect.bisect_right([m[0] for m in self.marks], ds) - 1, 0)
+        return self.marks[index]
+
+
+class _Section(object):
+    def __init__(self, element, end):
+        self.s = float(element.get('s'))
+        self.end = end
+        self.lanes = {}
+        for side in ('left', 'center', 'right'):
+            group = element.find(side)
+            if group is not None:
+                for lane in group.findall('lane'):
+                    lane = _Lane(lane)
+                    self.lanes[lane.id] = lane
+
+
+class _Link(object):
+    def __init__(self, element):
+        self.element_type = element.get('elementType', 'road')
+        self.element_id = int(element.get('elementId'))
+        self.contact_point = element.get('contactPoint')
+
+
+class _Road(object):
+    def __init__(self, element):
+        self.id = int(element.get('id'))
+        self.length = float(element.get('length'))
+        self.junction = int(element.get('junction', -1))
+        self.geometries = sorted((_Geometry(g) for g in element.find('planView').findall('geometry')),
+                                 key=lambda g: g.s)
+        self._geometry_starts = [g.s for g in self.geometries]
+        elevation = element.find('elevationProfile')
+        self.elevation = sorted(_coefficients(e) for e in elevation.findall('elevation')) if elevation is not None else []
+        lanes = element.find('lanes')
+        self.offsets = sorted(_coefficients(o) for o in lanes.findall('laneOffset'))
+        sections = sorted(lanes.findall('laneSection'), key=lambda e: float(e.get('s')))
+        ends = [float(e.get('s')) for e in sections[1:]] + [self.length]
+        self.sections = [_Section(e, end) for e, end in zip(sections, ends)]
+        self._section_starts = [section.s for section in self.sections]
+        link = element.find('link')
+        predecessor = link.find('predecessor') if link is not None else None
+        successor = link.find('successor') if link is not None else None
+        self.predecessor = _Link(predecessor) if predecessor is not None else None
+        self.successor = _Link(successor) if successor is not None else None
+
+    def section_index(self, s):
+        return min(max(bisect.bisect_right(self._section_starts, s) - 1, 0), len(self.sections) - 1)
+
+    def reference(self, s):
+        """(x, y, heading) of the reference line at s"""
+        index = max(bisect.bisect_right(self._geometry_starts, s) - 1, 0)
+        geometry = self.geometries[index]
+        return geometry.evaluate(s - geometry.s)
+
+    def lane_offset(self, section_index, lane_id, s):
+        """(lateral offset of the lane center, lane width) at s, left of the reference line positive"""
+        section = self.sections[section_index]
+        ds = s - section.s
+        t = _polynomial(self.offsets, s)[0]
+        step = 1 if lane_id > 0 else -1
+        for inner in range(step, lane_id, step):
+            lane = section.lanes.get(inner)
+            if lane is not None:
+                t += step * lane.width(ds)
+        width = section.lanes[lane_id].width(ds) if lane_id != 0 else 0.0
+        return t + step * width / 2, width
+
+
+class _Connection(object):
+    def __init__(self, element):
+        self.incoming = int(element.get('incomingRoad'))
+        self.connecting = int(element.get('connectingRoad'))
+        self.contact_point = element.get('contactPoint', 'start')
+        self.lane_links = [(int(l.get('from')), int(l.get('to'))) for l in element.findall('laneLink')]
+
+
+# Map and waypoints
+
+class Waypoint(object):
+    """Point on the center of a lane, as carla.Waypoint"""
+
+    def __init__(self, wmap, road, section_index, lane_id, s):
+        self._map = wmap
+        self._road = road
+        self._section_index = section_index
+        self.road_id = road.id
+        self.section_id = section_index
+        self.lane_id = lane_id
+        self.s = s
+        self._transform = None
+
+    def __repr__(self):
+        return f'Waypoint(road_id={self.road_id}, section_id={self.section_id}, lane_id={self.lane_id}, s={self.s:.3f})'
+
+    @property
+    def _lane(self):
+        return self._road.sections[self._section_index].lanes[self.lane_id]
+
+    @property
+    def id(self):
+        return hash((self.road_id, self.section_id, self.lane_id, round(self.s, 3)))
+
+    @property
+    def junction_id(self):
+        return self._road.junction
+
+    @property
+    def is_junction(self):
+        return self._road.junction != -1
+
+    @property
+    def lane_type(self):
+        return self._lane.type
+
+    @property
+    def lane_width(self):
+        return self._road.lane_offset(self._section_index, self.lane_id, self.s)[1]
+
+    @property
+    def transform(self):
+        if self._transform is None:
+            x, y, heading = self._road.reference(self.s)
+            t, _ = self._road.lane_offset(self._section_index, self.lane_id, self.s)
+            z, slope = _polynomial(self._road.elevation, self.s)
+            x, y = x - t * math.sin(heading), y + t * math.cos(heading)
+            pitch = math.degrees(math.atan(slope))
+            if self.lane_id > 0:
+                heading, pitch = heading + math.pi, -pitch
+            # OpenDRIVE to CARLA: mirrored y axis
+            self._transform = Transform(Location(x, -y, z), Rotation(pitch=pitch, yaw=-math.degrees(heading)))
+        return self._transform
+
+    @property
+    def right_lane_marking(self):
+        # the right border of a lane is its outer border, the one of its own road mark
+        return self._marking(self.lane_id, LaneChange.Right)
+
+    @property
+    def left_lane_marking(self):
+        inner = self.lane_id - 1 if self.lane_id > 0 else self.lane_id + 1
+        return self._marking(inner, LaneChange.Left)
+
+    @property
+    def lane_change(self):
+        change = LaneChange.NONE
+        for marking in (self.right_lane_marking, self.left_lane_marking):
+            if marking is not None:
+                change |= marking.lane_change
+        if self.get_right_lane() is None or self.get_right_lane().lane_type != LaneType.Driving:
+            change &= ~LaneChange.Right
+        if self.get_left_lane() is None or self.get_left_lane().lane_type != LaneType.Driving:
+            change &= ~LaneChange.Left
+        return LaneChange(change)
+
+    def _marking(self, lane_id, side):
+        section = self._road.sections[self._section_index]
+        lane = section.lanes.get(lane_id)
+        mark = lane.mark(self.s - section.s) if lane is not None else None
+        if mark is None:
+            return None
+        _, mark_type, lane_change, width = mark
+        # increase/decrease refer to the lane ids; crossing to the right of a right lane
+        # (negative id) decreases the id, to the right of a left lane increases it
+        crossing = 'decrease' if (side == LaneChange.Right) == (self.lane_id < 0) else 'increase'
+        if lane_change == 'both':
+            allowed = LaneChange.Both
+        elif lane_change == crossing:
+            allowed = side
+        else:
+            allowed = LaneChange.NONE
+        return LaneMarking(mark_type.capitalize(), allowed, width)
+
+    def _neighbor(self, lane_id):
+        lane_id = lane_id if lane_id != 0 else (1 if self.lane_id < 0 else -1)
+        if lane_id not in self._road.sections[self._section_index].lanes:
+            return None
+        return Waypoint(self._map, self._road, self._section_index, lane_id, self.s)
+
+    def get_right_lane(self):
+        return self._neighbor(self.lane_id - 1 if self.lane_id < 0 else self.lane_id + 1)
+
+    def get_left_lane(self):
+        return self._neighbor(self.lane_id + 1 if self.lane_id < 0 else self.lane_id - 1)
+
+    def next(self, distance):
+        """Waypoints distance meters ahead, one per branch"""
+        return self._map._move(self, distance, forward=True)
+
+    def previous(self, distance):
+        """Waypoints distance meters behind, one per branch"""
+        return self._map._move(self, distance, forward=False)
+
+    def next_until_lane_end(self, distance):
+        waypoints, waypoint = [], self
+        while True:
+            following = [w for w in waypoint.next(distance)
+                         if (w.road_id, w.section_id, w.lane_id) == (self.road_id, self.section_id, self.lane_id)]
+            if not following:
+                return waypoints
+            waypoint = following[0]
+            waypoints.append(waypoint)
+
+    def previous_until_lane_start(self, distance):
+        waypoints, waypoint = [], self
+        while True:
+            previous = [w for w in waypoint.previous(distance)
+                        if (w.road_id, w.section_id, w.lane_id) == (self.road_id, self.section_id, self.lane_id)]
+            if not previous:
+                return waypoints
+            waypoint = previous[0]
+            waypoints.append(waypoint)
+
+
+class Map(object):
+    """
+    Road network of an OpenDRIVE file, as carla.Map(name, xodr_content)
+    """
+
+    def __init__(self, name, opendrive):
+        self.name = name
+        self._opendrive = opendrive
+        root = ET.fromstring(opendrive)
+        self._roads = {road.id: road for road in (_Road(e) for e in root.findall('road'))}
+        self._junctions = {}
+        for junction in root.findall('junction'):
+            self._junctions[int(junction.get('id'))] = [_Connection(c) for c in junction.findall('connection')]
+        self._samples = None
+
+    @classmethod
+    def from_file(cls, path, name=None):
+        with open(path, encoding='utf-8') as file:
+            return cls(name or os.path.splitext(os.path.basename(path))[0], file.read())
+
+    def to_opendrive(self):
+        return self._opendrive
+
+    def get_waypoint_xodr(self, road_id, lane_id, s):
+        road = self._roads.get(road_id)
+        if road is None or not 0.0 <= s <= road.length + 1e-6:
+            return None
+        section_index = road.section_index(s)
+        if lane_id == 0 or lane_id not in road.sections[section_index].lanes:
+            return None
+        return Waypoint(self, road, section_index, lane_id, min(s, road.length))
+
+    def get_topology(self):
+        """
+        Pairs (waypoint at the start of a driving lane of each lane section, waypoint at
+        the start of each of its successor lanes)
+        """
+        topology = []
+        for road in self._roads.values():
+            for index, section in enumerate(road.sections):
+                for lane in section.lanes.values():
+                    if lane.id == 0 or lane.type != LaneType.Driving:
+                        continue
+                    start = section.s if lane.id < 0 else section.end
+                    waypoint = Waypoint(self, road, index, lane.id, start)
+                    for successor in self._successors(road, index, lane.id, at_end=lane.id < 0):
+                        topology.append((waypoint, Waypoint(self, *successor)))
+        return topology
+
+    def generate_waypoints(self, distance):
+        """Waypoints every distance meters on the center of every driving lane"""
+        waypoints = []
+        for road in self._roads.values():
+            for index, section in enumerate(road.sections):
+                for lane in section.lanes.values():
+                    if lane.id != 0 and lane.type == LaneType.Driving:
+                        for s in np.arange(section.s, section.end, distance):
+                            waypoints.append(Waypoint(self, road, index, lane.id, float(s)))
+        return waypoints
+
+    def get_waypoint(self, location, project_to_road=True, lane_type=LaneType.Driving):
+        """
+        Waypoint on the center of the nearest lane of the given types, or None.
+        Without project_to_road the location must be inside that lane.
+        """
+        samples = self._lane_samples()
+        mask = (samples['type'] & int(lane_type)) != 0
+        if not mask.any():
+            return None
+        point = np.array([location.x, -location.y, location.z])
+        distances = np.linalg.norm(samples['xyz'][mask] - point, axis=1)
+        candidates = np.flatnonzero(mask)[np.argsort(distances)[:8]]
+
+        best, best_distance = None, float('inf')
+        for i in candidates:
+            road = self._roads[int(samples['road'][i])]
+            section_index, lane_id = int(samples['section'][i]), int(samples['lane'][i])
+            section = road.sections[section_index]
+            s = self._project(road, section_index, lane_id, point, float(samples['s'][i]), section)
+            waypoint = Waypoint(self, road, section_index, lane_id, s)
+            distance = waypoint.transform.location.distance(Location(location.x, location.y, location.z))
+            if distance < best_distance:
+                best, best_distance = waypoint, distance
+        if best is not None and not project_to_road and best_distance > best.lane_width / 2:
+            return None
+        return best
+
+    # internals
+
+    def _project(self, road, section_index, lane_id, point, s, section, step=1.0):
+        """s of the point of the lane center nearest to point, searched around s"""
+        def distance(value):
+            x, y, heading = road.reference(value)
+            t, _ = road.lane_offset(section_index, lane_id, value)
+            return math.hypot(x - t * math.sin(heading) - point[0], y + t * math.cos(heading) - point[1])
+
+        low, high = max(section.s, s - step), min(section.end, s + step)
+        for _ in range(30):
+            a, b = low + (high - low) / 3, high - (high - low) / 3
+            if distance(a) < distance(b):
+                high = b
+            else:
+                low = a
+        return (low + high) / 2
+
+    def _lane_samples(self, step=2.0):
+        """Points every step meters on the center of every lane (OpenDRIVE coordinates)"""
+        if self._samples is None:
+            rows = []
+            for road in self._roads.values():
+                for index, section in enumerate(road.sections):
+                    positions = np.append(np.arange(section.s, section.end, step), section.end)
+                    for lane in section.lanes.values():
+                        if lane.id == 0:
+                            continue
+                        for s in positions:
+                            x, y, heading = road.reference(s)
+                            t, _ = road.lane_offset(index, lane.id, s)
+                            z = _polynomial(road.elevation, s)[0]
+                            rows.append((x - t * math.sin(heading), y + t * math.cos(heading), z,
+                                         road.id, index, lane.id, s, int(lane.type)))
+            table = np.array(rows, dtype=np.float64).reshape(-1, 8)
+            self._samples = {'xyz': table[:, :3], 'road': table[:, 3].astype(np.int64),
+                             'section': table[:, 4].astype(np.int64), 'lane': table[:, 5].astype(np.int64),
+                             's': table[:, 6], 'type': table[:, 7].astype(np.int64)}
+        return self._samples
+
+    def _successors(self, road, section_index, lane_id, at_end):
+        """
+        (road, section index, lane id, s) where the lanes following lane_id start, leaving
+        the lane section through its end (at_end) or its start
+        """
+        lane = road.sections[section_index].lanes[lane_id]
+        link_id = lane.successor if at_end else lane.predecessor
+        results = []
+        if at_end and section_index + 1 < len(road.sections):
+            results.append((road, section_index + 1, link_id, road.sections[section_index + 1].s))
+        elif not at_end and section_index > 0:
+            results.append((road, section_index - 1, link_id, road.sections[section_index - 1].end))
+        else:
+            link = road.successor if at_end else road.predecessor
+            if link is None:
+                return []
+            if link.element_type == 'road':
+                results.append(self._entry(link.element_id, link.contact_point, link_id))
+            else:
+                for connection in self._junctions.get(link.element_id, []):
+                    if connection.incoming == road.id:
+                        for from_lane, to_lane in connection.lane_links:
+                            if from_lane == lane_id:
+                                results.append(self._entry(connection.connecting, connection.contact_point, to_lane))
+        return [(r, i, l, s) for r, i, l, s in (e for e in results if e is not None)
+                if l is not None and l != 0 and l in r.sections[i].lanes]
+
+    def _entry(self, road_id, contact_point, lane_id):
+        road = self._roads.get(road_id)
+        if road is None:
+            return None
+        if contact_point == 'end':
+            return (road, len(road.sections) - 1, lane_id, road.length)
+        return (road, 0, lane_id, 0.0)
+
+    def _move(self, waypoint, distance, forward):
+        """Waypoints distance meters along the lane of waypoint, in (or against) its driving direction"""
+        results = []
+        pending = [(waypoint._road, waypoint._section_index, waypoint.lane_id, waypoint.s, distance, 0)]
+        while pending:
+            road, index, lane_id, s, remaining, depth = pending.pop()
+            section = road.sections[index]
+            sign = (1 if lane_id < 0 else -1) * (1 if forward else -1)
+            target = s + sign * remaining
+            if section.s - 1e-9 <= target <= section.end + 1e-9:
+                results.append(Waypoint(self, road, index, lane_id, min(max(target, section.s), section.end)))
+                continue
+            if depth > 64:
+                # chain of zero length lanes
+                continue
+            remaining -= abs((section.end if sign > 0 else section.s) - s)
+            for successor in reversed(self._successors(road, index, lane_id, at_end=sign > 0)):
+                pending.append(successor + (remaining, depth + 1))
+        return results
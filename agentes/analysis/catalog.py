@@ -0,0 +1,317 @@
+"""
+Catálogo dos experimentos (pastas exp_*) em um arquivo SQLite.
+
+`scan` percorre as pastas e só reprocessa os experimentos novos ou
+alterados: a assinatura de cada experimento é feita com nome, tamanho e
+data de modificação dos arquivos (os.stat, sem abrir nada). Para cada
+experimento ficam registrados os metadados de meta.json (cidade, tick_time,
+modo síncrono, agentes, duração), o número de amostras e a taxa de cada
+sensor, e estatísticas por canal (média, desvio, mínimo, máximo).
+Experimentos sem meta.json (ex.: 2025_05_25_modos) têm tick_time e duração
+estimados pelos dados e o modo deduzido do caminho (sincrono/assincrono).
+
+Uso (de dentro de agentes/):
+    python -m analysis.catalog scan data/ ../2025_05_25_modos/data
+    python -m analysis.catalog query --town Town01 --sync --rate 20 --min-duration 60
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from modules.Experiment import find_sensor_files, load_sensor, read_meta
+
+DB_PATH = 'data/catalog.sqlite'
+# arquivos de dados no formato dos scripts de 2025_05_25_modos
+FLAT_FILES = ('imu',)
+TIME_COLUMNS = ('Time', 'timestamp')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    signature TEXT NOT NULL,
+    town TEXT,
+    tick_time REAL,
+    sync INTEGER,
+    vehicles INTEGER,
+    pedestrians INTEGER,
+    duration REAL,
+    samples INTEGER,
+    started TEXT,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    experiment_id INTEGER NOT NULL REFERENCES experiments(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    file TEXT NOT NULL,
+    samples INTEGER,
+    rate REAL,
+    t_start REAL,
+    t_end REAL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    series_id INTEGER NOT NULL REFERENCES series(id) ON DELETE CASCADE,
+    channel TEXT NOT NULL,
+    mean REAL,
+    std REAL,
+    min REAL,
+    max REAL
+);
+CREATE INDEX IF NOT EXISTS experiments_query ON experiments (town, sync, tick_time, duration);
+CREATE INDEX IF NOT EXISTS series_experiment ON series (experiment_id, sensor);
+CREATE INDEX IF NOT EXISTS channels_series ON channels (series_id);
+"""
+
+
+def find_experiments(data_dir):
+    """Pastas exp_* dentro de `data_dir` (ou a própria, se for um experimento)."""
+    if os.path.basename(os.path.normpath(data_dir)).startswith('exp_'):
+        return [os.path.normpath(data_dir)]
+    experiments = []
+    for root, dirs, filenames in os.walk(data_dir):
+        dirs.sort()
+        found = [d for d in dirs if d.startswith('exp_')]
+        experiments += [os.path.join(root, d) for d in found]
+        # não desce dentro de um experimento
+        dirs[:] = [d for d in dirs if not d.startswith('exp_')]
+    return experiments
+
+def data_files(experiment_dir):
+    """{nome da série: arquivo} com os sensores e os arquivos planos (imu.csv...)."""
+    files = find_sensor_files(experiment_dir)
+    for root, dirs, filenames in os.walk(experiment_dir):
+        dirs.sort()
+        for name in FLAT_FILES:
+            for extension in ('parquet', 'csv'):
+                if f'{name}.{extension}' in filenames:
+                    key = os.path.relpath(os.path.join(root, name), experiment_dir).replace(os.sep, '/')
+                    files[key] = os.path.join(root, f'{name}.{extension}')
+                    break
+    return files
+
+def signature(experiment_dir):
+    """Hash de nome, tamanho e data de modificação dos arquivos de dados e de meta.json."""
+    digest = hashlib.sha1()
+    paths = sorted(data_files(experiment_dir).values()) + [os.path.join(experiment_dir, 'meta.json')]
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f'{os.path.relpath(path, experiment_dir)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+def describe_series(file_path):
+    """Número de amostras, taxa, intervalo de tempo e estatísticas por canal de um arquivo."""
+    data = load_sensor(file_path)
+    time_column = next((c for c in TIME_COLUMNS if c in data), None)
+    channels = [c for c in data if c not in TIME_COLUMNS and c != 'Frame']
+    samples = len(data[time_column]) if time_column else len(next(iter(data.values()), []))
+    rate = t_start = t_end = None
+    if time_column and samples > 1:
+        time = np.unique(np.asarray(data[time_column], dtype=np.float64))
+        t_start, t_end = float(time[0]), float(time[-1])
+        if len(time) > 1:
+            rate = float(1.0 / np.median(np.diff(time)))
+
+    stats = []
+    if channels and samples > 0:
+        values = np.vstack([np.asarray(data[c], dtype=np.float64) for c in channels])
+        # todas as estatísticas de uma vez para os canais (NaN = amostra ausente)
+        with np.errstate(all='ignore'):
+            table = np.stack([np.nanmean(values, axis=1), np.nanstd(values, axis=1),
+                              np.nanmin(values, axis=1), np.nanmax(values, axis=1)], axis=1)
+        stats = [(c, *[None if np.isnan(v) else float(v) for v in row]) for c, row in zip(channels, table)]
+    return {'samples': samples, 'rate': rate, 't_start': t_start, 't_end': t_end, 'channels': stats}
+
+
+class Catalog:
+    def __init__(self, db_path=DB_PATH):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def scan(self, data_dir, prune=True):
+        """
+        Indexa os experimentos de `data_dir`, reprocessando só os novos ou alterados.
+
+        :param prune: remove do catálogo os experimentos de `data_dir` que não existem mais
+        :return: (novos ou atualizados, sem mudança, removidos)
+        """
+        known = {row['path']: row['signature'] for row in
+                 self.connection.execute('SELECT path, signature FROM experiments')}
+        updated, unchanged, seen = 0, 0, set()
+        for experiment_dir in find_experiments(data_dir):
+            path = os.path.abspath(experiment_dir)
+            seen.add(path)
+            current = signature(experiment_dir)
+            if known.get(path) == current:
+                unchanged += 1
+                continue
+            self._index(experiment_dir, path, current)
+            updated += 1
+
+        removed = 0
+        if prune:
+            root = os.path.join(os.path.abspath(data_dir), '')
+            for path in known:
+                if (path.startswith(root) or path == root.rstrip(os.sep)) and path not in seen:
+                    self.connection.execute('DELETE FROM experiments WHERE path = ?', (path,))
+                    removed += 1
+        self.connection.commit()
+        return updated, unchanged, removed
+
+    def _index(self, experiment_dir, path, current):
+        meta = read_meta(experiment_dir)
+        series = {key: (file_path, describe_series(file_path)) for key, file_path in data_files(experiment_dir).items()}
+
+        # sem meta.json: estima pelos dados (e pelo caminho, no caso do modo)
+        tick_time = meta.get('tick_time')
+        if tick_time is None:
+            rates = [d['rate'] for key, (_, d) in series.items() if d['rate'] and key.rsplit('/', 1)[-1].lower().startswith('imu')]
+            tick_time = round(1.0 / max(rates), 6) if rates else None
+        duration = meta.get('duration')
+        if duration is None:
+            starts = [d['t_start'] for _, d in series.values() if d['t_start'] is not None]
+            ends = [d['t_end'] for _, d in series.values() if d['t_end'] is not None]
+            duration = max(ends) - min(starts) if starts else None
+        sync = meta.get('synchronous_mode')
+        if sync is None:
+            parts = [p.lower() for p in path.split(os.sep)]
+            sync = False if 'assincrono' in parts else True if 'sincrono' in parts else None
+
+        with self.connection:
+            self.connection.execute('DELETE FROM experiments WHERE path = ?', (path,))
+            cursor = self.connection.execute(
+                'INSERT INTO experiments (path, signature, town, tick_time, sync, vehicles, pedestrians, duration, '
+                'samples, started, meta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, current, meta.get('town'), tick_time, None if sync is None else int(sync),
+                 meta.get('vehicles'), meta.get('pedestrians'), duration,
+                 sum(d['samples'] for _, d in series.values()), meta.get('started'), json.dumps(meta)))
+            experiment_id = cursor.lastrowid
+            for key, (file_path, d) in series.items():
+                sensor = key.rsplit('/', 1)[-1].partition('_')[0]
+                cursor = self.connection.execute(
+                    'INSERT INTO series (experiment_id, name, sensor, file, samples, rate, t_start, t_end) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (experiment_id, key, sensor, os.path.abspath(file_path), d['samples'], d['rate'],
+                     d['t_start'], d['t_end']))
+                self.connection.executemany(
+                    'INSERT INTO channels (series_id, channel, mean, std, min, max) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(cursor.lastrowid, *stats) for stats in d['channels']])
+
+    def find(self, town=None, sync=None, tick_time=None, rate=None, min_duration=None, max_duration=None,
+             min_vehicles=None, min_pedestrians=None, path_like=None):
+        """
+        Experimentos que atendem a todos os filtros informados.
+
+        :param rate: taxa em Hz (equivale a tick_time = 1 / rate)
+        :param path_like: padrão SQL LIKE aplicado ao caminho (ex.: '%sincrono%')
+        :return: lista de dicionários (colunas da tabela experiments, com meta já decodificado)
+        """
+        if rate is not None:
+            tick_time = 1.0 / rate
+        conditions, params = [], []
+        if town is not None:
+            conditions.append('town = ?')
+            params.append(town)
+        if sync is not None:
+            conditions.append('sync = ?')
+            params.append(int(sync))
+        if tick_time is not None:
+            conditions.append('tick_time BETWEEN ? AND ?')
+            params += [tick_time * (1 - 1e-3), tick_time * (1 + 1e-3)]
+        if min_duration is not None:
+            conditions.append('duration >= ?')
+            params.append(min_duration)
+        if max_duration is not None:
+            conditions.append('duration <= ?')
+            params.append(max_duration)
+        if min_vehicles is not None:
+            conditions.append('vehicles >= ?')
+            params.append(min_vehicles)
+        if min_pedestrians is not None:
+            conditions.append('pedestrians >= ?')
+            params.append(min_pedestrians)
+        if path_like is not None:
+            conditions.append('path LIKE ?')
+            params.append(path_like)
+        query = 'SELECT * FROM experiments'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        rows = [dict(row) for row in self.connection.execute(query + ' ORDER BY path', params)]
+        for row in rows:
+            row['meta'] = json.loads(row['meta']) if row['meta'] else {}
+        return rows
+
+    def series(self, experiment_id, sensor=None):
+        query, params = 'SELECT * FROM series WHERE experiment_id = ?', [experiment_id]
+        if sensor is not None:
+            query += ' AND sensor = ?'
+            params.append(sensor)
+        return [dict(row) for row in self.connection.execute(query + ' ORDER BY name', params)]
+
+    def channels(self, series_id):
+        return [dict(row) for row in self.connection.execute(
+            'SELECT channel, mean, std, min, max FROM channels WHERE series_id = ?', (series_id,))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=DB_PATH, help='arquivo SQLite do catálogo')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help='indexa experimentos novos ou alterados')
+    scan.add_argument('data_dirs', nargs='+')
+    scan.add_argument('--keep', action='store_true', help='não remove experimentos que sumiram do disco')
+
+    query = commands.add_parser('query', help='lista experimentos')
+    query.add_argument('--town')
+    mode = query.add_mutually_exclusive_group()
+    mode.add_argument('--sync', dest='sync', action='store_true', default=None)
+    mode.add_argument('--async', dest='sync', action='store_false')
+    query.add_argument('--rate', type=float, help='taxa de amostragem em Hz')
+    query.add_argument('--tick-time', type=float)
+    query.add_argument('--min-duration', type=float, help='segundos')
+    query.add_argument('--max-duration', type=float, help='segundos')
+    query.add_argument('--min-vehicles', type=int)
+    query.add_argument('--min-pedestrians', type=int)
+    query.add_argument('--path-like', help="padrão SQL LIKE, ex.: '%%Town01%%'")
+    args = parser.parse_args()
+
+    with Catalog(args.db) as catalog:
+        if args.command == 'scan':
+            for data_dir in args.data_dirs:
+                updated, unchanged, removed = catalog.scan(data_dir, prune=not args.keep)
+                print(f"{data_dir}: {updated} indexados, {unchanged} sem mudança, {removed} removidos")
+        else:
+            rows = catalog.find(args.town, args.sync, args.tick_time, args.rate, args.min_duration, args.max_duration,
+                                args.min_vehicles, args.min_pedestrians, args.path_like)
+            for row in rows:
+                rate = f"{1 / row['tick_time']:.1f} Hz" if row['tick_time'] else '-'
+                duration = f"{row['duration']:.1f} s" if row['duration'] is not None else '-'
+                mode = {1: 'síncrono', 0: 'assíncrono'}.get(row['sync'], '-')
+                print(f"{row['path']}  {row['town'] or '-'}  {rate}  {mode}  {duration}  {row['samples']} amostras")
+            print(f"{len(rows)} experimentos")
+
+
+if __name__ == '__main__':
+    main()
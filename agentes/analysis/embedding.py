@@ -0,0 +1,202 @@
+"""
+Embedding (t-SNE) de conjuntos de dados de IMU para comparação visual.
+
+Em vez de cada linha bruta, os pontos são as janelas de analysis.features
+(já em cache). O pipeline é:
+    1. padronização e PCA (autovetores da covariância, NumPy) até `pca_dim`
+       dimensões;
+    2. subamostragem estratificada: no máximo `per_group` janelas por
+       conjunto, sorteadas com semente fixa;
+    3. t-SNE do scikit-learn, por padrão no modo Barnes-Hut (O(n log n));
+    4. o modelo (padronização, PCA, pontos e coordenadas) é salvo em .npz.
+
+Uma execução nova é projetada no embedding salvo sem refazer o t-SNE: cada
+janela recebe a média das coordenadas dos k vizinhos mais próximos no espaço
+PCA, ponderada pelo inverso da distância.
+
+Uso (de dentro de agentes/):
+    python -m analysis.embedding fit base.npz sincrono=../2025_05_25_modos/data/sincrono \\
+        assincrono=../2025_05_25_modos/data/assincrono
+    python -m analysis.embedding project base.npz novo=data/exp_<timestamp>
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from analysis.features import extract_directory, CACHE_DIR
+
+
+def load_groups(specs, sensor='IMU', size=64, step=32, cache_dir=CACHE_DIR):
+    """
+    :param specs: ['rótulo=pasta', ...] (sem rótulo, usa o nome da pasta)
+    :return: (matriz janelas x atributos, rótulo de cada janela, nomes dos atributos)
+    """
+    blocks, labels, names = [], [], None
+    for spec in specs:
+        label, _, path = spec.rpartition('=')
+        label = label or os.path.basename(os.path.normpath(path))
+        for key, (features, feature_names, times) in extract_directory(path, sensor, size, step, cache_dir).items():
+            if names is not None and feature_names != names:
+                raise ValueError(f"{key}: atributos diferentes dos demais conjuntos")
+            names = feature_names
+            blocks.append(features)
+            labels += [label] * len(features)
+    if not blocks:
+        raise ValueError(f"Nenhuma série {sensor} encontrada em {specs}")
+    return np.vstack(blocks), np.array(labels), names
+
+def stratified_sample(labels, per_group, seed=42):
+    """Índices com no máximo `per_group` janelas de cada rótulo."""
+    rng = np.random.default_rng(seed)
+    keep = []
+    for label in np.unique(labels):
+        index = np.flatnonzero(labels == label)
+        if per_group is not None and len(index) > per_group:
+            index = np.sort(rng.choice(index, per_group, replace=False))
+        keep.append(index)
+    return np.concatenate(keep)
+
+
+class PCA:
+    """Padronização + PCA pela covariância (d x d), barato mesmo com muitas janelas."""
+
+    def __init__(self, dim=20):
+        self.dim = dim
+
+    def fit(self, X):
+        X = np.nan_to_num(X)
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        Z = (X - self.mean) / self.scale
+        eigenvalues, eigenvectors = np.linalg.eigh(Z.T @ Z / max(len(Z) - 1, 1))
+        order = np.argsort(eigenvalues)[::-1][:min(self.dim, X.shape[1])]
+        self.components = eigenvectors[:, order]
+        self.explained = eigenvalues[order] / max(eigenvalues.sum(), 1e-12)
+        return self
+
+    def transform(self, X):
+        return ((np.nan_to_num(X) - self.mean) / self.scale) @ self.components
+
+
+class Embedding:
+    """Embedding t-SNE salvo, com projeção de janelas novas por k vizinhos."""
+
+    def __init__(self, pca_dim=20, per_group=2000, method='barnes_hut', perplexity=30.0, angle=0.5, seed=42):
+        self.pca = PCA(pca_dim)
+        self.per_group = per_group
+        self.method = method
+        self.perplexity = perplexity
+        self.angle = angle
+        self.seed = seed
+
+    def fit(self, X, labels, names=None):
+        from sklearn.manifold import TSNE
+
+        index = stratified_sample(labels, self.per_group, self.seed)
+        self.pca.fit(X[index])
+        self.points = self.pca.transform(X[index])
+        self.labels = labels[index]
+        self.names = list(names) if names is not None else []
+        perplexity = min(self.perplexity, max((len(index) - 1) / 3, 1))
+        tsne = TSNE(n_components=2, perplexity=perplexity, method=self.method, angle=self.angle,
+                    init='pca', random_state=self.seed)
+        self.coords = tsne.fit_transform(self.points)
+        return self
+
+    def project(self, X, k=10):
+        """Coordenadas de janelas novas no embedding salvo."""
+        from sklearn.neighbors import NearestNeighbors
+
+        k = min(k, len(self.points))
+        neighbors = NearestNeighbors(n_neighbors=k).fit(self.points)
+        distance, index = neighbors.kneighbors(self.pca.transform(X))
+        weights = 1.0 / np.maximum(distance, 1e-9)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum('nk,nkd->nd', weights, self.coords[index])
+
+    def save(self, file_path):
+        np.savez(file_path, mean=self.pca.mean, scale=self.pca.scale, components=self.pca.components,
+                 explained=self.pca.explained, points=self.points, coords=self.coords, labels=self.labels,
+                 names=np.array(self.names), params=np.array([self.per_group or 0, self.perplexity, self.angle,
+                                                              self.seed]), method=self.method)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as data:
+            per_group, perplexity, angle, seed = data['params'].tolist()
+            embedding = cls(data['components'].shape[1], int(per_group) or None, str(data['method']),
+                            perplexity, angle, int(seed))
+            embedding.pca.mean, embedding.pca.scale = data['mean'], data['scale']
+            embedding.pca.components, embedding.pca.explained = data['components'], data['explained']
+            embedding.points, embedding.coords = data['points'], data['coords']
+            embedding.labels, embedding.names = data['labels'], data['names'].tolist()
+        return embedding
+
+
+def plot_embedding(embedding, file_path, projected=None, title='t-SNE dos dados IMU (janelas)'):
+    """Desenha o embedding salvo e, por cima, os conjuntos projetados {rótulo: coordenadas}."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    try:
+        for label in np.unique(embedding.labels):
+            coords = embedding.coords[embedding.labels == label]
+            ax.scatter(coords[:, 0], coords[:, 1], label=label, alpha=0.6, s=10)
+        for label, coords in (projected or {}).items():
+            ax.scatter(coords[:, 0], coords[:, 1], label=f'{label} (projetado)', marker='x', alpha=0.8, s=20)
+        ax.legend()
+        ax.set_title(title)
+        ax.set_xlabel('Dim 1')
+        ax.set_ylabel('Dim 2')
+        fig.savefig(file_path)
+    finally:
+        plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['fit', 'project'])
+    parser.add_argument('model', help='arquivo .npz do embedding')
+    parser.add_argument('datasets', nargs='+', help='rótulo=pasta com experimentos')
+    parser.add_argument('--sensor', default='IMU')
+    parser.add_argument('--window', type=int, default=64, help='amostras por janela')
+    parser.add_argument('--step', type=int, default=32, help='deslocamento entre janelas')
+    parser.add_argument('--pca-dim', type=int, default=20)
+    parser.add_argument('--per-group', type=int, default=2000, help='máximo de janelas por conjunto no fit')
+    parser.add_argument('--method', default='barnes_hut', choices=['barnes_hut', 'exact'])
+    parser.add_argument('--perplexity', type=float, default=30.0)
+    parser.add_argument('--angle', type=float, default=0.5, help='precisão do Barnes-Hut (maior = mais rápido)')
+    parser.add_argument('--neighbors', type=int, default=10, help='vizinhos usados na projeção')
+    parser.add_argument('--plot', help='imagem de saída (padrão: <modelo>.png)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    X, labels, names = load_groups(args.datasets, args.sensor, args.window, args.step)
+    plot_path = args.plot or f'{os.path.splitext(args.model)[0]}.png'
+
+    if args.command == 'fit':
+        embedding = Embedding(args.pca_dim, args.per_group, args.method, args.perplexity, args.angle)
+        embedding.fit(X, labels, names)
+        embedding.save(args.model)
+        plot_embedding(embedding, plot_path)
+        print(f"{len(embedding.points)} de {len(X)} janelas, variância explicada pelo PCA: "
+              f"{embedding.pca.explained.sum():.1%}")
+    else:
+        embedding = Embedding.load(args.model)
+        if names != embedding.names:
+            raise ValueError("Atributos diferentes dos usados no embedding salvo (janela/sensor)")
+        coords = embedding.project(X, args.neighbors)
+        projected = {label: coords[labels == label] for label in np.unique(labels)}
+        plot_embedding(embedding, plot_path, projected)
+        print(f"{len(X)} janelas projetadas")
+    print(f"Gráfico: {plot_path} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
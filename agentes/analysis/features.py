@@ -0,0 +1,162 @@
+"""
+Atributos por janela das séries de IMU, com cache em disco.
+
+Cada série é reamostrada em uma grade uniforme e dividida em janelas
+sobrepostas (visões por stride, sem cópia). Para cada janela e canal são
+calculados, de forma vetorizada:
+    tempo:      média, desvio padrão, mínimo, máximo, RMS, pico a pico,
+                assimetria, curtose, taxa de cruzamentos pela média
+    frequência: frequência dominante, centroide espectral, entropia
+                espectral e energia relativa em N_BANDS faixas (STFT com
+                janela de Hann)
+
+As matrizes ficam em `cache_dir`, em um .npz cujo nome é o hash do
+conteúdo do arquivo de origem mais os parâmetros; repetir uma análise
+(síncrono x assíncrono, outra cidade...) só lê o .npz.
+
+Uso (de dentro de agentes/):
+    python -m analysis.features data/ --window 64 --step 32
+"""
+
+import argparse
+import hashlib
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modules.Experiment import load_sensor
+from analysis.spectrum import uniform_series, find_series
+
+FEATURES_VERSION = 1 # incrementar quando os atributos mudarem (invalida o cache)
+CACHE_DIR = 'data/.features'
+N_BANDS = 4
+TIME_FEATURES = ['mean', 'std', 'min', 'max', 'rms', 'ptp', 'skew', 'kurtosis', 'zcr']
+FREQ_FEATURES = ['dominant', 'centroid', 'entropy'] + [f'band{i}' for i in range(N_BANDS)]
+
+
+def windows(values, size, step):
+    """Visão (canais x janelas x size) de `values` sem copiar os dados."""
+    return sliding_window_view(np.atleast_2d(values), size, axis=1)[:, ::step]
+
+def time_features(win):
+    """win: canais x janelas x amostras -> canais x janelas x len(TIME_FEATURES)"""
+    mean = win.mean(axis=2)
+    centered = win - mean[..., None]
+    var = (centered ** 2).mean(axis=2)
+    std = np.sqrt(var)
+    safe = np.where(var > 0, var, 1)
+    skew = np.where(var > 0, (centered ** 3).mean(axis=2) / safe ** 1.5, 0)
+    kurtosis = np.where(var > 0, (centered ** 4).mean(axis=2) / safe ** 2 - 3, 0)
+    signs = np.signbit(centered)
+    zcr = (signs[..., 1:] != signs[..., :-1]).mean(axis=2)
+    minimum, maximum = win.min(axis=2), win.max(axis=2)
+    rms = np.sqrt((win ** 2).mean(axis=2))
+    return np.stack([mean, std, minimum, maximum, rms, maximum - minimum, skew, kurtosis, zcr], axis=2)
+
+def freq_features(win, fs):
+    """win: canais x janelas x amostras -> canais x janelas x len(FREQ_FEATURES)"""
+    size = win.shape[2]
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(size) / size)
+    power = np.abs(np.fft.rfft((win - win.mean(axis=2, keepdims=True)) * window, axis=2)) ** 2
+    freqs = np.fft.rfftfreq(size, 1.0 / fs)
+    total = power.sum(axis=2)
+    safe = np.where(total > 0, total, 1)
+
+    dominant = freqs[np.argmax(power, axis=2)]
+    centroid = (power * freqs).sum(axis=2) / safe
+    p = power / safe[..., None]
+    entropy = -(p * np.log(np.where(p > 0, p, 1))).sum(axis=2) / np.log(power.shape[2])
+    # energia relativa em N_BANDS faixas iguais de 0 a fs/2
+    edges = np.linspace(0, power.shape[2], N_BANDS + 1).astype(int)
+    bands = np.add.reduceat(p, edges[:-1], axis=2)
+    return np.concatenate([np.stack([dominant, centroid, entropy], axis=2), bands], axis=2)
+
+def window_features(time, values, channels, size=64, step=32):
+    """
+    Atributos de todas as janelas de uma série.
+
+    :param time: tempos das amostras
+    :param values: canais x amostras
+    :param channels: nomes dos canais (para os nomes das colunas)
+    :return: (matriz janelas x atributos, nomes das colunas, tempo inicial de cada janela)
+    """
+    fs, uniform = uniform_series(time, values)
+    if fs == 0 or uniform.shape[1] < size:
+        return np.empty((0, len(channels) * (len(TIME_FEATURES) + len(FREQ_FEATURES)))), \
+               feature_names(channels), np.empty(0)
+    win = windows(uniform, size, step)
+    features = np.concatenate([time_features(win), freq_features(win, fs)], axis=2)
+    # janelas x (canal, atributo)
+    matrix = features.transpose(1, 0, 2).reshape(win.shape[1], -1)
+    start = np.unique(np.asarray(time, dtype=np.float64))[0]
+    return matrix, feature_names(channels), start + np.arange(win.shape[1]) * step / fs
+
+def feature_names(channels):
+    return [f'{channel}_{name}' for channel in channels for name in TIME_FEATURES + FREQ_FEATURES]
+
+
+def file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def extract_file(file_path, channels, time_column='Time', size=64, step=32, cache_dir=CACHE_DIR):
+    """
+    Atributos de um arquivo de sensor, lidos do cache quando possível.
+
+    :return: (matriz janelas x atributos, nomes das colunas, tempos das janelas, veio do cache)
+    """
+    params = f'{FEATURES_VERSION}:{time_column}:{",".join(channels)}:{size}:{step}'
+    key = hashlib.sha1(f'{file_hash(file_path)}:{params}'.encode()).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{key}.npz') if cache_dir else None
+
+    if cache_path is not None and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return cached['features'], cached['names'].tolist(), cached['time'], True
+
+    data = load_sensor(file_path)
+    values = np.vstack([data[channel] for channel in channels])
+    features, names, times = window_features(data[time_column], values, channels, size, step)
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # grava em um temporário e renomeia: leitores nunca veem um .npz pela metade
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, features=features, names=np.array(names), time=times, source=file_path)
+        os.replace(tmp_path, cache_path)
+    return features, names, times, False
+
+def extract_directory(data_dir, sensor='IMU', size=64, step=32, cache_dir=CACHE_DIR):
+    """{nome da série: (matriz, nomes, tempos)} para todas as séries de `sensor` em `data_dir`."""
+    result = {}
+    for key, file_path, series_sensor, time_column, channels in find_series(data_dir):
+        if series_sensor != sensor:
+            continue
+        features, names, times, cached = extract_file(file_path, channels, time_column, size, step, cache_dir)
+        result[key] = (features, names, times)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data_dir', help='pasta de um experimento ou com vários experimentos')
+    parser.add_argument('--sensor', default='IMU', help='IMU ou Velocity')
+    parser.add_argument('--window', type=int, default=64, help='amostras por janela')
+    parser.add_argument('--step', type=int, default=32, help='deslocamento entre janelas')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='pasta do cache de atributos')
+    args = parser.parse_args()
+
+    for key, file_path, sensor, time_column, channels in find_series(args.data_dir):
+        if sensor != args.sensor:
+            continue
+        features, names, times, cached = extract_file(file_path, channels, time_column,
+                                                      args.window, args.step, args.cache_dir)
+        print(f"{key}: {features.shape[0]} janelas x {features.shape[1]} atributos"
+              f"{' (cache)' if cached else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Métricas de qualidade dos dados sintéticos: distâncias entre experimentos.
+
+Para cada par de séries (ex.: IMU de cada experimento) e cada canal:
+    wasserstein: distância de Wasserstein-1 entre as distribuições dos valores
+    ks:          estatística de Kolmogorov-Smirnov (máxima diferença entre as CDFs)
+    mmd:         Maximum Mean Discrepancy com kernel gaussiano, aproximada por
+                 random Fourier features (mmd_joint usa todos os canais juntos)
+    spectral:    distância log-espectral (dB RMS) entre as PSDs de Welch
+                 normalizadas, até a menor das duas frequências de Nyquist
+
+Cada experimento é resumido uma única vez (quantis, amostra ordenada, média
+das random features, PSD); os pares usam só esses resumos, vetorizados por
+canal, e são distribuídos em um pool de processos. O resultado é a matriz
+completa experimento x experimento e a média por grupo (ex.: sincrono x
+assincrono).
+
+Uso (de dentro de agentes/):
+    python -m analysis.metrics sincrono=../2025_05_25_modos/data/sincrono \\
+        assincrono=../2025_05_25_modos/data/assincrono --output metricas.npz
+    python -m analysis.metrics data/          # grupos = primeira pasta de cada série
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.Experiment import load_sensor
+from analysis.spectrum import find_series, uniform_series, welch_psd
+
+METRICS = ('wasserstein', 'ks', 'mmd', 'spectral')
+
+
+def find_groups(specs, sensor='IMU'):
+    """
+    :param specs: ['rótulo=pasta', ...]; uma pasta sem rótulo gera um grupo
+                  por subpasta de primeiro nível
+    :return: [(nome, grupo, caminho, coluna de tempo, canais)]
+    """
+    series = []
+    for spec in specs:
+        label, _, path = spec.rpartition('=')
+        for key, file_path, series_sensor, time_column, channels in find_series(path):
+            if series_sensor != sensor:
+                continue
+            group = label or (key.split('/')[0] if '/' in key else os.path.basename(os.path.normpath(path)))
+            name = f'{label}/{key}' if label else key
+            series.append((name, group, file_path, time_column, channels))
+    return series
+
+
+def summarize(file_path, time_column, channels, n_quantiles=512, max_samples=4000, nperseg=256, seed=42):
+    """
+    Resumo de uma série usado por todas as métricas.
+    Levanta ValueError se a série não tem nenhuma amostra válida (sem NaN).
+    """
+    data = load_sensor(file_path)
+    values = np.vstack([np.asarray(data[channel], dtype=np.float64) for channel in channels])
+    valid = ~np.isnan(values).any(axis=0)
+    values, times = values[:, valid], np.asarray(data[time_column], dtype=np.float64)[valid]
+    if values.shape[1] == 0:
+        raise ValueError(f"{file_path}: nenhuma amostra válida em {', '.join(channels)}")
+
+    sample = values
+    if values.shape[1] > max_samples:
+        rng = np.random.default_rng(seed)
+        sample = values[:, np.sort(rng.choice(values.shape[1], max_samples, replace=False))]
+
+    fs, uniform = uniform_series(times, values)
+    freqs, psd = welch_psd(uniform, fs, nperseg) if uniform.shape[1] >= 8 else (None, None)
+    return {
+        'quantiles': np.quantile(values, np.linspace(0, 1, n_quantiles), axis=1).T,
+        'sorted': np.sort(sample, axis=1),
+        'std': values.std(axis=1),
+        'freqs': freqs,
+        'psd': psd,
+    }
+
+def random_features(sample, scale, n_features=256, seed=42):
+    """
+    Média das random Fourier features (kernel gaussiano) de uma amostra.
+
+    Os mesmos pesos (semente fixa) são usados em todos os experimentos, então
+    MMD^2 entre dois experimentos é a distância quadrática entre as médias.
+    :return: (por canal: canais x n_features, conjunta: n_features)
+    """
+    rng = np.random.default_rng(seed)
+    channels = sample.shape[0]
+    w = rng.standard_normal((channels, n_features))
+    b = rng.uniform(0, 2 * np.pi, n_features)
+    x = sample / scale[:, None]
+    per_channel = np.cos(x[:, :, None] * w[:, None, :] + b).mean(axis=1)
+    joint = np.cos(x.T @ w / np.sqrt(channels) + b).mean(axis=0)
+    return per_channel * np.sqrt(2.0 / n_features), joint * np.sqrt(2.0 / n_features)
+
+
+def ks_statistic(a, b):
+    """KS por canal entre amostras já ordenadas a (canais x n) e b (canais x m)."""
+    n, m = a.shape[1], b.shape[1]
+    merged = np.concatenate([a, b], axis=1)
+    order = np.argsort(merged, axis=1, kind='stable')
+    values = np.take_along_axis(merged, order, axis=1)
+    steps = np.where(order < n, 1.0 / n, -1.0 / m)
+    cdf_diff = np.cumsum(steps, axis=1)
+    # com valores repetidos só vale a diferença depois do último deles
+    last = np.ones_like(values, dtype=bool)
+    last[:, :-1] = values[:, 1:] != values[:, :-1]
+    return np.where(last, np.abs(cdf_diff), 0).max(axis=1)
+
+def spectral_distance(freqs_a, psd_a, freqs_b, psd_b, points=128):
+    """Distância log-espectral (dB RMS) por canal entre PSDs normalizadas."""
+    if freqs_a is None or freqs_b is None:
+        return np.full(psd_a.shape[0] if psd_a is not None else 1, np.nan)
+    grid = np.linspace(0, min(freqs_a[-1], freqs_b[-1]), points + 1)[1:]
+    distances = []
+    for channel_a, channel_b in zip(psd_a, psd_b):
+        pa = np.interp(grid, freqs_a, channel_a)
+        pb = np.interp(grid, freqs_b, channel_b)
+        pa = pa / max(pa.sum(), 1e-300)
+        pb = pb / max(pb.sum(), 1e-300)
+        diff = 10 * np.log10((pa + 1e-12) / (pb + 1e-12))
+        distances.append(np.sqrt(np.mean(diff ** 2)))
+    return np.array(distances)
+
+def pair_metrics(a, b):
+    """Todas as métricas entre dois resumos; cada uma é um vetor por canal (mmd_joint é escalar)."""
+    return {
+        'wasserstein': np.abs(a['quantiles'] - b['quantiles']).mean(axis=1),
+        'ks': ks_statistic(a['sorted'], b['sorted']),
+        'mmd': np.sqrt(np.maximum(((a['rff'] - b['rff']) ** 2).sum(axis=1), 0)),
+        'mmd_joint': float(np.sqrt(max(((a['rff_joint'] - b['rff_joint']) ** 2).sum(), 0))),
+        'spectral': spectral_distance(a['freqs'], a['psd'], b['freqs'], b['psd']),
+    }
+
+
+# estado dos workers: os resumos são enviados uma vez por processo
+_summaries = None
+
+def _init_worker(summaries):
+    global _summaries
+    _summaries = summaries
+
+def _run_pairs(pairs):
+    return [(i, j, pair_metrics(_summaries[i], _summaries[j])) for i, j in pairs]
+
+def _summarize_task(args):
+    try:
+        return summarize(*args)
+    except ValueError as error:
+        print(f"Série ignorada: {error}")
+        return None
+
+
+def distance_matrices(series, workers=None, max_samples=4000, n_features=256, seed=42):
+    """
+    Séries sem amostras válidas ficam de fora da comparação.
+    :param series: saída de find_groups
+    :return: ({métrica: matriz n x n x canais (mmd_joint: n x n)}, séries usadas)
+    """
+    channels = len(series[0][4])
+    if any(len(s[4]) != channels for s in series):
+        raise ValueError("Todas as séries precisam ter os mesmos canais")
+    workers = workers or os.cpu_count() or 1
+
+    tasks = [(file_path, time_column, channel_names, 512, max_samples, 256, seed)
+             for name, group, file_path, time_column, channel_names in series]
+    with ProcessPoolExecutor(workers) as pool:
+        summaries = list(pool.map(_summarize_task, tasks))
+    series = [s for s, summary in zip(series, summaries) if summary is not None]
+    summaries = [summary for summary in summaries if summary is not None]
+    if len(summaries) < 2:
+        raise ValueError("São necessárias ao menos duas séries com amostras válidas")
+
+    # escala comum do kernel: desvio padrão médio de cada canal entre todos os experimentos
+    scale = np.mean([s['std'] for s in summaries], axis=0)
+    scale[scale == 0] = 1
+    for s in summaries:
+        s['rff'], s['rff_joint'] = random_features(s['sorted'], scale, n_features, seed)
+        del s['std']
+
+    n = len(summaries)
+    result = {metric: np.zeros((n, n, channels)) for metric in METRICS}
+    result['mmd_joint'] = np.zeros((n, n))
+    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    chunks = [pairs[k::workers * 4] for k in range(workers * 4) if pairs[k::workers * 4]]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(summaries,)) as pool:
+        for done in pool.map(_run_pairs, chunks):
+            for i, j, metrics in done:
+                for metric, value in metrics.items():
+                    result[metric][i, j] = result[metric][j, i] = value
+    return result, series
+
+def group_summary(result, groups):
+    """{(grupo a, grupo b): {métrica: média entre os pares (e canais)}}; pares de um grupo consigo mesmo excluem i == j."""
+    groups = np.asarray(groups)
+    names = list(dict.fromkeys(groups))
+    summary = {}
+    for ga_index, ga in enumerate(names):
+        for gb in names[ga_index:]:
+            ia, ib = np.flatnonzero(groups == ga), np.flatnonzero(groups == gb)
+            mask = np.ones((len(ia), len(ib)), dtype=bool)
+            if ga == gb:
+                mask &= ~np.eye(len(ia), dtype=bool)
+            if not mask.any():
+                continue
+            summary[(ga, gb)] = {}
+            for metric, matrix in result.items():
+                block = matrix[np.ix_(ia, ib)]
+                block = block.mean(axis=2) if block.ndim == 3 else block
+                summary[(ga, gb)][metric] = float(np.nanmean(block[mask]))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('datasets', nargs='+', help='rótulo=pasta ou pasta (grupo = primeira subpasta)')
+    parser.add_argument('--sensor', default='IMU', help='IMU ou Velocity')
+    parser.add_argument('--workers', type=int, help='processos (padrão: um por núcleo)')
+    parser.add_argument('--max-samples', type=int, default=4000, help='amostras por série para KS e MMD')
+    parser.add_argument('--features', type=int, default=256, help='random Fourier features do MMD')
+    parser.add_argument('--output', help='.npz com as matrizes completas')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    series = find_groups(args.datasets, args.sensor)
+    if len(series) < 2:
+        print("São necessárias ao menos duas séries para comparar.")
+        return
+    try:
+        result, series = distance_matrices(series, args.workers, args.max_samples, args.features)
+    except ValueError as error:
+        print(error)
+        return
+    names, groups = [s[0] for s in series], [s[1] for s in series]
+
+    metrics = list(METRICS) + ['mmd_joint']
+    print(f"{len(series)} séries, {len(series) * (len(series) - 1) // 2} pares "
+          f"({time.perf_counter() - start:.1f} s)")
+    print('grupos'.ljust(40) + ''.join(m.rjust(13) for m in metrics))
+    for (ga, gb), values in group_summary(result, groups).items():
+        print(f'{ga} x {gb}'.ljust(40) + ''.join(f'{values[m]:13.4f}' for m in metrics))
+
+    if args.output:
+        np.savez(args.output, names=np.array(names), groups=np.array(groups),
+                 channels=np.array(series[0][4]), **result)
+
+
+if __name__ == '__main__':
+    main()
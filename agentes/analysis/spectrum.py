@@ -0,0 +1,184 @@
+"""
+Espectro dos sensores e escolha da taxa de amostragem (Nyquist).
+
+Para cada série de IMU e de velocidade dos experimentos: reamostra em uma
+grade uniforme, calcula a PSD de Welch de todos os canais de uma vez
+(NumPy), estima a banda efetiva wm como a frequência abaixo da qual está a
+fração `energy` da potência e recomenda ws = 2 * wm (com margem), ou seja,
+sensor_tick = 1 / ws.
+
+Uso (de dentro de agentes/):
+    python -m analysis.spectrum data/                      # todos os experimentos
+    python -m analysis.spectrum data/exp_<timestamp> --energy 0.95 --output espectro.csv
+"""
+
+import argparse
+import csv
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from modules.Experiment import find_sensor_files, load_sensor
+
+# canais analisados por tipo de sensor (a bússola fica de fora: é um ângulo que dá a volta em 2*pi)
+SENSOR_CHANNELS = {
+    'IMU': ['Accel_x', 'Accel_y', 'Accel_z', 'Gyro_x', 'Gyro_y', 'Gyro_z'],
+    'Velocity': ['X', 'Y', 'Z'],
+}
+# arquivos dos scripts de 2025_05_25_modos (imu.csv/imu.parquet com colunas minúsculas)
+FLAT_FILES = {
+    'imu': ('IMU', 'timestamp', ['accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z']),
+}
+
+
+def uniform_series(time, values):
+    """
+    Reamostra `values` (canais x amostras) em uma grade de tempo uniforme.
+
+    O passo é a mediana dos intervalos entre amostras; timestamps repetidos
+    (comuns em modo assíncrono) são descartados.
+    :return: (fs, valores reamostrados)
+    """
+    time, unique = np.unique(np.asarray(time, dtype=np.float64), return_index=True)
+    values = np.asarray(values, dtype=np.float64)[:, unique]
+    if len(time) < 2:
+        return 0.0, values
+    dt = np.median(np.diff(time))
+    grid = np.arange(time[0], time[-1] + dt / 2, dt)
+    resampled = np.vstack([np.interp(grid, time, channel) for channel in values])
+    return 1.0 / dt, resampled
+
+def welch_psd(values, fs, nperseg=256, overlap=0.5):
+    """
+    PSD de Welch (janela de Hann, unilateral) de todos os canais de uma vez.
+
+    :param values: canais x amostras, amostrados uniformemente a `fs` Hz
+    :return: (frequências, psd canais x frequências)
+    """
+    values = np.atleast_2d(values)
+    nperseg = min(nperseg, values.shape[1])
+    step = max(int(nperseg * (1 - overlap)), 1)
+    # segmentos sobrepostos sem cópia: canais x segmentos x nperseg
+    segments = sliding_window_view(values, nperseg, axis=1)[:, ::step]
+    # Hann periódica (a mesma de scipy.signal.welch)
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)
+    segments = (segments - segments.mean(axis=2, keepdims=True)) * window
+
+    spectrum = np.abs(np.fft.rfft(segments, axis=2)) ** 2
+    psd = spectrum.mean(axis=1) / (fs * np.sum(window ** 2))
+    # unilateral: dobra tudo menos DC e (com nperseg par) Nyquist
+    psd[:, 1:(nperseg + 1) // 2] *= 2
+    return np.fft.rfftfreq(nperseg, 1.0 / fs), psd
+
+def bandwidth(freqs, psd, energy=0.99):
+    """Frequência abaixo da qual fica a fração `energy` da potência de cada canal (sem DC)."""
+    power = np.cumsum(psd[:, 1:], axis=1)
+    total = power[:, -1:]
+    # canais constantes (potência zero) não têm banda
+    below = np.where(total > 0, power / np.where(total > 0, total, 1), 1.0)
+    return freqs[1:][np.argmax(below >= energy, axis=1)]
+
+def recommend_tick(wm, fs, margin=1.25):
+    """
+    sensor_tick recomendado para a banda `wm` (Hz): 1 / (margin * 2 * wm).
+
+    Se a banda encosta em Nyquist da taxa atual (fs / 2), o sinal pode já
+    estar com aliasing e a taxa atual é o limite do que se pode afirmar.
+    """
+    if wm <= 0:
+        return None, False
+    if wm >= 0.9 * fs / 2:
+        return 1.0 / fs, True
+    return 1.0 / (margin * 2 * wm), False
+
+
+def analyze_series(time, values, channels, nperseg=256, overlap=0.5, energy=0.99, margin=1.25):
+    fs, uniform = uniform_series(time, values)
+    if fs == 0 or uniform.shape[1] < 8:
+        return None
+    freqs, psd = welch_psd(uniform, fs, nperseg, overlap)
+    wm = bandwidth(freqs, psd, energy)
+    tick, limited = recommend_tick(float(wm.max()), fs, margin)
+    return {
+        'fs': float(fs),
+        'samples': uniform.shape[1],
+        'bandwidth': dict(zip(channels, wm.tolist())),
+        'wm': float(wm.max()),
+        'channel': channels[int(np.argmax(wm))],
+        'sensor_tick': tick,
+        'aliasing': limited,
+    }
+
+def find_series(data_dir):
+    """
+    Procura as séries de IMU e de velocidade em `data_dir` (um experimento ou
+    uma pasta com vários). Retorna [(nome, caminho, sensor, coluna de tempo, canais)].
+    """
+    series = []
+    for key, file_path in sorted(find_sensor_files(data_dir).items()):
+        sensor = key.rsplit('/', 1)[-1].partition('_')[0]
+        if sensor in SENSOR_CHANNELS:
+            series.append((key, file_path, sensor, 'Time', SENSOR_CHANNELS[sensor]))
+
+    for root, dirs, filenames in os.walk(data_dir):
+        dirs.sort()
+        for name, (sensor, time_column, channels) in FLAT_FILES.items():
+            for extension in ('parquet', 'csv'):
+                if f'{name}.{extension}' in filenames:
+                    key = os.path.relpath(os.path.join(root, name), data_dir).replace(os.sep, '/')
+                    series.append((key, os.path.join(root, f'{name}.{extension}'), sensor, time_column, channels))
+                    break
+    return series
+
+def analyze_directory(data_dir, nperseg=256, overlap=0.5, energy=0.99, margin=1.25):
+    results = []
+    for key, file_path, sensor, time_column, channels in find_series(data_dir):
+        data = load_sensor(file_path)
+        values = np.vstack([data[channel] for channel in channels])
+        result = analyze_series(data[time_column], values, channels, nperseg, overlap, energy, margin)
+        if result is None:
+            print(f"[Aviso] {key}: poucas amostras para estimar o espectro")
+            continue
+        result.update(series=key, sensor=sensor)
+        results.append(result)
+    return results
+
+def save_summary(results, file_path):
+    with open(file_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['series', 'sensor', 'fs', 'samples', 'wm', 'channel', 'sensor_tick', 'aliasing'])
+        for r in results:
+            writer.writerow([r['series'], r['sensor'], r['fs'], r['samples'], r['wm'], r['channel'],
+                             r['sensor_tick'], r['aliasing']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data_dir', help='pasta de um experimento ou com vários experimentos')
+    parser.add_argument('--nperseg', type=int, default=256, help='amostras por segmento de Welch')
+    parser.add_argument('--overlap', type=float, default=0.5, help='sobreposição entre segmentos (0 a 1)')
+    parser.add_argument('--energy', type=float, default=0.99, help='fração da potência que define a banda')
+    parser.add_argument('--margin', type=float, default=1.25, help='margem sobre a taxa de Nyquist')
+    parser.add_argument('--output', help='CSV com o resumo por série')
+    args = parser.parse_args()
+
+    results = analyze_directory(args.data_dir, args.nperseg, args.overlap, args.energy, args.margin)
+    for r in results:
+        tick = f"{r['sensor_tick']:.4f} s" if r['sensor_tick'] is not None else '-'
+        note = '  (banda encosta em Nyquist: taxa atual pode ser insuficiente)' if r['aliasing'] else ''
+        print(f"{r['series']}: fs={r['fs']:.2f} Hz, wm={r['wm']:.3f} Hz ({r['channel']}), "
+              f"sensor_tick recomendado={tick}{note}")
+
+    # recomendação por tipo de sensor: a menor entre todas as séries
+    for sensor in sorted({r['sensor'] for r in results}):
+        ticks = [r['sensor_tick'] for r in results if r['sensor'] == sensor and r['sensor_tick'] is not None]
+        if ticks:
+            print(f"{sensor}: sensor_tick <= {min(ticks):.4f} s em todos os experimentos")
+
+    if args.output:
+        save_summary(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
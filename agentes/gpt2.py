@@ -5,14 +5,19 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from collections import defaultdict
+
+from modules.FrameSynchronizer import FrameSynchronizer
 
 SAVE_DIR = "saida_agentes"
 SIMULATION_TIME = 20  # segundos
 AGENTS_PER_TYPE = 2
+LATE_WINDOW = 10  # frames que uma leitura pode atrasar antes de a linha ser fechada
+
+IMU_COLUMNS = ['accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z']
+GNSS_COLUMNS = ['latitude', 'longitude', 'altitude']
+STATE_COLUMNS = ['pos_x', 'pos_y', 'pos_z', 'vel_x', 'vel_y', 'vel_z']
 
-imu_data_storage = defaultdict(list)
-gnss_data_buffer = {}
+synchronizers = {}
 
 def create_imu_sensor(blueprint_library):
     imu_bp = blueprint_library.find('sensor.other.imu')
@@ -24,41 +29,37 @@ def create_gnss_sensor(blueprint_library):
     gnss_bp.set_attribute('sensor_tick', '0.05')
     return gnss_bp
 
-def imu_listener(agent_name, data_storage):
+def create_synchronizer(agent_name):
+    sync = FrameSynchronizer(agent_name, window=LATE_WINDOW)
+    sync.add_source('imu', IMU_COLUMNS)
+    sync.add_source('gnss', GNSS_COLUMNS)
+    sync.add_source('state', STATE_COLUMNS)
+    synchronizers[agent_name] = sync
+    return sync
+
+def imu_listener(sync):
     def callback(imu_data):
-        for item in reversed(data_storage[agent_name]):
-            if item['accel_x'] is None:
-                item.update({
-                    'accel_x': imu_data.accelerometer.x,
-                    'accel_y': imu_data.accelerometer.y,
-                    'accel_z': imu_data.accelerometer.z,
-                    'gyro_x': imu_data.gyroscope.x,
-                    'gyro_y': imu_data.gyroscope.y,
-                    'gyro_z': imu_data.gyroscope.z
-                })
-                break
+        sync.push('imu', imu_data.frame, imu_data.timestamp,
+                  imu_data.accelerometer.x, imu_data.accelerometer.y, imu_data.accelerometer.z,
+                  imu_data.gyroscope.x, imu_data.gyroscope.y, imu_data.gyroscope.z)
     return callback
 
-def gnss_listener(agent_name):
+def gnss_listener(sync):
     def callback(data):
-        gnss_data_buffer[agent_name] = {
-            'lat': data.latitude,
-            'lon': data.longitude,
-            'alt': data.altitude
-        }
+        sync.push('gnss', data.frame, data.timestamp, data.latitude, data.longitude, data.altitude)
     return callback
 
-def plot_and_save(agent_name, data):
+def plot_and_save(agent_name, sync):
     os.makedirs(os.path.join(SAVE_DIR, agent_name), exist_ok=True)
 
-    clean_data = [d for d in data if isinstance(d, dict) and len(d) >= 16]
-    clean_data = clean_data[5:]  # Ignora os 5 primeiros
+    # linhas completas, alinhadas pelo frame da simulação
+    data = sync.data.as_dict(start=5)  # Ignora os 5 primeiros
 
-    if not clean_data:
+    if len(data['Time']) == 0:
         print(f"[Aviso] Nenhum dado válido para {agent_name}.")
         return
 
-    df = pd.DataFrame(clean_data)
+    df = pd.DataFrame(data).rename(columns={'Time': 'timestamp', 'Frame': 'frame'}).sort_values('frame')
     df.to_csv(os.path.join(SAVE_DIR, agent_name, "imu.csv"), index=False)
 
     # IMU Plot
@@ -139,16 +140,17 @@ def main():
             vehicle = world.spawn_actor(vehicle_bp, spawn_points[i])
             vehicle.set_autopilot(True, traffic_manager.get_port())
             name = f"vehicle_{vehicle.id}"
+            sync = create_synchronizer(name)
 
             # IMU
             imu_bp = create_imu_sensor(blueprint_library)
             imu = world.spawn_actor(imu_bp, carla.Transform(), attach_to=vehicle)
-            imu.listen(imu_listener(name, imu_data_storage))
+            imu.listen(imu_listener(sync))
 
             # GNSS
             gnss_bp = create_gnss_sensor(blueprint_library)
             gnss = world.spawn_actor(gnss_bp, carla.Transform(carla.Location(z=2)), attach_to=vehicle)
-            gnss.listen(gnss_listener(name))
+            gnss.listen(gnss_listener(sync))
 
             all_agents.append((name, vehicle))
             actors_to_destroy.extend([vehicle, imu, gnss])
@@ -164,16 +166,17 @@ def main():
             pedestrian.apply_control(pedestrian_control)
 
             name = f"pedestrian_{pedestrian.id}"
+            sync = create_synchronizer(name)
 
             # IMU
             imu_bp = create_imu_sensor(blueprint_library)
             imu = world.spawn_actor(imu_bp, carla.Transform(), attach_to=pedestrian)
-            imu.listen(imu_listener(name, imu_data_storage))
+            imu.listen(imu_listener(sync))
 
             # GNSS
             gnss_bp = create_gnss_sensor(blueprint_library)
             gnss = world.spawn_actor(gnss_bp, carla.Transform(carla.Location(z=2)), attach_to=pedestrian)
-            gnss.listen(gnss_listener(name))
+            gnss.listen(gnss_listener(sync))
 
             all_agents.append((name, pedestrian))
             actors_to_destroy.extend([pedestrian, imu, gnss])
@@ -182,20 +185,14 @@ def main():
         frame = 0
         while frame < int(SIMULATION_TIME / 0.05):
             world.tick()
-            timestamp = world.get_snapshot().timestamp.elapsed_seconds
+            snapshot = world.get_snapshot()
+            timestamp = snapshot.timestamp.elapsed_seconds
             for name, actor in all_agents:
-                loc = actor.get_location()
-                vel = actor.get_velocity()
-                gnss = gnss_data_buffer.get(name, {'lat': None, 'lon': None, 'alt': None})
-
-                imu_data_storage[name].append({
-                    'timestamp': timestamp,
-                    'accel_x': None, 'accel_y': None, 'accel_z': None,
-                    'gyro_x': None, 'gyro_y': None, 'gyro_z': None,
-                    'latitude': gnss['lat'], 'longitude': gnss['lon'], 'altitude': gnss['alt'],
-                    'pos_x': loc.x, 'pos_y': loc.y, 'pos_z': loc.z,
-                    'vel_x': vel.x, 'vel_y': vel.y, 'vel_z': vel.z
-                })
+                actor_snapshot = snapshot.find(actor.id)
+                loc = actor_snapshot.get_transform().location
+                vel = actor_snapshot.get_velocity()
+                synchronizers[name].push('state', snapshot.frame, timestamp,
+                                         loc.x, loc.y, loc.z, vel.x, vel.y, vel.z)
             frame += 1
 
     finally:
@@ -205,8 +202,10 @@ def main():
             if actor.is_alive:
                 actor.destroy()
 
-        for name in imu_data_storage:
-            plot_and_save(name, imu_data_storage[name])
+        for name, sync in synchronizers.items():
+            sync.flush()
+            print(f"{name}: {sync.emitted} linhas, {sync.incomplete} incompletas, {sync.late} leituras atrasadas")
+            plot_and_save(name, sync)
         print("Pronto.")
 
 if __name__ == "__main__":
@@ -2,36 +2,59 @@ from dataclasses import dataclass
 import carla
 import os
 
+from modules.ImageEncoder import ImageEncoder
+from modules.VideoEncoder import VideoEncoder
+
 @dataclass
 class Camera:
     label: str
     transform: carla.Transform
     sensor: carla.Actor
+    encoder: ImageEncoder
 
-    def __init__(self, label, world, x, y, z, rotation, vehicle=None):
+    def __init__(self, label, world, x, y, z, rotation, vehicle=None, encoder_workers=2, max_queue=64, drop_policy='drop_oldest',
+                 output='png', fps=None):
         blueprint = world.get_blueprint_library().find('sensor.camera.rgb')
+        if fps:
+            # a câmera captura na mesma taxa em que o vídeo é reproduzido
+            blueprint.set_attribute('sensor_tick', str(1.0 / fps))
         self.transform = carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=rotation))
         self.sensor = world.spawn_actor(blueprint, self.transform, attach_to=vehicle)
         self.label = label
+        self.encoder = None
+        self.encoder_workers = encoder_workers
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+        self.output = output # png: uma imagem por quadro, video: um único arquivo + frames.csv
+        self.fps = fps # None: um quadro por tick da simulação
 
-    # Callback para salvar imagens
-    def __save_image_disk__(self, image, output_dir):
-        image.save_to_disk(f"{output_dir}/image_{image.frame}.png")
-        print(f"Imagem salva: image_{image.frame}.png")
+    # Callback: apenas copia o buffer bruto, a codificação fica com o ImageEncoder
+    def __save_image_disk__(self, image):
+        self.encoder.submit(image.frame, image.timestamp, image.width, image.height, bytes(image.raw_data))
 
     def start(self, experiment_dir):
 
         if not os.path.exists(f'{experiment_dir}/camera_{self.label}'):
-            os.makedirs(f'{experiment_dir}/camera_{self.label}')                
+            os.makedirs(f'{experiment_dir}/camera_{self.label}')
 
         if self.sensor is not None:
             output_dir = f'{experiment_dir}/camera_{self.label}'
-            self.sensor.listen(lambda image: self.__save_image_disk__(image, output_dir))
+            if self.output == 'video':
+                self.encoder = VideoEncoder(output_dir, self.fps or 20.0, max_queue=self.max_queue, policy=self.drop_policy)
+            else:
+                self.encoder = ImageEncoder(output_dir, self.encoder_workers, self.max_queue, self.drop_policy)
+            self.sensor.listen(lambda image: self.__save_image_disk__(image))
 
     def stop(self):
         if self.sensor is not None:
             self.sensor.stop()
-            
+        if self.encoder is not None:
+            self.encoder.close()
+            stats = self.encoder.stats()
+            print(f"Câmera {self.label}: {stats['encoded']} quadros salvos, {stats['dropped']} descartados, {stats['failed']} com erro, "
+                  f"latência média {stats['latency_mean'] * 1000:.1f} ms")
+            self.encoder = None
+
     def destroy(self):
         if self.sensor is not None:
             self.sensor.destroy()
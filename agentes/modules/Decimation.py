@@ -0,0 +1,95 @@
+"""
+Redução de pontos antes de plotar séries longas.
+
+    minmax: divide a série em (max_points-2)/2 faixas e mantém o mínimo e o máximo
+            de cada uma (todo pico aparece no gráfico); com menos de 4 pontos
+            sobram só as pontas
+    lttb:   Largest-Triangle-Three-Buckets, mantém em cada faixa o ponto que
+            forma o maior triângulo com os vizinhos (preserva a forma da curva)
+
+As funções devolvem índices, para que tempo, cor e outras colunas sejam
+recortadas do mesmo jeito. O primeiro e o último ponto são sempre mantidos
+(se max_points >= 2) e o resultado nunca passa de max_points índices.
+"""
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+def _endpoints(n, max_points):
+    return np.array([0, n - 1][:max(max_points, 0)], dtype=np.int64)
+
+def minmax_indices(y, max_points):
+    y = np.asarray(y)
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    if max_points < 4:
+        # não cabe nenhum par mínimo/máximo além das pontas
+        return _endpoints(n, max_points)
+
+    # o primeiro e o último ponto ocupam duas das max_points vagas; as faixas
+    # cobrem só os pontos internos
+    buckets = (max_points - 2) // 2
+    inner = n - 2
+    bucket = np.arange(inner) * buckets // inner
+    # NaN é tratado como o menor valor da faixa para não sumir do gráfico
+    values = y[1:-1]
+    values = np.where(np.isnan(values), -np.inf, values) if np.issubdtype(y.dtype, np.floating) else values
+    order = np.lexsort((values, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.append(starts[1:], inner)
+    keep = np.concatenate(([0, n - 1], order[starts] + 1, order[ends - 1] + 1))
+    return np.unique(keep)
+
+def lttb_indices(x, y, max_points):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return _endpoints(n, max_points)
+
+    # faixas internas (o primeiro e o último ponto ficam de fora)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # média da próxima faixa (ou o último ponto)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        cx = x[next_start:next_end].mean()
+        cy = y[next_start:next_end].mean()
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.all(np.isnan(area)) else start
+        keep[i + 1] = a
+    return keep
+
+def decimate_indices(x, ys, max_points, method='minmax'):
+    """
+    Índices que representam todas as séries `ys` (lista de arrays com o mesmo
+    tamanho de `x`) com no máximo `max_points` pontos no total.
+    Com várias séries o orçamento é dividido entre elas (max_points // len(ys)
+    cada, no mínimo as duas pontas) e o resultado é a união dos índices.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de decimação desconhecido: {method}. Opções: {METHODS}")
+    n = len(x)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+
+    share = max(max_points // max(len(ys), 1), min(max_points, 2))
+    keep = [_endpoints(n, max_points)]
+    for y in ys:
+        if method == 'minmax':
+            keep.append(minmax_indices(y, share))
+        else:
+            keep.append(lttb_indices(x, y, share))
+    return np.unique(np.concatenate(keep))
+
+def decimate(x, y, max_points, method='minmax'):
+    """Atalho para uma única série: devolve (x, y) reduzidos."""
+    index = decimate_indices(x, [y], max_points, method)
+    return np.asarray(x)[index], np.asarray(y)[index]
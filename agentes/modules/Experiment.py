@@ -0,0 +1,68 @@
+import json
+import os
+
+from modules.OutputFormat import FORMATS
+
+def find_sensor_files(experiment_dir):
+    """
+    Procura os arquivos de dados dos sensores de um experimento.
+
+    Retorna um dicionário {nome relativo da pasta: caminho do arquivo}, por
+    exemplo {'IMU_vehicle': '.../IMU_vehicle/data.parquet',
+    'pedestres/GNSS_pedestre_0': '.../data.csv'}. Quando a mesma pasta tem mais
+    de um formato, o parquet é preferido.
+    """
+    files = {}
+    for root, dirs, filenames in os.walk(experiment_dir):
+        dirs.sort()
+        for name in ('parquet', 'csv'):
+            if f'data.{FORMATS[name].extension}' in filenames:
+                key = os.path.relpath(root, experiment_dir).replace(os.sep, '/')
+                files[key] = os.path.join(root, f'data.{FORMATS[name].extension}')
+                break
+    return files
+
+def load_sensor(file_path):
+    """Lê um arquivo de dados de sensor como {coluna: np.ndarray}."""
+    extension = os.path.splitext(file_path)[1].lstrip('.')
+    for fmt in FORMATS.values():
+        if fmt.extension == extension:
+            return fmt().read(file_path)
+    raise ValueError(f"Formato de arquivo não suportado: {file_path}")
+
+def load_experiment(experiment_dir, sensors=None):
+    """
+    Carrega todos os sensores de um experimento em formato colunar.
+
+    :param experiment_dir: pasta data/exp_<timestamp>
+    :param sensors: prefixos a carregar (ex.: ['IMU', 'Velocity']); todos se None
+    :return: {'IMU_vehicle': {'Time': array, 'Accel_x': array, ...}, ...}
+    """
+    data = {}
+    for key, file_path in find_sensor_files(experiment_dir).items():
+        folder = key.rsplit('/', 1)[-1]
+        if sensors is not None and not any(folder.startswith(f'{prefix}_') for prefix in sensors):
+            continue
+        data[key] = load_sensor(file_path)
+    return data
+
+def write_meta(experiment_dir, **fields):
+    """
+    Grava (ou atualiza) meta.json do experimento com os campos informados.
+
+    Usado pelo catálogo (analysis/catalog.py) para cidade, tick_time, modo
+    síncrono, número de agentes, duração...
+    """
+    file_path = os.path.join(experiment_dir, 'meta.json')
+    meta = read_meta(experiment_dir)
+    meta.update(fields)
+    with open(f'{file_path}.tmp', 'w') as file:
+        json.dump(meta, file, indent=2, ensure_ascii=False)
+    os.replace(f'{file_path}.tmp', file_path)
+
+def read_meta(experiment_dir):
+    file_path = os.path.join(experiment_dir, 'meta.json')
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path) as file:
+        return json.load(file)
@@ -0,0 +1,115 @@
+import numpy as np
+import threading
+import heapq
+import os
+
+from modules.SampleBuffer import SampleBuffer
+from modules.OutputFormat import get_format
+
+class FrameSynchronizer:
+    """
+    Junta as amostras de vários sensores pelo frame da simulação.
+
+    Cada fonte (IMU, GNSS, posição, velocidade...) chama `push` com o frame e
+    o timestamp da própria leitura. As amostras ficam em um dicionário
+    indexado pelo frame, então cada junção custa O(1); quando todas as fontes
+    de um frame chegam, a linha alinhada é emitida. Frames mais antigos que
+    `window` frames em relação ao mais recente são descartados (ou emitidos
+    com NaN se `emit_incomplete`), e amostras que chegam depois disso são
+    contadas como atrasadas, assim como as que repetem um frame já emitido.
+
+    As linhas vão para `on_row(row)` se fornecido; caso contrário ficam em
+    `self.data` (SampleBuffer com as colunas Time, Frame e as das fontes).
+    """
+    label: str
+    window: int
+    data: SampleBuffer
+
+    def __init__(self, label, window=20, emit_incomplete=False, on_row=None, output_format='csv'):
+        self.label = label
+        self.window = window
+        self.emit_incomplete = emit_incomplete
+        self.on_row = on_row
+        self.output_format = get_format(output_format)
+        self.columns = ['Time', 'Frame']
+        self.dtypes = [np.float64, np.float64]
+        self._sources = {}
+        self._pending = {}
+        self._order = []
+        self._latest = -1
+        self._closed = -1
+        # frames completos já emitidos que ainda não saíram da janela
+        self._done = set()
+        self._lock = threading.Lock()
+        self.data = None
+        self.emitted = 0
+        self.incomplete = 0
+        self.late = 0
+
+    def add_source(self, name, columns, dtypes=None):
+        """Registra uma fonte; deve ser chamado antes do primeiro push."""
+        if self._pending or self.emitted:
+            raise RuntimeError("Fontes devem ser registradas antes das primeiras amostras")
+        if name in self._sources:
+            raise ValueError(f"Fonte já registrada: {name}")
+        repeated = set(columns) & set(self.columns)
+        if repeated:
+            raise ValueError(f"Colunas repetidas: {sorted(repeated)}")
+        self._sources[name] = (len(self.columns), len(columns), 1 << len(self._sources))
+        self.columns += list(columns)
+        self.dtypes += list(dtypes) if dtypes is not None else [np.float64] * len(columns)
+        self.data = SampleBuffer(self.columns, dtypes=self.dtypes)
+
+    def push(self, name, frame, timestamp, *values):
+        offset, count, bit = self._sources[name]
+        with self._lock:
+            if frame <= self._closed or frame in self._done:
+                self.late += 1
+                return
+            entry = self._pending.get(frame)
+            if entry is None:
+                row = np.full(len(self.columns), np.nan)
+                row[0], row[1] = timestamp, frame
+                entry = self._pending[frame] = [row, 0]
+                heapq.heappush(self._order, frame)
+            entry[0][offset:offset + count] = values
+            entry[1] |= bit
+            if entry[1] == (1 << len(self._sources)) - 1:
+                del self._pending[frame]
+                self._done.add(frame)
+                self._emit(entry[0])
+
+            if frame > self._latest:
+                self._latest = frame
+                self._evict(self._latest - self.window)
+
+    def flush(self):
+        """Fecha todos os frames pendentes (fim da simulação)."""
+        with self._lock:
+            self._evict(float('inf'))
+
+    def _evict(self, limit):
+        self._closed = max(self._closed, limit)
+        if self._done:
+            self._done = {frame for frame in self._done if frame > limit}
+        while self._order and self._order[0] <= limit:
+            frame = heapq.heappop(self._order)
+            entry = self._pending.pop(frame, None)
+            if entry is None:
+                continue
+            self.incomplete += 1
+            if self.emit_incomplete:
+                self._emit(entry[0])
+
+    def _emit(self, row):
+        self.emitted += 1
+        if self.on_row is not None:
+            self.on_row(row)
+        else:
+            self.data.append(*row)
+
+    def save_data(self, experiment_dir):
+        if not os.path.exists(f'{experiment_dir}/Sync_{self.label}'):
+            os.makedirs(f'{experiment_dir}/Sync_{self.label}')
+        file_path = f'{experiment_dir}/Sync_{self.label}/data.{self.output_format.extension}'
+        self.output_format.write(file_path, self.data.columns, self.data.to_array(), self.data.dtypes)
@@ -1,37 +1,54 @@
-import matplotlib.pyplot as plt
 import carla
-import csv
+import numpy as np
 import os
 
+from modules.SampleBuffer import SampleBuffer
+from modules.StreamWriter import StreamWriter
+from modules.OutputFormat import get_format
+from modules.PlotRenderer import plot_gnss, MAX_POINTS, DECIMATION
+from modules.FrameSynchronizer import FrameSynchronizer
+
 class GNSS:
     label: str
     transform: carla.Transform
     sensor: carla.Actor
-    data: dict
-    time: float
+    data: SampleBuffer
     tick_time: float
+    writer: StreamWriter
+    synchronizer: FrameSynchronizer
 
-    def __init__(self, label, world, x, y, z, rotation, thick_time, attached_ob=None):
+    def __init__(self, label, world, x, y, z, rotation, thick_time, attached_ob=None, writer=None, output_format='csv', synchronizer=None):
         blueprint = world.get_blueprint_library().find('sensor.other.gnss')
+        blueprint.set_attribute('sensor_tick', str(thick_time))
         self.transform = carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=rotation))
         self.sensor = world.spawn_actor(blueprint, self.transform, attach_to=attached_ob)
         self.tick_time = thick_time
         self.label = label
-        self.data = {}
-        self.time = 0.0
+        self.data = SampleBuffer(['Time', 'Frame', 'Latitude', 'Longitude', 'Altitude'],
+                                 dtypes=[np.float64] * 5)
+        self.writer = writer
+        self.output_format = get_format(output_format)
+        self.synchronizer = synchronizer
+        if synchronizer is not None:
+            synchronizer.add_source(f'GNSS_{label}', [f'GNSS_{name}' for name in self.data.columns[2:]], self.data.dtypes[2:])
 
     def callback(self, data):
-        self.data[self.time] = {
-            'latitude': data.latitude,
-            'longitude': data.longitude,
-            'altitude': data.altitude
-        }
-        self.time += self.tick_time
+        self.data.append(data.timestamp, data.frame, data.latitude, data.longitude, data.altitude)
+        if self.synchronizer is not None:
+            self.synchronizer.push(f'GNSS_{self.label}', data.frame, data.timestamp, data.latitude, data.longitude, data.altitude)
+        if self.writer is not None:
+            self.writer.feed(self.file_path, self.data)
 
     def start(self, experiment_dir):
         if not os.path.exists(f'{experiment_dir}/GNSS_{self.label}'):
             os.makedirs(f'{experiment_dir}/GNSS_{self.label}')                
 
+        self.file_path = f'{experiment_dir}/GNSS_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            # descarta as duas primeiras leituras
+            self.writer.open(self.file_path, self.data.columns, skip_rows=2,
+                             output_format=self.output_format, dtypes=self.data.dtypes)
+
         if self.sensor is not None:
             self.sensor.listen(lambda event: self.callback(event))
 
@@ -40,43 +57,20 @@ class GNSS:
             self.sensor.stop()
 
     def save_data(self, experiment_dir):
-        file_path = f'{experiment_dir}/GNSS_{self.label}/data.csv'
-        with open(file_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Time', 'Latitude', 'Longitude', 'Altitude'])
-            cont = 0
-            for time, data in self.data.items():
-                if cont < 2:
-                    cont += 1
-                    continue
-                writer.writerow([time, data['latitude'], data['longitude'], data['altitude']])
-
-    def plot_data(self, experiment_dir):
-        latitudes = [data['latitude'] for data in self.data.values()]
-        longitudes = [data['longitude'] for data in self.data.values()]
-        altitudes = [data['altitude'] for data in self.data.values()]
+        file_path = f'{experiment_dir}/GNSS_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.close_file(file_path, self.data).wait()
+            return
 
-        plt.figure(figsize=(10, 6))
-        plt.subplot(3, 1, 1)
-        plt.plot(self.data.keys(), latitudes, label='Latitude')
-        plt.title('GNSS Data')
-        plt.ylabel('Latitude (°)')
-        plt.grid()
+        # descarta as duas primeiras leituras
+        self.output_format.write(file_path, self.data.columns, self.data.to_array(start=2), self.data.dtypes)
 
-        plt.subplot(3, 1, 2)
-        plt.plot(self.data.keys(), longitudes, label='Longitude', color='orange')
-        plt.ylabel('Longitude (°)')
-        plt.grid()
-
-        plt.subplot(3, 1, 3)
-        plt.plot(self.data.keys(), altitudes, label='Altitude', color='green')
-        plt.xlabel('Time (s)')
-        plt.ylabel('Altitude (m)')
-        plt.grid()
-
-        plt.tight_layout()
-        plt.savefig(f'{experiment_dir}/GNSS_{self.label}/plot.png')
-        plt.close()
+    def plot_data(self, experiment_dir, max_points=MAX_POINTS, method=DECIMATION):
+        if self.writer is not None:
+            data = self.output_format.read(f'{experiment_dir}/GNSS_{self.label}/data.{self.output_format.extension}')
+        else:
+            data = self.data.as_dict()
+        plot_gnss(data, f'{experiment_dir}/GNSS_{self.label}', max_points, method)
 
     def destroy(self):
         if self.sensor is not None:
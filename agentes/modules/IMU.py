@@ -1,37 +1,59 @@
-import matplotlib.pyplot as plt
 import carla
-import csv
+import numpy as np
 import os
 
+from modules.SampleBuffer import SampleBuffer
+from modules.StreamWriter import StreamWriter
+from modules.OutputFormat import get_format
+from modules.PlotRenderer import plot_imu, MAX_POINTS, DECIMATION
+from modules.FrameSynchronizer import FrameSynchronizer
+
+GRAVITY = carla.Vector3D(x=0, y=0, z=9.81)
+
 class IMU:
     label: str
     transform: carla.Transform
     sensor: carla.Actor
-    data: dict
-    time: float
+    data: SampleBuffer
     tick_time: float
+    writer: StreamWriter
+    synchronizer: FrameSynchronizer
 
-    def __init__(self, label, world, x, y, z, rotation, thick_time, attached_ob=None):
+    def __init__(self, label, world, x, y, z, rotation, thick_time, attached_ob=None, writer=None, output_format='csv', synchronizer=None):
         blueprint = world.get_blueprint_library().find('sensor.other.imu')
+        blueprint.set_attribute('sensor_tick', str(thick_time))
         self.transform = carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=rotation))
         self.sensor = world.spawn_actor(blueprint, self.transform, attach_to=attached_ob)
         self.tick_time = thick_time
         self.label = label
-        self.data = {}
-        self.time = 0.0
+        self.data = SampleBuffer(['Time', 'Frame', 'Accel_x', 'Accel_y', 'Accel_z', 'Gyro_x', 'Gyro_y', 'Gyro_z', 'Compass'],
+                                 dtypes=[np.float64] * 2 + [np.float32] * 7)
+        self.writer = writer
+        self.output_format = get_format(output_format)
+        self.synchronizer = synchronizer
+        if synchronizer is not None:
+            synchronizer.add_source(f'IMU_{label}', [f'IMU_{name}' for name in self.data.columns[2:]], self.data.dtypes[2:])
 
     def callback(self, data):
-        self.data[self.time] = {
-            'gyro': data.gyroscope,
-            'accel': data.accelerometer - carla.Vector3D(x=0,y=0,z=9.81),
-            'compass': data.compass
-        }
-        self.time += self.tick_time
+        gyro = data.gyroscope
+        accel = data.accelerometer - GRAVITY
+        values = (accel.x, accel.y, accel.z, gyro.x, gyro.y, gyro.z, data.compass)
+        self.data.append(data.timestamp, data.frame, *values)
+        if self.synchronizer is not None:
+            self.synchronizer.push(f'IMU_{self.label}', data.frame, data.timestamp, *values)
+        if self.writer is not None:
+            self.writer.feed(self.file_path, self.data)
 
     def start(self, experiment_dir):
         if not os.path.exists(f'{experiment_dir}/IMU_{self.label}'):
             os.makedirs(f'{experiment_dir}/IMU_{self.label}')                
 
+        self.file_path = f'{experiment_dir}/IMU_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            # descarta as duas primeiras leituras
+            self.writer.open(self.file_path, self.data.columns, skip_rows=2,
+                             output_format=self.output_format, dtypes=self.data.dtypes)
+
         if self.sensor is not None:
             self.sensor.listen(lambda event: self.callback(event))
 
@@ -40,96 +62,21 @@ class IMU:
             self.sensor.stop()
 
     def save_data(self, experiment_dir):
-        file_path = f'{experiment_dir}/IMU_{self.label}/data.csv'
-        with open(file_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Time', 'Accel_x', 'Accel_y', 'Accel_z', 'Gyro_x', 'Gyro_y', 'Gyro_z', 'Compass'])
-            cont = 0
-            for time, data in self.data.items():
-                if cont < 2:
-                    cont += 1
-                    continue
-                writer.writerow([time, data['accel'].x, data['accel'].y, data['accel'].z,
-                                 data['gyro'].x, data['gyro'].y, data['gyro'].z,
-                                 data['compass']])
-
-    def plot_data(self, experiment_dir: str):
-        time = []
-        accel_x = []
-        accel_y = []
-        accel_z = []
-        gyro_x = []
-        gyro_y = []
-        gyro_z = []
-        compass = []
-
-        filename = f'{experiment_dir}/IMU_{self.label}/data.csv'
-        with open(filename, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                time.append(float(row['Time']))
-                accel_x.append(float(row['Accel_x']))
-                accel_y.append(float(row['Accel_y']))
-                accel_z.append(float(row['Accel_z']))
-                gyro_x.append(float(row['Gyro_x']))
-                gyro_y.append(float(row['Gyro_y']))
-                gyro_z.append(float(row['Gyro_z']))
-                compass.append(float(row['Compass']))
-
-        # plot acceleration data
-        fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
-
-        axs[0].plot(time, accel_x, label='Accel X', color='red')
-        axs[0].set_ylabel('Acceleration X (m/s²)')
-        axs[0].legend()
-
-        axs[1].plot(time, accel_y, label='Accel Y', color='green')
-        axs[1].set_ylabel('Acceleration Y (m/s²)')
-        axs[1].legend()
-
-        axs[2].plot(time, accel_z, label='Accel Z', color='blue')
-        axs[2].set_xlabel('Time (s)')
-        axs[2].set_ylabel('Acceleration Z (m/s²)')
-        axs[2].legend()
+        file_path = f'{experiment_dir}/IMU_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.close_file(file_path, self.data).wait()
+            return
 
-        fig.suptitle('Acceleration Data over Time')
-        plt.tight_layout()
-        plt.savefig(f'{experiment_dir}/IMU_{self.label}/accel.png')
+        # descarta as duas primeiras leituras
+        self.output_format.write(file_path, self.data.columns, self.data.to_array(start=2), self.data.dtypes)
 
-        # plot gyroscope data
-        fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
-
-        axs[0].plot(time, gyro_x, label='Gyro X', color='red')
-        axs[0].set_ylabel('Angular Velocity X (rad/s)')
-        axs[0].legend()
-
-        axs[1].plot(time, gyro_y, label='Gyro Y', color='green')
-        axs[1].set_ylabel('Angular Velocity Y (rad/s)')
-        axs[1].legend()
-
-        axs[2].plot(time, gyro_z, label='Gyro Z', color='blue')
-        axs[2].set_xlabel('Time (s)')
-        axs[2].set_ylabel('Angular Velocity Z (rad/s)')
-        axs[2].legend()
-
-        fig.suptitle('Gyroscope Data over Time')
-        plt.tight_layout()
-        plt.savefig(f'{experiment_dir}/IMU_{self.label}/gyro.png')
-
-        # plot compass data
-        plt.figure(figsize=(15, 10))
-
-        plt.plot(time, compass, label='Compass', color='purple')
-
-        plt.xlabel('Time (s)')
-        plt.ylabel('Compass (degrees)')
-        plt.legend()
-        plt.title('Compass Data over Time')
-
-        plt.tight_layout()
-        plt.savefig(f'{experiment_dir}/IMU_{self.label}/compass.png')
+    def plot_data(self, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
+        if self.writer is not None:
+            data = self.output_format.read(f'{experiment_dir}/IMU_{self.label}/data.{self.output_format.extension}')
+        else:
+            data = self.data.as_dict(start=2)
+        plot_imu(data, f'{experiment_dir}/IMU_{self.label}', max_points, method)
 
-    
     def destroy(self):
         if self.sensor is not None:
             self.sensor.destroy()
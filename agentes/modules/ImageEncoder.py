@@ -0,0 +1,118 @@
+from PIL import Image
+import threading
+import queue
+import time
+
+class ImageEncoder:
+    """
+    Codifica os quadros das câmeras fora da thread de callback do CARLA.
+
+    O callback só copia o buffer bruto (BGRA) para uma fila limitada; um pool
+    de threads faz a codificação. Quando a fila enche, `policy` decide o que
+    acontece:
+        block: o callback espera por espaço (nenhum quadro é perdido)
+        drop_newest: o quadro que acabou de chegar é descartado
+        drop_oldest: o quadro mais antigo da fila é descartado
+    """
+    POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+    def __init__(self, output_dir, workers=2, max_queue=64, policy='drop_oldest'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de descarte desconhecida: {policy}. Opções: {self.POLICIES}")
+        self.output_dir = output_dir
+        self.policy = policy
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.encoded = 0
+        self.dropped = 0
+        self.failed = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._encode_sum = 0.0
+        self._workers = [threading.Thread(target=self._run, name=f'ImageEncoder-{i}', daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, frame, timestamp, width, height, raw_data):
+        """Enfileira um quadro. Retorna False se ele foi descartado."""
+        item = (frame, timestamp, width, height, raw_data, time.perf_counter())
+        if self.policy == 'block':
+            self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                if self.policy == 'drop_newest':
+                    self._count_drop()
+                    return False
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    self._count_drop()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    self._count_drop()
+                    return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def close(self):
+        """Espera a fila esvaziar e encerra os workers."""
+        self._queue.join()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def stats(self):
+        with self._lock:
+            done = max(self.encoded, 1)
+            return {
+                'queued': self.queued,
+                'encoded': self.encoded,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'pending': self._queue.qsize(),
+                'latency_mean': self._latency_sum / done,
+                'latency_max': self._latency_max,
+                'encode_mean': self._encode_sum / done,
+            }
+
+    def _count_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            frame, timestamp, width, height, raw_data, submitted = item
+            start = time.perf_counter()
+            try:
+                self.encode(frame, timestamp, width, height, raw_data)
+            except Exception as e:
+                print(f"Erro ao codificar o quadro {frame}: {e}")
+                with self._lock:
+                    self.failed += 1
+            else:
+                end = time.perf_counter()
+                with self._lock:
+                    self.encoded += 1
+                    self._encode_sum += end - start
+                    self._latency_sum += end - submitted
+                    self._latency_max = max(self._latency_max, end - submitted)
+            finally:
+                self._queue.task_done()
+
+    def encode(self, frame, timestamp, width, height, raw_data):
+        image = Image.frombuffer('RGBA', (width, height), raw_data, 'raw', 'BGRA', 0, 1)
+        image.save(f"{self.output_dir}/image_{frame}.png")
@@ -0,0 +1,209 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+import threading
+import json
+
+from modules.SampleBuffer import SampleBuffer
+
+class LiveDashboard:
+    """
+    Página local com os dados dos sensores durante a simulação.
+
+    Uma thread lê os SampleBuffers registrados a cada `refresh` segundos
+    (só as amostras novas, via `SampleBuffer.read`) e guarda as últimas
+    `history` amostras de cada série. Um servidor HTTP em 127.0.0.1 entrega a
+    página e, em /data?since=N, apenas as amostras que o navegador ainda não
+    tem. Nada disso roda na thread da simulação: o laço de ticks não espera
+    pelo painel, e o custo no laço é zero.
+    """
+    port: int
+    refresh: float
+    history: int
+
+    def __init__(self, port=8050, refresh=0.5, history=600, host='127.0.0.1'):
+        self.host = host
+        self.port = port
+        self.refresh = refresh
+        self.history = history
+        self._series = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    def add(self, name, buffer: SampleBuffer, columns, time_column='Time'):
+        """Mostra as colunas `columns` de `buffer` em um gráfico chamado `name`."""
+        index = [buffer.columns.index(time_column)] + [buffer.columns.index(c) for c in columns]
+        self._series[name] = {
+            'buffer': buffer,
+            'columns': list(columns),
+            'index': index,
+            'reader': buffer.add_reader(),
+            'rows': deque(maxlen=self.history),
+        }
+
+    def start(self):
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/':
+                    body, content_type = PAGE.replace('__REFRESH__', str(int(dashboard.refresh * 1000))).encode(), 'text/html'
+                elif url.path == '/data':
+                    since = int(parse_qs(url.query).get('since', ['-1'])[0])
+                    body, content_type = json.dumps(dashboard.snapshot(since)).encode(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            # o painel é opcional: a captura continua sem ele
+            print(f"Aviso: painel ao vivo desativado, não foi possível usar a porta {self.port}: {e}")
+            self._release_readers()
+            return False
+        self._server.daemon_threads = True
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name='LiveDashboard-http', daemon=True),
+            threading.Thread(target=self._collect, name='LiveDashboard-collect', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"Painel ao vivo em http://{self.host}:{self.port}")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._release_readers()
+
+    def _release_readers(self):
+        for series in self._series.values():
+            series['buffer'].remove_reader(series['reader'])
+
+    def _collect(self):
+        while not self._stop.wait(self.refresh):
+            self.poll()
+
+    def poll(self):
+        """Lê as amostras novas de todos os buffers registrados."""
+        for series in self._series.values():
+            data = series['buffer'].read(series['reader'])
+            if data.shape[1] == 0:
+                continue
+            rows = data[series['index']].T[-self.history:].tolist()
+            with self._lock:
+                for row in rows:
+                    self._seq += 1
+                    series['rows'].append((self._seq, row))
+
+    def snapshot(self, since=-1):
+        """{série: {'columns': [...], 'rows': [[Time, ...], ...]}} com as amostras de número > since."""
+        with self._lock:
+            result = {'seq': self._seq, 'history': self.history, 'series': {}}
+            for name, series in self._series.items():
+                rows = [row for seq, row in series['rows'] if seq > since]
+                # NaN não existe em JSON
+                rows = [[None if value != value else value for value in row] for row in rows]
+                result['series'][name] = {'columns': series['columns'], 'rows': rows}
+        return result
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>CARLA - painel ao vivo</title>
+<style>
+  body { font-family: sans-serif; margin: 16px; background: #fafafa; }
+  .chart { display: inline-block; margin: 8px; background: white; border: 1px solid #ddd; padding: 8px; }
+  .chart h3 { margin: 0 0 4px 0; font-size: 14px; }
+  .legend span { margin-right: 12px; font-size: 12px; }
+</style>
+</head>
+<body>
+<h2>Painel ao vivo</h2>
+<div id="status">aguardando dados...</div>
+<div id="charts"></div>
+<script>
+const REFRESH = __REFRESH__;
+const COLORS = ['#d62728', '#2ca02c', '#1f77b4', '#9467bd', '#ff7f0e', '#8c564b'];
+const series = {};
+let seq = -1;
+
+function chart(name, columns) {
+  const div = document.createElement('div');
+  div.className = 'chart';
+  div.innerHTML = '<h3>' + name + '</h3><canvas width="520" height="200"></canvas><div class="legend">' +
+    columns.map((c, i) => '<span style="color:' + COLORS[i % COLORS.length] + '">' + c + '</span>').join('') + '</div>';
+  document.getElementById('charts').appendChild(div);
+  return {canvas: div.querySelector('canvas'), columns: columns, rows: []};
+}
+
+function draw(s) {
+  const ctx = s.canvas.getContext('2d'), w = s.canvas.width, h = s.canvas.height;
+  ctx.clearRect(0, 0, w, h);
+  if (s.rows.length < 2) return;
+  const t0 = s.rows[0][0], t1 = s.rows[s.rows.length - 1][0];
+  let lo = Infinity, hi = -Infinity;
+  for (const r of s.rows) for (let i = 1; i < r.length; i++) if (r[i] !== null) { lo = Math.min(lo, r[i]); hi = Math.max(hi, r[i]); }
+  if (hi === lo) { hi += 1; lo -= 1; }
+  ctx.fillStyle = '#666'; ctx.font = '10px sans-serif';
+  ctx.fillText(hi.toFixed(2), 2, 10); ctx.fillText(lo.toFixed(2), 2, h - 2);
+  ctx.fillText(t1.toFixed(1) + ' s', w - 50, h - 2);
+  for (let c = 1; c <= s.columns.length; c++) {
+    ctx.strokeStyle = COLORS[(c - 1) % COLORS.length];
+    ctx.beginPath();
+    let pen = false;
+    for (const r of s.rows) {
+      if (r[c] === null) { pen = false; continue; }
+      const x = (r[0] - t0) / Math.max(t1 - t0, 1e-9) * (w - 10) + 5;
+      const y = h - 5 - (r[c] - lo) / (hi - lo) * (h - 20);
+      if (pen) ctx.lineTo(x, y); else ctx.moveTo(x, y);
+      pen = true;
+    }
+    ctx.stroke();
+  }
+}
+
+async function update() {
+  try {
+    const response = await fetch('/data?since=' + seq);
+    const data = await response.json();
+    seq = data.seq;
+    for (const [name, d] of Object.entries(data.series)) {
+      if (!series[name]) series[name] = chart(name, d.columns);
+      const s = series[name];
+      s.rows.push(...d.rows);
+      if (s.rows.length > data.history) s.rows.splice(0, s.rows.length - data.history);
+      draw(s);
+    }
+    document.getElementById('status').textContent = 'atualizado ' + new Date().toLocaleTimeString();
+  } catch (e) {
+    document.getElementById('status').textContent = 'sem conexão com a simulação';
+  }
+  setTimeout(update, REFRESH);
+}
+update();
+</script>
+</body>
+</html>
+"""
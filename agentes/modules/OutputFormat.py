@@ -0,0 +1,115 @@
+import numpy as np
+import csv
+
+class CsvFormat:
+    """Formato original: texto, uma linha por amostra."""
+    name = 'csv'
+    extension = 'csv'
+
+    def write(self, file_path, columns, data, dtypes=None):
+        with open(file_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(columns)
+            writer.writerows(data.T.tolist())
+
+    def open_stream(self, file_path, columns, dtypes=None):
+        return CsvStream(file_path, columns)
+
+    def read(self, file_path):
+        with open(file_path, 'r') as file:
+            columns = next(csv.reader(file))
+            data = np.loadtxt(file, delimiter=',', ndmin=2)
+        if data.size == 0:
+            return {name: np.empty(0) for name in columns}
+        return {name: data[:, i] for i, name in enumerate(columns)}
+
+
+class CsvStream:
+    def __init__(self, file_path, columns):
+        self.file = open(file_path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, data):
+        self.writer.writerows(data.T.tolist())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetFormat:
+    """
+    Colunas tipadas (float32/float64) e comprimidas com Apache Arrow.
+
+    Requer o pacote `pyarrow`. Cada lote do modo streaming vira um row group,
+    mas o rodapé do arquivo só é gravado em `close()`: se a simulação for
+    interrompida no meio, o arquivo inteiro fica ilegível. Para gravações que
+    precisam sobreviver a uma queda, use o CSV (padrão), em que cada lote
+    gravado já pode ser lido.
+    """
+    name = 'parquet'
+    extension = 'parquet'
+
+    def __init__(self, compression='zstd'):
+        self.compression = compression
+
+    def write(self, file_path, columns, data, dtypes=None):
+        _, pq = _import_arrow()
+        pq.write_table(self._table(columns, data, dtypes), file_path, compression=self.compression)
+
+    def open_stream(self, file_path, columns, dtypes=None):
+        return ParquetStream(self, file_path, columns, dtypes)
+
+    def read(self, file_path):
+        _, pq = _import_arrow()
+        table = pq.read_table(file_path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def _schema(self, columns, dtypes):
+        pa, _ = _import_arrow()
+        dtypes = dtypes or [np.float64] * len(columns)
+        return pa.schema([(name, pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in zip(columns, dtypes)])
+
+    def _table(self, columns, data, dtypes, schema=None):
+        pa, _ = _import_arrow()
+        schema = schema or self._schema(columns, dtypes)
+        arrays = [pa.array(data[i].astype(field.type.to_pandas_dtype(), copy=False)) for i, field in enumerate(schema)]
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class ParquetStream:
+    def __init__(self, fmt, file_path, columns, dtypes):
+        _, pq = _import_arrow()
+        self.fmt = fmt
+        self.columns = columns
+        self.schema = fmt._schema(columns, dtypes)
+        self.writer = pq.ParquetWriter(file_path, self.schema, compression=fmt.compression)
+
+    def write(self, data):
+        self.writer.write_table(self.fmt._table(self.columns, data, None, self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+FORMATS = {
+    'csv': CsvFormat,
+    'parquet': ParquetFormat,
+}
+
+def get_format(output_format):
+    """Aceita o nome de um formato ('csv', 'parquet') ou uma instância já configurada."""
+    if isinstance(output_format, str):
+        if output_format not in FORMATS:
+            raise ValueError(f"Formato de saída desconhecido: {output_format}. Opções: {list(FORMATS)}")
+        return FORMATS[output_format]()
+    return output_format
+
+def _import_arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("O formato 'parquet' requer o pacote pyarrow (pip install pyarrow)") from e
+    return pa, pq
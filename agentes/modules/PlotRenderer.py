@@ -0,0 +1,230 @@
+"""
+Etapa de pós-processamento que gera os gráficos dos sensores.
+
+As funções plot_* recebem os dados já carregados ({coluna: np.ndarray}) e a
+pasta de saída, e sempre fecham as figuras que abrem. `render_experiment`
+gera os gráficos de todos os sensores de um experimento em um pool de
+processos com o backend Agg (sem janela), um arquivo de dados por tarefa.
+
+Uso direto: python -m modules.PlotRenderer data/exp_<timestamp>
+"""
+
+import matplotlib
+import matplotlib.pyplot as plt
+import multiprocessing
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modules.Experiment import find_sensor_files, load_sensor
+from modules.Decimation import decimate, decimate_indices
+
+PLOTTED_SENSORS = ('IMU', 'GNSS', 'Position', 'Velocity')
+MAX_POINTS = 4000 # pontos por série depois da decimação (None desativa)
+DECIMATION = 'minmax' # minmax (preserva picos) ou lttb
+
+def plot_imu(data, output_dir, max_points=MAX_POINTS, method=DECIMATION):
+    time = data['Time']
+
+    def series(name):
+        return decimate(time, data[name], max_points, method)
+
+    # plot acceleration data
+    fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
+    try:
+        axs[0].plot(*series('Accel_x'), label='Accel X', color='red')
+        axs[0].set_ylabel('Acceleration X (m/s²)')
+        axs[0].legend()
+
+        axs[1].plot(*series('Accel_y'), label='Accel Y', color='green')
+        axs[1].set_ylabel('Acceleration Y (m/s²)')
+        axs[1].legend()
+
+        axs[2].plot(*series('Accel_z'), label='Accel Z', color='blue')
+        axs[2].set_xlabel('Time (s)')
+        axs[2].set_ylabel('Acceleration Z (m/s²)')
+        axs[2].legend()
+
+        fig.suptitle('Acceleration Data over Time')
+        fig.tight_layout()
+        fig.savefig(f'{output_dir}/accel.png')
+    finally:
+        plt.close(fig)
+
+    # plot gyroscope data
+    fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
+    try:
+        axs[0].plot(*series('Gyro_x'), label='Gyro X', color='red')
+        axs[0].set_ylabel('Angular Velocity X (rad/s)')
+        axs[0].legend()
+
+        axs[1].plot(*series('Gyro_y'), label='Gyro Y', color='green')
+        axs[1].set_ylabel('Angular Velocity Y (rad/s)')
+        axs[1].legend()
+
+        axs[2].plot(*series('Gyro_z'), label='Gyro Z', color='blue')
+        axs[2].set_xlabel('Time (s)')
+        axs[2].set_ylabel('Angular Velocity Z (rad/s)')
+        axs[2].legend()
+
+        fig.suptitle('Gyroscope Data over Time')
+        fig.tight_layout()
+        fig.savefig(f'{output_dir}/gyro.png')
+    finally:
+        plt.close(fig)
+
+    # plot compass data
+    fig, ax = plt.subplots(figsize=(15, 10))
+    try:
+        ax.plot(*series('Compass'), label='Compass', color='purple')
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Compass (degrees)')
+        ax.legend()
+        ax.set_title('Compass Data over Time')
+
+        fig.tight_layout()
+        fig.savefig(f'{output_dir}/compass.png')
+    finally:
+        plt.close(fig)
+
+def plot_gnss(data, output_dir, max_points=MAX_POINTS, method=DECIMATION):
+    time = data['Time']
+
+    def series(name):
+        return decimate(time, data[name], max_points, method)
+
+    fig, axs = plt.subplots(3, 1, figsize=(10, 6))
+    try:
+        axs[0].plot(*series('Latitude'), label='Latitude')
+        axs[0].set_title('GNSS Data')
+        axs[0].set_ylabel('Latitude (°)')
+        axs[0].grid()
+
+        axs[1].plot(*series('Longitude'), label='Longitude', color='orange')
+        axs[1].set_ylabel('Longitude (°)')
+        axs[1].grid()
+
+        axs[2].plot(*series('Altitude'), label='Altitude', color='green')
+        axs[2].set_xlabel('Time (s)')
+        axs[2].set_ylabel('Altitude (m)')
+        axs[2].grid()
+
+        fig.tight_layout()
+        fig.savefig(f'{output_dir}/plot.png')
+    finally:
+        plt.close(fig)
+
+def plot_position(data, output_dir, mid_point=None, max_points=MAX_POINTS, method=DECIMATION):
+    """:param mid_point: (x, y) do ponto intermediário da rota, se houver"""
+    # os mesmos índices para X, Y, Z e tempo: a trajetória mantém os extremos de X e de Y
+    index = decimate_indices(data['Time'], [data['X'], data['Y'], data['Z']], max_points, method)
+    time = data['Time'][index]
+    gps_x, gps_y, gps_z = data['X'][index], data['Y'][index], data['Z'][index]
+
+    fig, axs = plt.subplots(2, 1, figsize=(15, 15))
+    try:
+        # Gráfico de coordenadas GPS ao longo do tempo
+        axs[0].plot(time, gps_x, label='Position X', color='blue')
+        axs[0].plot(time, gps_y, label='Position Y', color='orange')
+        axs[0].plot(time, gps_z, label='Position Z', color='green')
+        axs[0].set_ylabel('Position Coordinates (m)')
+        axs[0].legend()
+
+        # Gráfico de trajetória GPS com gradiente de cores
+        sc = axs[1].scatter(gps_x, gps_y, c=time, cmap='viridis', s=10, label='Trajectory')
+        if len(time) > 0:
+            axs[1].scatter(gps_x[0], gps_y[0], label='Start', color='green', s=100)
+            axs[1].scatter(gps_x[-1], gps_y[-1], label='End', color='orange', s=100)
+        if mid_point is not None:
+            axs[1].scatter(mid_point[0], mid_point[1], label='Mid Point', color='red', s=100)
+        axs[1].set_xlabel('Position X (m)')
+        axs[1].set_ylabel('Position Y (m)')
+        axs[1].legend()
+        fig.colorbar(sc, ax=axs[1], label='Time (s)')
+
+        fig.suptitle('Position Data over Time and Trajectory')
+        fig.tight_layout()
+        fig.savefig(f'{output_dir}/Position.png')
+    finally:
+        plt.close(fig)
+
+def plot_velocity(data, output_dir, label='', max_points=MAX_POINTS, method=DECIMATION):
+    times = data['Time']
+
+    def series(name):
+        return decimate(times, data[name], max_points, method)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        ax.plot(*series('X'), label='X Velocity', color='r')
+        ax.plot(*series('Y'), label='Y Velocity', color='g')
+        ax.plot(*series('Z'), label='Z Velocity', color='b')
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Velocity (m/s)')
+        ax.set_title(f'Velocity Data for {label}')
+        ax.legend()
+        ax.grid(True)
+
+        fig.savefig(f'{output_dir}/plot.png')
+    finally:
+        plt.close(fig)
+
+
+def plot_sensor_file(file_path, mid_point=None, max_points=MAX_POINTS, method=DECIMATION):
+    """Gera os gráficos de um arquivo de dados, escolhendo a função pelo nome da pasta (IMU_, GNSS_...)."""
+    output_dir = os.path.dirname(file_path)
+    sensor, _, label = os.path.basename(output_dir).partition('_')
+    if sensor not in PLOTTED_SENSORS:
+        return False
+
+    data = load_sensor(file_path)
+    if sensor == 'IMU':
+        plot_imu(data, output_dir, max_points, method)
+    elif sensor == 'GNSS':
+        plot_gnss(data, output_dir, max_points, method)
+    elif sensor == 'Position':
+        plot_position(data, output_dir, mid_point, max_points, method)
+    else:
+        plot_velocity(data, output_dir, label, max_points, method)
+    return True
+
+def _init_worker():
+    matplotlib.use('Agg')
+
+def render_experiment(experiment_dir, mid_point=None, workers=None, max_points=MAX_POINTS, method=DECIMATION):
+    """
+    Gera os gráficos de todos os sensores de um experimento em paralelo.
+
+    :param experiment_dir: pasta data/exp_<timestamp>
+    :param mid_point: (x, y) marcado nos gráficos de posição
+    :param workers: número de processos (padrão: um por núcleo)
+    :param max_points: pontos por série depois da decimação (None desativa)
+    :param method: minmax ou lttb (ver modules/Decimation.py)
+    :return: número de arquivos de dados com gráficos gerados
+    """
+    files = [(key, file_path) for key, file_path in sorted(find_sensor_files(experiment_dir).items())
+             if key.rsplit('/', 1)[-1].partition('_')[0] in PLOTTED_SENSORS]
+    if not files:
+        return 0
+
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    rendered = 0
+    # spawn: o processo principal tem as threads do cliente CARLA, que não sobrevivem a um fork
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = {pool.submit(plot_sensor_file, file_path, mid_point, max_points, method): key for key, file_path in files}
+        for future in as_completed(futures):
+            try:
+                rendered += future.result()
+            except Exception as e:
+                print(f"Erro ao gerar os gráficos de {futures[future]}: {e}")
+    return rendered
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python -m modules.PlotRenderer <pasta do experimento> [workers]")
+        sys.exit(1)
+    rendered = render_experiment(sys.argv[1], workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"Gráficos gerados para {rendered} sensores.")
@@ -1,82 +1,87 @@
-import matplotlib.pyplot as plt
 import carla
-import csv
+import numpy as np
 import os
 
+from modules.SampleBuffer import SampleBuffer
+from modules.StreamWriter import StreamWriter
+from modules.OutputFormat import get_format
+from modules.PlotRenderer import plot_position, MAX_POINTS, DECIMATION
+from modules.WorldStateSampler import WorldStateSampler
+from modules.FrameSynchronizer import FrameSynchronizer
+
 class PositionModule:
     label: str
     attached_ob: carla.Actor
-    data: dict
-    time: float
+    data: SampleBuffer
     tick_time: float
+    writer: StreamWriter
+    sampler: WorldStateSampler
+    synchronizer: FrameSynchronizer
 
-    def __init__(self, label, obj, thick_time):
+    def __init__(self, label, obj, thick_time, writer=None, output_format='csv', sampler=None, synchronizer=None):
         
         self.attached_ob = obj
         self.label = label
         self.tick_time = thick_time
-        self.data = {}
-        self.time = 0.0
+        self._time = 0.0
+        self.data = SampleBuffer(['Time', 'Frame', 'X', 'Y', 'Z'],
+                                 dtypes=[np.float64] * 5)
+        self.writer = writer
+        self.output_format = get_format(output_format)
+        self.synchronizer = synchronizer
+        if synchronizer is not None:
+            synchronizer.add_source(f'Position_{label}', [f'Position_{name}' for name in self.data.columns[2:]], self.data.dtypes[2:])
+        self.sampler = sampler
+        if sampler is not None:
+            # os dados passam a chegar por record() a cada sampler.tick()
+            sampler.subscribe(self, obj, 'location')
 
     def start(self, experiment_dir):
-         if not os.path.exists(f'{experiment_dir}/Position_{self.label}'):
-            os.makedirs(f'{experiment_dir}/Position_{self.label}')                
+        if not os.path.exists(f'{experiment_dir}/Position_{self.label}'):
+            os.makedirs(f'{experiment_dir}/Position_{self.label}')
+
+        self.file_path = f'{experiment_dir}/Position_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.open(self.file_path, self.data.columns,
+                             output_format=self.output_format, dtypes=self.data.dtypes)
 
-    def tick(self):
+    def tick(self, frame=None, timestamp=None):
+        """
+        Sem sampler: lê o dado do ator. `frame` e `timestamp` vêm de quem chama
+        (ex.: o snapshot que ele já tem); sem eles a linha usa o tempo acumulado
+        em passos de tick_time e Frame NaN, sem outra chamada ao servidor.
+        """
+        if self.sampler is not None:
+            return
         try:
             current_data = self.attached_ob.get_location()
-            self.data[self.time] = {
-                'x': current_data.x,
-                'y': current_data.y,
-                'z': current_data.z
-            }
-            # print(f"Position data at time {self.time}: x {current_data.x}, y {current_data.y}, z {current_data.z}") 
-            self.time += self.tick_time
+            if timestamp is None:
+                timestamp = self._time
+                self._time += self.tick_time
+            self.record(float('nan') if frame is None else frame, timestamp,
+                        current_data.x, current_data.y, current_data.z)
         except Exception as e:
             print(f"Error getting Position data: {e}")
 
-    def save_data(self, experiment_dir):
-        file_path = f'{experiment_dir}/Position_{self.label}/data.csv'
-        with open(file_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Time', 'X', 'Y', 'Z'])
-            for time, data in self.data.items():
-                writer.writerow([time, data['x'], data['y'], data['z']])
-
-    def plot_data(self, experiment_dir, mid_point):
-        time = []
-        gps_x = []
-        gps_y = []
-        gps_z = []
-        filename = f'{experiment_dir}/Position_{self.label}/data.csv'
-        with open(filename, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                time.append(float(row['Time']))
-                gps_x.append(float(row['X']))
-                gps_y.append(float(row['Y']))
-                gps_z.append(float(row['Z']))
+    def record(self, frame, timestamp, x, y, z):
+        self.data.append(timestamp, frame, x, y, z)
+        if self.synchronizer is not None and not np.isnan(frame):
+            self.synchronizer.push(f'Position_{self.label}', frame, timestamp, x, y, z)
+        if self.writer is not None:
+            self.writer.feed(self.file_path, self.data)
 
-        fig, axs = plt.subplots(2, 1, figsize=(15, 15))
-
-        # Gráfico de coordenadas GPS ao longo do tempo
-        axs[0].plot(time, gps_x, label='Position X', color='blue')
-        axs[0].plot(time, gps_y, label='Position Y', color='orange')
-        axs[0].plot(time, gps_z, label='Position Z', color='green')
-        axs[0].set_ylabel('Position Coordinates (m)')
-        axs[0].legend()
-
-        # Gráfico de trajetória GPS com gradiente de cores
-        sc = axs[1].scatter(gps_x, gps_y, c=time, cmap='viridis', s=10, label='Trajectory')
-        axs[1].scatter(gps_x[0], gps_y[0], label='Start', color='green', s=100)
-        axs[1].scatter(gps_x[-1], gps_y[-1], label='End', color='orange', s=100)
-        axs[1].scatter(mid_point.x, mid_point.y, label='Mid Point', color='red', s=100)
-        axs[1].set_xlabel('Position X (m)')
-        axs[1].set_ylabel('Position Y (m)')
-        axs[1].legend()
-        fig.colorbar(sc, ax=axs[1], label='Time (s)')
+    def save_data(self, experiment_dir):
+        file_path = f'{experiment_dir}/Position_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.close_file(file_path, self.data).wait()
+            return
 
-        fig.suptitle('Position Data over Time and Trajectory')
-        plt.tight_layout()
-        plt.savefig(f'{experiment_dir}/Position_{self.label}/Position.png')
+        self.output_format.write(file_path, self.data.columns, self.data.to_array(), self.data.dtypes)
 
+    def plot_data(self, experiment_dir, mid_point=None, max_points=MAX_POINTS, method=DECIMATION):
+        if self.writer is not None:
+            data = self.output_format.read(f'{experiment_dir}/Position_{self.label}/data.{self.output_format.extension}')
+        else:
+            data = self.data.as_dict()
+        plot_position(data, f'{experiment_dir}/Position_{self.label}',
+                      (mid_point.x, mid_point.y) if mid_point is not None else None, max_points, method)
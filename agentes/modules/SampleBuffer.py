@@ -0,0 +1,131 @@
+import numpy as np
+import threading
+
+class SampleBuffer:
+    """
+    Armazena amostras de sensores em colunas NumPy pré-alocadas.
+
+    Cada bloco tem `chunk_size` linhas; quando o bloco atual enche, um novo
+    é alocado e os anteriores nunca são copiados. Uma amostra ocupa
+    `len(columns) * 8` bytes, em vez de um dicionário com objetos carla.
+    """
+    columns: list
+    dtypes: list
+    chunk_size: int
+
+    def __init__(self, columns, chunk_size=4096, dtype=np.float64, dtypes=None):
+        self.columns = list(columns)
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        # tipos usados ao gravar cada coluna em formatos tipados (ex.: parquet)
+        self.dtypes = list(dtypes) if dtypes is not None else [dtype] * len(self.columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._chunks = []
+        self._chunk = None
+        self._pos = 0
+        self._size = 0
+        # amostras já adicionadas desde a criação (não volta a zero em take/clear)
+        self.total = 0
+        # leitores periódicos (ex.: LiveDashboard): cursor de cada um e os lotes
+        # retirados por `take` que algum deles ainda não leu
+        self._readers = {}
+        self._next_reader = 0
+        self._taken = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        with self._lock:
+            self._append(values)
+
+    def _append(self, values):
+        if self._chunk is None or self._pos == self.chunk_size:
+            self._chunk = np.empty((len(self.columns), self.chunk_size), dtype=self.dtype)
+            self._chunks.append(self._chunk)
+            self._pos = 0
+        self._chunk[:, self._pos] = values
+        self._pos += 1
+        self._size += 1
+        self.total += 1
+
+    def to_array(self, start=0):
+        """Retorna uma matriz (colunas x amostras) a partir da amostra `start`."""
+        if self._size == 0:
+            return np.empty((len(self.columns), 0), dtype=self.dtype)
+        blocks = self._chunks[:-1] + [self._chunk[:, :self._pos]]
+        if len(blocks) == 1:
+            return blocks[0][:, start:]
+        return np.concatenate(blocks, axis=1)[:, start:]
+
+    def column(self, name, start=0):
+        return self.to_array(start)[self._index[name]]
+
+    def as_dict(self, start=0):
+        data = self.to_array(start)
+        return {name: data[i] for i, name in enumerate(self.columns)}
+
+    def add_reader(self):
+        """Registra um leitor que recebe, por `read`, as amostras adicionadas a partir de agora."""
+        with self._lock:
+            reader = self._next_reader
+            self._next_reader += 1
+            self._readers[reader] = self.total
+            return reader
+
+    def remove_reader(self, reader):
+        with self._lock:
+            self._readers.pop(reader, None)
+            if not self._readers:
+                self._taken = []
+
+    def read(self, reader):
+        """
+        Amostras adicionadas desde a última leitura de `reader` (matriz colunas x amostras).
+
+        Inclui os lotes retirados por `take` nesse meio-tempo, então um leitor
+        periódico não perde as amostras que o StreamWriter levou entre duas
+        leituras, mesmo que ele tenha levado vários lotes.
+        """
+        with self._lock:
+            cursor, total, size = self._readers[reader], self.total, self._size
+            parts = []
+            for data, end in self._taken:
+                if cursor < end:
+                    parts.append(data[:, max(cursor - (end - data.shape[1]), 0):])
+            start = total - size
+            if cursor < total and size > 0:
+                parts.append(self.to_array(max(cursor - start, 0)))
+            self._readers[reader] = total
+            # lotes que todos os leitores já leram
+            oldest = min(self._readers.values())
+            self._taken = [(data, end) for data, end in self._taken if end > oldest]
+            # cópia ainda com a trava: o bloco atual é reaproveitado depois de um take
+            if not parts:
+                return np.empty((len(self.columns), 0), dtype=self.dtype)
+            return parts[0].copy() if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+    def take(self):
+        """Retorna uma cópia das amostras pendentes e esvazia o buffer, reaproveitando o primeiro bloco."""
+        with self._lock:
+            data = self.to_array().copy()
+            if self._readers:
+                self._taken.append((data, self.total))
+            self._reset()
+        return data
+
+    def _reset(self):
+        if self._chunks:
+            self._chunks = self._chunks[:1]
+            self._chunk = self._chunks[0]
+        self._pos = 0
+        self._size = 0
+
+    def clear(self):
+        with self._lock:
+            self._taken = []
+            self._chunks = []
+            self._chunk = None
+            self._pos = 0
+            self._size = 0
@@ -0,0 +1,124 @@
+import threading
+import queue
+import time
+
+from modules.OutputFormat import CsvFormat
+
+class StreamWriter:
+    """
+    Grava os dados dos sensores durante a simulação.
+
+    Os sensores entregam lotes de amostras (retirados do SampleBuffer) e uma
+    única thread em segundo plano anexa esses lotes aos arquivos de saída.
+    Um lote é enviado quando o buffer atinge `batch_size` amostras ou quando
+    `flush_interval` segundos se passaram desde o último envio, de modo que a
+    memória fica limitada e uma queda perde no máximo um intervalo de dados.
+
+    A fila de lotes tem no máximo `max_queue` itens. Quando o disco não
+    acompanha e a fila enche, `policy` decide o que acontece com um novo lote:
+        block: o sensor espera por espaço (nenhuma amostra é perdida)
+        drop_newest: o lote é descartado e contado em `dropped` (amostras)
+    Abrir e fechar arquivos sempre espera por espaço. Depois de `close()`,
+    `feed` e `close_file` não fazem nada (um callback tardio não trava).
+    """
+    POLICIES = ('block', 'drop_newest')
+    flush_interval: float
+    batch_size: int
+
+    def __init__(self, flush_interval=1.0, batch_size=512, max_queue=64, policy='block'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de descarte desconhecida: {policy}. Opções: {self.POLICIES}")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.policy = policy
+        self.dropped = 0
+        self._closed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._last_flush = {}
+        self._files = {}
+        self._thread = threading.Thread(target=self._run, name='StreamWriter', daemon=True)
+        self._thread.start()
+
+    def open(self, file_path, columns, skip_rows=0, output_format=None, dtypes=None):
+        """Cria o arquivo com o cabeçalho; as primeiras `skip_rows` amostras são descartadas."""
+        output_format = output_format or CsvFormat()
+        self._last_flush[file_path] = time.monotonic()
+        self._queue.put(('open', file_path, (output_format, list(columns), dtypes, skip_rows)))
+
+    def feed(self, file_path, buffer):
+        """Chamado pelo sensor após cada amostra; envia o buffer se o lote estiver pronto."""
+        if self._closed:
+            return
+        now = time.monotonic()
+        if len(buffer) >= self.batch_size or now - self._last_flush[file_path] >= self.flush_interval:
+            self._last_flush[file_path] = now
+            if len(buffer) > 0:
+                self._put_batch(file_path, buffer.take())
+
+    def close_file(self, file_path, buffer=None):
+        """Envia o restante do buffer e fecha o arquivo. Retorna um Event sinalizado ao terminar."""
+        done = threading.Event()
+        if self._closed:
+            done.set()
+            return done
+        if buffer is not None and len(buffer) > 0:
+            self._queue.put(('write', file_path, buffer.take()))
+        self._queue.put(('close', file_path, done))
+        return done
+
+    def _put_batch(self, file_path, data):
+        item = ('write', file_path, data)
+        if self.policy == 'block':
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += data.shape[1]
+
+    def close(self):
+        """Esvazia a fila, fecha os arquivos restantes e encerra a thread."""
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            op, file_path, payload = item
+            try:
+                if op == 'open':
+                    self._open(file_path, *payload)
+                elif op == 'write':
+                    self._write(file_path, payload)
+                elif op == 'close':
+                    self._close(file_path)
+                    payload.set()
+            except Exception as e:
+                print(f"Erro ao gravar {file_path}: {e}")
+                if op == 'close':
+                    payload.set()
+
+        for file_path in list(self._files):
+            self._close(file_path)
+
+    def _open(self, file_path, output_format, columns, dtypes, skip_rows):
+        self._files[file_path] = [output_format.open_stream(file_path, columns, dtypes), skip_rows]
+
+    def _write(self, file_path, data):
+        entry = self._files[file_path]
+        stream, skip_rows = entry
+        if skip_rows > 0:
+            entry[1] = max(0, skip_rows - data.shape[1])
+            data = data[:, skip_rows:]
+        if data.shape[1] > 0:
+            stream.write(data)
+
+    def _close(self, file_path):
+        entry = self._files.pop(file_path, None)
+        if entry is not None:
+            entry[0].close()
+
@@ -1,62 +1,86 @@
-import matplotlib.pyplot as plt
 import carla
-import csv
+import numpy as np
 import os
 
+from modules.SampleBuffer import SampleBuffer
+from modules.StreamWriter import StreamWriter
+from modules.OutputFormat import get_format
+from modules.PlotRenderer import plot_velocity, MAX_POINTS, DECIMATION
+from modules.WorldStateSampler import WorldStateSampler
+from modules.FrameSynchronizer import FrameSynchronizer
+
 class VelocityModule:
     label: str
     attached_ob: carla.Actor
-    data: dict
-    time: float
+    data: SampleBuffer
     tick_time: float
+    writer: StreamWriter
+    sampler: WorldStateSampler
+    synchronizer: FrameSynchronizer
     
-    def __init__(self, label, obj, thick_time):
+    def __init__(self, label, obj, thick_time, writer=None, output_format='csv', sampler=None, synchronizer=None):
         
         self.attached_ob = obj
         self.label = label
         self.tick_time = thick_time
-        self.data = {}
-        self.time = 0.0
+        self._time = 0.0
+        self.data = SampleBuffer(['Time', 'Frame', 'X', 'Y', 'Z'],
+                                 dtypes=[np.float64] * 2 + [np.float32] * 3)
+        self.writer = writer
+        self.output_format = get_format(output_format)
+        self.synchronizer = synchronizer
+        if synchronizer is not None:
+            synchronizer.add_source(f'Velocity_{label}', [f'Velocity_{name}' for name in self.data.columns[2:]], self.data.dtypes[2:])
+        self.sampler = sampler
+        if sampler is not None:
+            # os dados passam a chegar por record() a cada sampler.tick()
+            sampler.subscribe(self, obj, 'velocity')
 
     def start(self, experiment_dir):
         if not os.path.exists(f'{experiment_dir}/Velocity_{self.label}'):
             os.makedirs(f'{experiment_dir}/Velocity_{self.label}')
 
-    def tick(self):
+        self.file_path = f'{experiment_dir}/Velocity_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.open(self.file_path, self.data.columns,
+                             output_format=self.output_format, dtypes=self.data.dtypes)
+
+    def tick(self, frame=None, timestamp=None):
+        """
+        Sem sampler: lê o dado do ator. `frame` e `timestamp` vêm de quem chama
+        (ex.: o snapshot que ele já tem); sem eles a linha usa o tempo acumulado
+        em passos de tick_time e Frame NaN, sem outra chamada ao servidor.
+        """
+        if self.sampler is not None:
+            return
         try:
             current_data = self.attached_ob.get_velocity()
-            self.data[self.time] = {
-                'x': current_data.x,
-                'y': current_data.y,
-                'z': current_data.z
-            }
-            self.time += self.tick_time
+            if timestamp is None:
+                timestamp = self._time
+                self._time += self.tick_time
+            self.record(float('nan') if frame is None else frame, timestamp,
+                        current_data.x, current_data.y, current_data.z)
         except Exception as e:
             print(f"Error getting Velocity data: {e}")
 
+    def record(self, frame, timestamp, x, y, z):
+        self.data.append(timestamp, frame, x, y, z)
+        if self.synchronizer is not None and not np.isnan(frame):
+            self.synchronizer.push(f'Velocity_{self.label}', frame, timestamp, x, y, z)
+        if self.writer is not None:
+            self.writer.feed(self.file_path, self.data)
+
     def save_data(self, experiment_dir):
-        file_path = f'{experiment_dir}/Velocity_{self.label}/data.csv'
-        with open(file_path, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Time', 'X', 'Y', 'Z'])
-            for time, data in self.data.items():
-                writer.writerow([time, data['x'], data['y'], data['z']])
-
-    def plot_data(self, experiment_dir):
-        times = list(self.data.keys())
-        x_values = [self.data[time]['x'] for time in times]
-        y_values = [self.data[time]['y'] for time in times]
-        z_values = [self.data[time]['z'] for time in times]
-
-        plt.figure(figsize=(10, 6))
-        plt.plot(times, x_values, label='X Velocity', color='r')
-        plt.plot(times, y_values, label='Y Velocity', color='g')
-        plt.plot(times, z_values, label='Z Velocity', color='b')
-        plt.xlabel('Time (s)')
-        plt.ylabel('Velocity (m/s)')
-        plt.title(f'Velocity Data for {self.label}')
-        plt.legend()
-        plt.grid(True)
-
-        plt.savefig(f'{experiment_dir}/Velocity_{self.label}/plot.png')
-        plt.close()
+        file_path = f'{experiment_dir}/Velocity_{self.label}/data.{self.output_format.extension}'
+        if self.writer is not None:
+            self.writer.close_file(file_path, self.data).wait()
+            return
+
+        self.output_format.write(file_path, self.data.columns, self.data.to_array(), self.data.dtypes)
+
+    def plot_data(self, experiment_dir, max_points=MAX_POINTS, method=DECIMATION):
+        if self.writer is not None:
+            data = self.output_format.read(f'{experiment_dir}/Velocity_{self.label}/data.{self.output_format.extension}')
+        else:
+            data = self.data.as_dict()
+        plot_velocity(data, f'{experiment_dir}/Velocity_{self.label}', self.label, max_points, method)
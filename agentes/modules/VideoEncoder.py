@@ -0,0 +1,79 @@
+import numpy as np
+import csv
+
+from modules.ImageEncoder import ImageEncoder
+
+class VideoEncoder(ImageEncoder):
+    """
+    Grava os quadros de uma câmera direto em um único arquivo de vídeo.
+
+    Usa o mesmo pipeline (fila limitada e política de descarte) do
+    ImageEncoder, mas com um único worker para manter a ordem dos quadros.
+    O padrão é MJPG em .avi: todo quadro é um keyframe, então qualquer quadro
+    pode ser acessado diretamente. O arquivo frames.csv ao lado do vídeo
+    associa o índice do quadro no vídeo ao frame e ao timestamp da simulação.
+    """
+
+    def __init__(self, output_dir, fps=20.0, codec='MJPG', container='avi', max_queue=64, policy='drop_oldest'):
+        try:
+            import cv2
+        except ImportError as e:
+            raise ImportError("O modo de vídeo requer o pacote opencv-python (pip install opencv-python)") from e
+        self._cv2 = cv2
+        self.fps = fps
+        self.codec = codec
+        self.video_path = f"{output_dir}/video.{container}"
+        self.index_path = f"{output_dir}/frames.csv"
+        self._video = None
+        self._count = 0
+        super().__init__(output_dir, workers=1, max_queue=max_queue, policy=policy)
+        # aberto só depois da validação da política, para não vazar o arquivo
+        self._index_file = open(self.index_path, 'w', newline='')
+        self._index = csv.writer(self._index_file)
+        self._index.writerow(['Index', 'Frame', 'Timestamp'])
+
+    def encode(self, frame, timestamp, width, height, raw_data):
+        if self._video is None:
+            fourcc = self._cv2.VideoWriter_fourcc(*self.codec)
+            video = self._cv2.VideoWriter(self.video_path, fourcc, self.fps, (width, height))
+            if not video.isOpened():
+                # sem guardar o writer: o próximo quadro tenta abrir de novo, e cada
+                # falha aparece em `failed` e na mensagem do worker
+                video.release()
+                raise RuntimeError(f"Não foi possível abrir {self.video_path} com o codec {self.codec}")
+            self._video = video
+        bgra = np.frombuffer(raw_data, dtype=np.uint8).reshape((height, width, 4))
+        self._video.write(self._cv2.cvtColor(bgra, self._cv2.COLOR_BGRA2BGR))
+        self._index.writerow([self._count, frame, timestamp])
+        self._count += 1
+
+    def close(self):
+        super().close()
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        self._index_file.close()
+
+
+def read_frame(camera_dir, frame, container='avi'):
+    """
+    Lê um quadro específico (pelo frame da simulação) de uma câmera gravada em vídeo.
+
+    :param camera_dir: pasta camera_<label> do experimento
+    :param frame: frame da simulação (coluna Frame de frames.csv)
+    :param container: extensão usada na gravação
+    :return: imagem BGR (np.ndarray) ou None se o frame não foi gravado
+    """
+    import cv2
+
+    index = np.loadtxt(f"{camera_dir}/frames.csv", delimiter=',', skiprows=1, ndmin=2)
+    matches = np.nonzero(index[:, 1] == frame)[0]
+    if len(matches) == 0:
+        return None
+    capture = cv2.VideoCapture(f"{camera_dir}/video.{container}")
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, int(index[matches[0], 0]))
+        ok, image = capture.read()
+    finally:
+        capture.release()
+    return image if ok else None
@@ -0,0 +1,80 @@
+import numpy as np
+import carla
+
+class WorldStateSampler:
+    """
+    Lê o estado de todos os atores registrados a partir de um único snapshot.
+
+    `world.get_snapshot()` devolve o último estado recebido pelo cliente, então
+    um tick custa uma leitura local por ator em vez de uma chamada
+    get_location()/get_velocity() ao servidor por ator e por módulo.
+    Os módulos inscritos (PositionModule, VelocityModule) recebem seus valores
+    por `record(frame, timestamp, x, y, z)` a cada tick.
+    """
+    FIELDS = ('location', 'velocity', 'acceleration', 'angular_velocity')
+
+    world: carla.World
+    frame: int
+    timestamp: float
+
+    def __init__(self, world):
+        self.world = world
+        self.frame = -1
+        self.timestamp = 0.0
+        self._actor_ids = []
+        self._rows = {}
+        self._subscribers = []
+        self.present = np.zeros(0, dtype=bool)
+        self.location = np.zeros((0, 3))
+        self.velocity = np.zeros((0, 3))
+        self.acceleration = np.zeros((0, 3))
+        self.angular_velocity = np.zeros((0, 3))
+
+    def register(self, actor):
+        """Inclui o ator na amostragem e retorna a linha dele nos arrays de estado."""
+        if actor.id not in self._rows:
+            self._rows[actor.id] = len(self._actor_ids)
+            self._actor_ids.append(actor.id)
+            self.present = np.append(self.present, False)
+            for field in self.FIELDS:
+                setattr(self, field, np.vstack([getattr(self, field), np.full((1, 3), np.nan)]))
+        return self._rows[actor.id]
+
+    def subscribe(self, module, actor, field):
+        """A cada tick chama `module.record(frame, timestamp, x, y, z)` com o campo `field` do ator."""
+        if field not in self.FIELDS:
+            raise ValueError(f"Campo desconhecido: {field}. Opções: {self.FIELDS}")
+        self._subscribers.append((module, self.register(actor), field))
+
+    def tick(self):
+        snapshot = self.world.get_snapshot()
+        if snapshot.frame == self.frame:
+            # o mundo não avançou desde o último tick: nada novo para amostrar
+            return
+        self.frame = snapshot.frame
+        self.timestamp = snapshot.timestamp.elapsed_seconds
+
+        for row, actor_id in enumerate(self._actor_ids):
+            actor_snapshot = snapshot.find(actor_id)
+            if actor_snapshot is None:
+                # ator destruído ou ainda não presente no snapshot
+                self.present[row] = False
+                for field in self.FIELDS:
+                    getattr(self, field)[row] = np.nan
+                continue
+            self.present[row] = True
+            location = actor_snapshot.get_transform().location
+            velocity = actor_snapshot.get_velocity()
+            acceleration = actor_snapshot.get_acceleration()
+            angular_velocity = actor_snapshot.get_angular_velocity()
+            self.location[row] = (location.x, location.y, location.z)
+            self.velocity[row] = (velocity.x, velocity.y, velocity.z)
+            self.acceleration[row] = (acceleration.x, acceleration.y, acceleration.z)
+            self.angular_velocity[row] = (angular_velocity.x, angular_velocity.y, angular_velocity.z)
+
+        for module, row, field in self._subscribers:
+            if self.present[row]:
+                module.record(self.frame, self.timestamp, *getattr(self, field)[row])
+
+    def get(self, actor, field):
+        return getattr(self, field)[self._rows[actor.id]]
@@ -15,17 +15,37 @@ from modules.GNSS import GNSS
 from modules.IMU import IMU
 from modules.PositionModule import PositionModule
 from modules.VelocityModule import VelocityModule
+from modules.StreamWriter import StreamWriter
+from modules.WorldStateSampler import WorldStateSampler
+from modules.FrameSynchronizer import FrameSynchronizer
+from modules.PlotRenderer import render_experiment
+from modules.LiveDashboard import LiveDashboard
+from modules.Experiment import write_meta
 
 from datetime import datetime
 
 def main():
 
     xodr_path = 'maps/map.xodr'
+    town = 'Town01'
     tick_time = 0.1 # tempo de amostragem (máximo 0.1)
     enable_camera_pedestrian = False
     enable_camera_vehicle = True
     has_behavior = True
     car_behavior = 'cautious' # cautious, aggressive, normal
+    stream_data = True # grava os dados dos sensores durante a simulação
+    flush_interval = 1.0 # segundos entre gravações em modo streaming
+    flush_batch_size = 512 # amostras por lote em modo streaming
+    output_format = 'csv' # csv, parquet (requer pyarrow; só pode ser lido depois de fechado)
+    camera_output = 'png' # png (uma imagem por quadro), video (requer opencv-python)
+    plot_max_points = 4000 # pontos por série nos gráficos (None desativa a decimação)
+    plot_decimation = 'minmax' # minmax (preserva picos), lttb
+    live_dashboard = True # página com os dados dos sensores durante a simulação
+    dashboard_port = 8050
+    dashboard_refresh = 0.5 # segundos entre atualizações do painel (independente do tick)
+
+    # só o vídeo precisa de uma taxa fixa; em png a câmera captura a cada tick, como antes
+    camera_fps = 1 / tick_time if camera_output == 'video' else None
 
     camera_drone = None
     camera_media = None
@@ -40,11 +60,16 @@ def main():
 
     sensores_pedestres = {}
 
+    stream_writer = StreamWriter(flush_interval, flush_batch_size) if stream_data else None
+    dashboard = None
+
     try:
         client = carla.Client('localhost', 2000)
         client.set_timeout(10.0)
 
-        world = client.load_world('Town01')
+        world = client.load_world(town)
+        # um snapshot por tick alimenta a posição e a velocidade de todos os atores
+        world_sampler = WorldStateSampler(world)
 
         settings = world.get_settings()
         settings.synchronous_mode = False
@@ -115,34 +140,47 @@ def main():
 
                 sensores_pedestres[pedestrian] = {}
                 if enable_camera_pedestrian:
-                    camera_pedestre = Camera(f"drone_pedestre_{i}", world, 0, 0, 20, -90, pedestrian)
+                    camera_pedestre = Camera(f"drone_pedestre_{i}", world, 0, 0, 20, -90, pedestrian, output=camera_output, fps=camera_fps)
                     sensores_pedestres[pedestrian]['camera_drone'] = camera_pedestre
                     
-                    camera_pedestre = Camera(f"visao_pedestre_{i}", world, 0, 0, 0, 0, pedestrian)
+                    camera_pedestre = Camera(f"visao_pedestre_{i}", world, 0, 0, 0, 0, pedestrian, output=camera_output, fps=camera_fps)
                     sensores_pedestres[pedestrian]['camera_visao'] = camera_pedestre
 
-                gnss_pedestre = GNSS(f"pedestre_{i}", world, 0, 0, 0, 0, tick_time, pedestrian)
+                gnss_pedestre = GNSS(f"pedestre_{i}", world, 0, 0, 0, 0, tick_time, pedestrian, stream_writer, output_format)
                 sensores_pedestres[pedestrian]['gnss'] = gnss_pedestre
 
-                imu_pedestre = IMU(f"pedestre_{i}", world, 0, 0, 0, 0, tick_time, pedestrian)
+                imu_pedestre = IMU(f"pedestre_{i}", world, 0, 0, 0, 0, tick_time, pedestrian, stream_writer, output_format)
                 sensores_pedestres[pedestrian]['imu'] = imu_pedestre
 
-                position_sensor_pedestre = PositionModule(f"pedestre_{i}", pedestrian, tick_time)
+                position_sensor_pedestre = PositionModule(f"pedestre_{i}", pedestrian, tick_time, stream_writer, output_format, world_sampler)
                 sensores_pedestres[pedestrian]['position'] = position_sensor_pedestre
 
-                velocity_sensor_pedestre = VelocityModule(f"pedestre_{i}", pedestrian, tick_time)
+                velocity_sensor_pedestre = VelocityModule(f"pedestre_{i}", pedestrian, tick_time, stream_writer, output_format, world_sampler)
                 sensores_pedestres[pedestrian]['velocity'] = velocity_sensor_pedestre
 
                 print(f"Pedestre {i} spawnado com sucesso!")
+
+        # metadados lidos pelo catálogo de experimentos (python -m analysis.catalog)
+        start_time = world.get_snapshot().timestamp.elapsed_seconds
+        write_meta(experiment_dir, town=town, tick_time=tick_time, synchronous_mode=settings.synchronous_mode,
+                   vehicles=len(agentes), pedestrians=len(pedestres), behavior=car_behavior if has_behavior else None,
+                   output_format=output_format, camera_output=camera_output if enable_camera_vehicle else None,
+                   started=timestamp)
                     
         if enable_camera_vehicle:
             # camera_drone = Camera("drone", world, 0, 0, 1000, -90, vehicle)
             # camera_media = Camera("media", world, 0, 0, 100, -90, vehicle)
-            camera_carro = Camera("carro", world, -5, 0, 2, 0, vehicle)
-        gnss_sensor = GNSS("vehicle", world, 0, 0, 0, 0, tick_time, vehicle)
-        imu_sensor = IMU("vehicle", world, 0, 0, 0, 0, tick_time, vehicle)
-        position_sensor = PositionModule("vehicle", vehicle, tick_time)
-        velocity_sensor = VelocityModule("vehicle", vehicle, tick_time)
+            camera_carro = Camera("carro", world, -5, 0, 2, 0, vehicle, output=camera_output, fps=camera_fps)
+        # junta GNSS, IMU, posição e velocidade do veículo pelo frame da simulação. A junção é
+        # exata por frame, então só faz sentido em modo síncrono: no assíncrono cada fonte
+        # amostra em frames diferentes e quase toda linha sairia incompleta
+        vehicle_sync = None
+        if settings.synchronous_mode:
+            vehicle_sync = FrameSynchronizer("vehicle", output_format=output_format)
+        gnss_sensor = GNSS("vehicle", world, 0, 0, 0, 0, tick_time, vehicle, stream_writer, output_format, vehicle_sync)
+        imu_sensor = IMU("vehicle", world, 0, 0, 0, 0, tick_time, vehicle, stream_writer, output_format, vehicle_sync)
+        position_sensor = PositionModule("vehicle", vehicle, tick_time, stream_writer, output_format, world_sampler, vehicle_sync)
+        velocity_sensor = VelocityModule("vehicle", vehicle, tick_time, stream_writer, output_format, world_sampler, vehicle_sync)
 
         if enable_camera_vehicle:
             # camera_drone.start(experiment_dir)
@@ -153,6 +191,14 @@ def main():
         position_sensor.start(experiment_dir)
         velocity_sensor.start(experiment_dir)
 
+        if live_dashboard:
+            dashboard = LiveDashboard(dashboard_port, dashboard_refresh)
+            dashboard.add('Posição do veículo', position_sensor.data, ['X', 'Y'])
+            dashboard.add('Velocidade do veículo', velocity_sensor.data, ['X', 'Y', 'Z'])
+            dashboard.add('Aceleração do veículo (IMU)', imu_sensor.data, ['Accel_x', 'Accel_y', 'Accel_z'])
+            dashboard.add('Giroscópio do veículo (IMU)', imu_sensor.data, ['Gyro_x', 'Gyro_y', 'Gyro_z'])
+            dashboard.start()
+
         for pedestrian in pedestres:
             if enable_camera_pedestrian:
                 sensores_pedestres[pedestrian]['camera_drone'].start(experiment_dir_pedestres)
@@ -185,19 +231,11 @@ def main():
                     break
                 
                 for _ in range(10): # fica parado por 10s
-                    position_sensor.tick()
-                    for pedestrian in pedestres:
-                        sensores_pedestres[pedestrian]['position'].tick()
-                        sensores_pedestres[pedestrian]['velocity'].tick()
+                    world_sampler.tick()
 
                 continue
 
-            for pedestrian in pedestres:
-                sensores_pedestres[pedestrian]['position'].tick()
-                sensores_pedestres[pedestrian]['velocity'].tick()
-            print(vehicle.get_transform().location)
-            position_sensor.tick()
-            velocity_sensor.tick()
+            world_sampler.tick()
             vehicle.apply_control(agent.run_step())
             world.wait_for_tick()
 
@@ -212,41 +250,58 @@ def main():
             if enable_camera_pedestrian:
                 sensores_pedestres[pedestrian]['camera_drone'].stop()
                 sensores_pedestres[pedestrian]['camera_drone'].save_data(experiment_dir_pedestres)
-                sensores_pedestres[pedestrian]['camera_visao'].plot_data(experiment_dir_pedestres)
 
                 sensores_pedestres[pedestrian]['camera_visao'].stop()
                 sensores_pedestres[pedestrian]['camera_visao'].save_data(experiment_dir_pedestres)
-                sensores_pedestres[pedestrian]['camera_visao'].plot_data(experiment_dir_pedestres)
                 
             sensores_pedestres[pedestrian]['gnss'].stop()
             sensores_pedestres[pedestrian]['gnss'].save_data(experiment_dir_pedestres)
-            sensores_pedestres[pedestrian]['gnss'].plot_data(experiment_dir_pedestres)
 
             sensores_pedestres[pedestrian]['imu'].stop()
             sensores_pedestres[pedestrian]['imu'].save_data(experiment_dir_pedestres)
-            sensores_pedestres[pedestrian]['imu'].plot_data(experiment_dir_pedestres)
 
             sensores_pedestres[pedestrian]['position'].save_data(experiment_dir_pedestres)
-            sensores_pedestres[pedestrian]['position'].plot_data(experiment_dir_pedestres, mid_point)
 
             sensores_pedestres[pedestrian]['velocity'].save_data(experiment_dir_pedestres)
-            sensores_pedestres[pedestrian]['velocity'].plot_data(experiment_dir_pedestres)
 
         gnss_sensor.save_data(experiment_dir)
-        gnss_sensor.plot_data(experiment_dir)
 
         imu_sensor.save_data(experiment_dir)
-        imu_sensor.plot_data(experiment_dir)
 
         position_sensor.save_data(experiment_dir)
-        position_sensor.plot_data(experiment_dir, mid_point)
         velocity_sensor.save_data(experiment_dir)
-        velocity_sensor.plot_data(experiment_dir)
+
+        if vehicle_sync is not None:
+            vehicle_sync.flush()
+            vehicle_sync.save_data(experiment_dir)
+            print(f"Sincronização: {vehicle_sync.emitted} linhas, {vehicle_sync.incomplete} incompletas, "
+                  f"{vehicle_sync.late} leituras atrasadas")
+        if stream_writer is not None and stream_writer.dropped:
+            print(f"Streaming: {stream_writer.dropped} amostras descartadas (fila cheia)")
+
+        # gráficos de todos os sensores (veículo e pedestres) em paralelo, depois da simulação
+        render_experiment(experiment_dir, mid_point=(mid_point.x, mid_point.y),
+                          max_points=plot_max_points, method=plot_decimation)
+
+        write_meta(experiment_dir, duration=world.get_snapshot().timestamp.elapsed_seconds - start_time,
+                   routes=cont_routes)
 
         print("Captura finalizada.")
 
     finally:
 
+        if dashboard is not None:
+            dashboard.stop()
+
+        # os sensores param antes do StreamWriter, para nenhum callback chegar depois dele fechado
+        for sensor in [camera_carro, gnss_sensor, imu_sensor] + \
+                [s for sensores_pedestre in sensores_pedestres.values() for s in sensores_pedestre.values()]:
+            if sensor is not None and hasattr(sensor, 'stop'):
+                sensor.stop()
+
+        if stream_writer is not None:
+            stream_writer.close()
+
         for sensor in sensores:
             if sensor is not None:
                 sensor.destroy()
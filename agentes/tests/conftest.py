@@ -0,0 +1,32 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# os testes importam os módulos como os scripts de agentes/ (modules.X, agents.X)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def fake_waypoint(x=0.0, y=0.0, z=0.0):
+    """Objeto com os campos de carla.Waypoint lidos por RouteGraph.add_waypoints."""
+    location = SimpleNamespace(x=x, y=y, z=z)
+    return SimpleNamespace(transform=SimpleNamespace(location=location), road_id=0, section_id=0,
+                           lane_id=-1, s=0.0, lane_width=3.5)
+
+
+@pytest.fixture
+def make_route_graph():
+    """Monta um RouteGraph a partir de vértices e arestas (n1, n2, comprimento)."""
+    from agents.navigation.route_graph import RouteGraph
+
+    def make(vertices, edges, unit=1.0):
+        graph = RouteGraph(unit=unit)
+        for vertex in vertices:
+            graph.add_node(vertex)
+        for n1, n2, length in edges:
+            graph.add_edge(n1, n2, length, fake_waypoint(*vertices[n1]), fake_waypoint(*vertices[n2]), [],
+                           SimpleNamespace(value=4), False)
+        graph.freeze()
+        return graph
+    return make
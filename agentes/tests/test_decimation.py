@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from modules.Decimation import decimate, decimate_indices, lttb_indices, minmax_indices
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000, dtype=np.float64)
+    return x, [rng.normal(size=x.size).cumsum() for _ in range(3)]
+
+
+@pytest.mark.parametrize('max_points', [0, 1, 2, 3, 4, 5, 10, 101, 500])
+def test_never_exceeds_max_points(series, max_points):
+    x, ys = series
+    assert len(minmax_indices(ys[0], max_points)) <= max_points
+    assert len(lttb_indices(x, ys[0], max_points)) <= max_points
+    for method in ('minmax', 'lttb'):
+        assert len(decimate_indices(x, ys, max_points, method)) <= max_points
+        assert len(decimate_indices(x, ys[:1], max_points, method)) <= max_points
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_keeps_endpoints_sorted(series, method):
+    x, ys = series
+    index = decimate_indices(x, ys, 300, method)
+    assert index[0] == 0 and index[-1] == len(x) - 1
+    assert np.all(np.diff(index) > 0)
+
+
+def test_minmax_keeps_every_peak():
+    y = np.zeros(1000)
+    y[[137, 640]] = 5.0
+    y[333] = -5.0
+    y[500] = np.nan
+    index = minmax_indices(y, 20)
+    assert {137, 333, 500, 640} <= set(index.tolist())
+
+
+def test_short_series_untouched(series):
+    x, ys = series
+    assert np.array_equal(decimate_indices(x[:50], [y[:50] for y in ys], 100), np.arange(50))
+    assert np.array_equal(decimate_indices(x, ys, None), np.arange(len(x)))
+
+
+def test_decimate_returns_matching_pairs(series):
+    x, ys = series
+    dx, dy = decimate(x, ys[0], 100, 'lttb')
+    assert len(dx) == len(dy) == 100
+    assert np.array_equal(ys[0][dx.astype(np.int64)], dy)
+
+
+def test_unknown_method(series):
+    x, ys = series
+    with pytest.raises(ValueError):
+        decimate_indices(x, ys, 100, 'mean')
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from modules.FrameSynchronizer import FrameSynchronizer
+
+
+@pytest.fixture
+def sync():
+    sync = FrameSynchronizer('test', window=3)
+    sync.add_source('imu', ['Accel'])
+    sync.add_source('gnss', ['Lat', 'Lon'])
+    return sync
+
+
+def rows(sync):
+    return sync.data.to_array().T.tolist()
+
+
+def test_joins_sources_of_the_same_frame(sync):
+    sync.push('imu', 10, 0.5, 1.0)
+    assert sync.emitted == 0
+    sync.push('gnss', 10, 0.51, 2.0, 3.0)
+    assert rows(sync) == [[0.5, 10, 1.0, 2.0, 3.0]]
+
+
+def test_out_of_order_frames(sync):
+    sync.push('imu', 2, 0.2, 2.0)
+    sync.push('imu', 1, 0.1, 1.0)
+    sync.push('gnss', 1, 0.1, 10.0, 11.0)
+    sync.push('gnss', 2, 0.2, 20.0, 21.0)
+    assert [row[1] for row in rows(sync)] == [1, 2]
+
+
+def test_window_evicts_incomplete_frames(sync):
+    sync.push('imu', 1, 0.1, 1.0)
+    sync.push('imu', 5, 0.5, 5.0)
+    assert sync.incomplete == 1 and sync.emitted == 0
+    sync.push('gnss', 1, 0.1, 1.0, 1.0)
+    assert sync.late == 1 and sync.emitted == 0
+
+
+def test_emit_incomplete_fills_missing_with_nan():
+    sync = FrameSynchronizer('test', window=3, emit_incomplete=True)
+    sync.add_source('imu', ['Accel'])
+    sync.add_source('gnss', ['Lat', 'Lon'])
+    sync.push('imu', 1, 0.1, 1.0)
+    sync.flush()
+    row = sync.data.to_array()[:, 0]
+    assert row[:3].tolist() == [0.1, 1, 1.0] and np.isnan(row[3:]).all()
+    assert sync.incomplete == 1
+
+
+def test_repushed_frame_counts_as_late(sync):
+    sync.push('imu', 1, 0.1, 1.0)
+    sync.push('gnss', 1, 0.1, 2.0, 3.0)
+    sync.push('imu', 1, 0.1, 9.0)
+    sync.push('gnss', 1, 0.1, 9.0, 9.0)
+    assert sync.emitted == 1 and sync.late == 2
+    assert not sync._pending
+
+
+def test_emitted_frames_leave_the_window(sync):
+    for frame in range(100):
+        sync.push('imu', frame, frame / 10, 1.0)
+        sync.push('gnss', frame, frame / 10, 1.0, 1.0)
+    assert sync.emitted == 100
+    assert len(sync._done) <= sync.window + 1
+
+
+def test_on_row_callback():
+    received = []
+    sync = FrameSynchronizer('test', on_row=received.append)
+    sync.add_source('imu', ['Accel'])
+    sync.push('imu', 1, 0.1, 4.0)
+    assert len(received) == 1 and received[0].tolist() == [0.1, 1, 4.0]
+    assert len(sync.data) == 0
+
+
+def test_source_registration_errors(sync):
+    with pytest.raises(ValueError):
+        sync.add_source('imu', ['Other'])
+    with pytest.raises(ValueError):
+        sync.add_source('speed', ['Accel'])
+    sync.push('imu', 1, 0.1, 1.0)
+    with pytest.raises(RuntimeError):
+        sync.add_source('speed', ['Speed'])
@@ -0,0 +1,88 @@
+import math
+from collections import deque
+
+import numpy as np
+import pytest
+
+from agents.navigation.local_planner import LocalPlanner, RoadOption
+from agents.tools.opendrive import Location, Rotation, Transform
+
+
+class PlanWaypoint(object):
+    def __init__(self, x, y, yaw=0.0):
+        self.transform = Transform(Location(x, y, 0.0), Rotation(yaw=yaw))
+
+
+def planner_with(points):
+    planner = LocalPlanner.__new__(LocalPlanner)
+    planner._waypoints_queue = deque(maxlen=10000)
+    planner._plan_xyz = np.zeros((0, 3))
+    planner._plan_right = np.zeros((0, 2))
+    planner._plan_arc = np.zeros(0)
+    planner._append_to_plan([(PlanWaypoint(x, y), RoadOption.LANEFOLLOW) for x, y in points])
+    return planner
+
+
+def reference_count(points, location, distance, inclusive=False):
+    """O laço original do run_step: conta até o primeiro waypoint fora do raio."""
+    count = 0
+    for x, y in points:
+        d = math.hypot(x - location.x, y - location.y)
+        if d > distance or (not inclusive and d == distance):
+            break
+        count += 1
+    return count
+
+
+def curvy_plan(seed, size=400):
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.3, size))
+    steps = rng.uniform(0.2, 2.0, size)
+    return list(zip(np.cumsum(steps * np.cos(heading)).tolist(), np.cumsum(steps * np.sin(heading)).tolist()))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_count_within_matches_the_linear_scan(seed):
+    points = curvy_plan(seed)
+    planner = planner_with(points)
+    rng = np.random.default_rng(100 + seed)
+    for _ in range(200):
+        x, y = points[rng.integers(len(points))]
+        location = Location(x + rng.normal(0, 3), y + rng.normal(0, 3), 0.0)
+        distance = float(rng.uniform(0.5, 15.0))
+        for inclusive in (False, True):
+            assert planner._count_within(location, distance, inclusive) == \
+                reference_count(points, location, distance, inclusive)
+
+
+def test_plan_that_loops_back():
+    # circuito: o veículo está perto do início e do fim, mas só o início conta
+    points = [(10 * math.cos(a), 10 * math.sin(a)) for a in np.linspace(0, 2 * math.pi, 64)]
+    planner = planner_with(points)
+    location = Location(10.0, 0.0, 0.0)
+    assert planner._count_within(location, 2.0) == reference_count(points, location, 2.0) < 5
+
+
+def test_boundary_distance():
+    planner = planner_with([(0.0, 0.0), (1.0, 0.0), (2.0, 0.0), (3.0, 0.0)])
+    location = Location(0.0, 0.0, 0.0)
+    assert planner._count_within(location, 2.0) == 2
+    assert planner._count_within(location, 2.0, inclusive=True) == 3
+    assert planner._count_within(location, 10.0) == 4
+
+
+def test_pop_and_append_keep_arc_length_and_geometry():
+    planner = planner_with([(0.0, 0.0), (3.0, 4.0)])
+    planner._append_to_plan([(PlanWaypoint(3.0, 10.0), RoadOption.LANEFOLLOW)])
+    assert planner._plan_arc.tolist() == [0.0, 5.0, 11.0]
+    planner._pop_plan(1)
+    assert len(planner._waypoints_queue) == len(planner._plan_xyz) == 2
+    xyz, right = planner.get_plan_geometry(Location(3.0, 4.0, 0.0), 6.0)
+    assert xyz.tolist() == [[3.0, 4.0, 0.0], [3.0, 10.0, 0.0]]
+    assert right.shape == (2, 2)
+    assert planner._count_within(Location(100.0, 0.0, 0.0), 1.0) == 0
+
+
+def test_empty_plan():
+    planner = planner_with([])
+    assert planner._count_within(Location(0.0, 0.0, 0.0), 5.0) == 0
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from agents.navigation import global_route_planner
+from agents.navigation.global_route_planner import map_digest
+from agents.tools import opendrive
+
+CAMPUS_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'unicamp', 'maps', 'map.xodr')
+
+
+class CountingMap(object):
+    def __init__(self, name, xodr):
+        self.name = name
+        self.xodr = xodr
+        self.calls = 0
+
+    def to_opendrive(self):
+        self.calls += 1
+        return self.xodr
+
+
+def test_digest_is_memoized_per_map_object():
+    wmap = CountingMap('Town', '<OpenDRIVE/>')
+    assert map_digest(wmap) == map_digest(wmap)
+    assert wmap.calls == 1
+
+
+def test_digest_tells_apart_maps_with_the_same_name():
+    first, second = CountingMap('Town', '<OpenDRIVE a="1"/>'), CountingMap('Town', '<OpenDRIVE a="2"/>')
+    same = CountingMap('Town', '<OpenDRIVE a="1"/>')
+    assert map_digest(first) != map_digest(second)
+    assert map_digest(first) == map_digest(same)
+
+
+def test_digest_cache_is_bounded():
+    maps = [CountingMap('Town', f'<OpenDRIVE n="{n}"/>') for n in range(global_route_planner.MAP_DIGEST_CACHE_SIZE + 5)]
+    for wmap in maps:
+        map_digest(wmap)
+    assert len(global_route_planner._map_digests) <= global_route_planner.MAP_DIGEST_CACHE_SIZE
+    map_digest(maps[0])
+    assert maps[0].calls == 2
+
+
+@pytest.mark.skipif(not os.path.exists(CAMPUS_MAP), reason='campus map not available')
+def test_digest_of_an_opendrive_map():
+    assert len(map_digest(opendrive.Map.from_file(CAMPUS_MAP))) == 16
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from analysis.metrics import distance_matrices, group_summary, summarize
+from modules.OutputFormat import CsvFormat
+
+CHANNELS = ['Accel_x', 'Accel_y']
+
+# CsvFormat.read avisa quando o arquivo só tem o cabeçalho
+pytestmark = pytest.mark.filterwarnings('ignore:loadtxt')
+
+
+def write_series(path, samples, seed=0, nan=False):
+    rng = np.random.default_rng(seed)
+    data = np.vstack([np.arange(samples) * 0.05, rng.normal(size=(2, samples))])
+    if nan:
+        data[1] = np.nan
+    CsvFormat().write(str(path), ['Time'] + CHANNELS, data)
+    return str(path)
+
+
+def test_summarize_rejects_series_without_valid_samples(tmp_path):
+    with pytest.raises(ValueError, match='nenhuma amostra válida'):
+        summarize(write_series(tmp_path / 'empty.csv', 0), 'Time', CHANNELS)
+    with pytest.raises(ValueError, match='nenhuma amostra válida'):
+        summarize(write_series(tmp_path / 'nan.csv', 50, nan=True), 'Time', CHANNELS)
+
+
+def test_empty_series_are_left_out_of_the_comparison(tmp_path):
+    series = [
+        ('a/1', 'a', write_series(tmp_path / 'a1.csv', 400, seed=1), 'Time', CHANNELS),
+        ('a/2', 'a', write_series(tmp_path / 'a2.csv', 0), 'Time', CHANNELS),
+        ('b/1', 'b', write_series(tmp_path / 'b1.csv', 400, seed=2), 'Time', CHANNELS),
+        ('b/2', 'b', write_series(tmp_path / 'b2.csv', 50, nan=True), 'Time', CHANNELS),
+    ]
+    result, used = distance_matrices(series, workers=1, max_samples=200, n_features=32)
+    assert [s[0] for s in used] == ['a/1', 'b/1']
+    assert result['wasserstein'].shape == (2, 2, 2)
+    assert result['mmd_joint'].shape == (2, 2)
+    assert np.all(np.isfinite(result['ks'])) and result['ks'][0, 1].max() > 0
+    assert list(group_summary(result, [s[1] for s in used])) == [('a', 'b')]
+
+
+def test_fewer_than_two_valid_series(tmp_path):
+    series = [
+        ('a/1', 'a', write_series(tmp_path / 'a1.csv', 400), 'Time', CHANNELS),
+        ('a/2', 'a', write_series(tmp_path / 'a2.csv', 0), 'Time', CHANNELS),
+    ]
+    with pytest.raises(ValueError):
+        distance_matrices(series, workers=1)
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+import pytest
+
+from agents.navigation.route_graph import NoRouteError
+
+nx = pytest.importorskip('networkx')
+
+
+def random_graph(make_route_graph, seed, nodes=200, unit=2.0):
+    """Grafo aleatório com pesos em 'waypoints': comprimento >= distância / unit (como no planner)."""
+    rng = np.random.default_rng(seed)
+    vertices = [tuple(v) for v in rng.uniform(0, 500, size=(nodes, 3)) * (1, 1, 0.02)]
+    edges = {}
+    for n1 in range(nodes):
+        for n2 in rng.choice(nodes, size=4, replace=False):
+            if n1 != n2:
+                distance = math.dist(vertices[n1], vertices[n2]) / unit
+                edges[(n1, int(n2))] = float(math.ceil(distance) + rng.integers(0, 3))
+    graph = make_route_graph(vertices, [(n1, n2, length) for (n1, n2), length in edges.items()], unit)
+    digraph = nx.DiGraph()
+    digraph.add_weighted_edges_from((n1, n2, length) for (n1, n2), length in edges.items())
+    return graph, digraph, vertices
+
+
+def cost(graph, route):
+    return sum(float(graph.length[graph.edge(n1, n2)]) for n1, n2 in zip(route[:-1], route[1:]))
+
+
+@pytest.mark.parametrize('kind', ['euclidean', 'alt'])
+def test_astar_matches_networkx_shortest_paths(make_route_graph, kind):
+    graph, digraph, vertices = random_graph(make_route_graph, seed=1)
+    graph.build_landmarks(6)
+    rng = np.random.default_rng(2)
+    checked = 0
+    for source, target in rng.integers(len(vertices), size=(150, 2)).tolist():
+        try:
+            expected = nx.dijkstra_path_length(digraph, source, target)
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            with pytest.raises(NoRouteError):
+                graph.astar(source, target, heuristic=kind)
+            continue
+        route = graph.astar(source, target, heuristic=kind)
+        assert route[0] == source and route[-1] == target
+        assert cost(graph, route) == pytest.approx(expected, abs=1e-4)
+        checked += 1
+    assert checked > 100
+
+
+def test_euclidean_heuristic_is_scaled_like_networkx_astar(make_route_graph):
+    graph, digraph, vertices = random_graph(make_route_graph, seed=3)
+    rng = np.random.default_rng(4)
+    for source, target in rng.integers(len(vertices), size=(100, 2)).tolist():
+        if not nx.has_path(digraph, source, target):
+            continue
+        expected = nx.astar_path(digraph, source, target,
+                                 heuristic=lambda a, b: math.dist(vertices[a], vertices[b]) / graph.unit)
+        assert cost(graph, graph.astar(source, target)) == pytest.approx(cost(graph, expected), abs=1e-4)
+
+
+def test_lazy_heuristic_equals_full_array(make_route_graph):
+    graph, _, vertices = random_graph(make_route_graph, seed=5)
+    graph.build_landmarks(4)
+    rng = np.random.default_rng(6)
+    for source, target in rng.integers(len(vertices), size=(50, 2)).tolist():
+        for kind in ('euclidean', 'alt'):
+            try:
+                lazy = graph.astar(source, target, heuristic=kind)
+            except NoRouteError:
+                continue
+            assert lazy == graph.astar(source, target, heuristic=graph.heuristic(target, kind))
+
+
+def test_unscaled_euclidean_was_suboptimal(make_route_graph):
+    # S=0 -> A=1 -> T=3 custa 7 e passa em linha reta; S -> B=2 -> T custa 6 mas desvia.
+    # Em metros (a heurística antiga, unit = 2 m por waypoint) a estimativa de B passa do
+    # custo real e o A* volta pelo caminho mais caro, como o networkx.astar_path do baseline
+    vertices = [(0.0, 0.0, 0.0), (5.0, 0.0, 0.0), (5.0, -8.0, 0.0), (10.0, 0.0, 0.0)]
+    edges = [(0, 1, 3.0), (1, 3, 4.0), (0, 2, 1.0), (2, 3, 5.0)]
+    graph = make_route_graph(vertices, edges, unit=2.0)
+    meters = np.linalg.norm(graph.vertices - graph.vertices[3], axis=1)
+
+    assert graph.astar(0, 3, heuristic=meters) == [0, 1, 3]
+    digraph = nx.DiGraph()
+    digraph.add_weighted_edges_from(edges)
+    assert nx.astar_path(digraph, 0, 3, heuristic=lambda a, b: math.dist(vertices[a], vertices[b])) == [0, 1, 3]
+
+    assert graph.astar(0, 3) == [0, 2, 3]
+    assert graph.astar(0, 3, heuristic='euclidean') == [0, 2, 3]
+
+
+def test_version_changes_with_the_graph(make_route_graph):
+    graph = make_route_graph([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0)], [(0, 1, 1.0)])
+    version = graph.version
+    graph.build_landmarks(1)
+    assert graph.version != version
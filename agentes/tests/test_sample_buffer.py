@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+
+from modules.SampleBuffer import SampleBuffer
+
+
+def fill(buffer, start, stop):
+    for i in range(start, stop):
+        buffer.append(i, 10 * i)
+
+
+def test_chunks_and_columns():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=4)
+    fill(buffer, 0, 10)
+    assert len(buffer) == buffer.total == 10
+    assert len(buffer._chunks) == 3
+    assert np.array_equal(buffer.column('Time'), np.arange(10))
+    assert np.array_equal(buffer.as_dict(7)['Value'], [70, 80, 90])
+    assert buffer.to_array().shape == (2, 10)
+
+
+def test_empty_buffer():
+    buffer = SampleBuffer(['Time', 'Value'])
+    assert buffer.to_array().shape == (2, 0)
+    assert buffer.take().shape == (2, 0)
+
+
+def test_take_empties_and_reuses_first_chunk():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=4)
+    fill(buffer, 0, 6)
+    first = buffer._chunks[0]
+    taken = buffer.take()
+    assert np.array_equal(taken[0], np.arange(6))
+    assert len(buffer) == 0 and buffer.total == 6
+    assert buffer._chunks == [first]
+    fill(buffer, 6, 8)
+    # o bloco reaproveitado não altera a cópia devolvida antes
+    assert np.array_equal(taken[0], np.arange(6))
+    assert np.array_equal(buffer.column('Time'), [6, 7])
+
+
+def test_clear():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=4)
+    fill(buffer, 0, 5)
+    buffer.clear()
+    assert len(buffer) == 0 and buffer._chunks == []
+    fill(buffer, 5, 6)
+    assert np.array_equal(buffer.column('Time'), [5])
+
+
+def test_reader_sees_samples_taken_between_reads():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=4)
+    fill(buffer, 0, 3)
+    reader = buffer.add_reader()
+    fill(buffer, 3, 8)
+    buffer.take()
+    fill(buffer, 8, 10)
+    buffer.take()
+    fill(buffer, 10, 12)
+    assert np.array_equal(buffer.read(reader)[0], np.arange(3, 12))
+    assert buffer.read(reader).shape == (2, 0)
+    fill(buffer, 12, 13)
+    assert np.array_equal(buffer.read(reader)[0], [12])
+    assert buffer._taken == []
+
+
+def test_read_returns_a_copy():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=8)
+    reader = buffer.add_reader()
+    fill(buffer, 0, 3)
+    data = buffer.read(reader)
+    buffer.take()
+    fill(buffer, 100, 103)
+    assert np.array_equal(data[0], [0, 1, 2])
+
+
+def test_taken_batches_are_kept_for_the_slowest_reader():
+    buffer = SampleBuffer(['Time', 'Value'])
+    fast, slow = buffer.add_reader(), buffer.add_reader()
+    fill(buffer, 0, 4)
+    buffer.take()
+    assert np.array_equal(buffer.read(fast)[0], np.arange(4))
+    assert len(buffer._taken) == 1
+    assert np.array_equal(buffer.read(slow)[0], np.arange(4))
+    assert buffer._taken == []
+    buffer.remove_reader(fast)
+    buffer.remove_reader(slow)
+    fill(buffer, 4, 6)
+    buffer.take()
+    assert buffer._taken == []
+
+
+def test_reader_ids_are_never_reused():
+    buffer = SampleBuffer(['Time', 'Value'])
+    first = buffer.add_reader()
+    second = buffer.add_reader()
+    buffer.remove_reader(first)
+    third = buffer.add_reader()
+    assert len({first, second, third}) == 3
+    fill(buffer, 0, 2)
+    assert buffer.read(second).shape == (2, 2)
+
+
+def test_concurrent_append_and_take_lose_nothing():
+    buffer = SampleBuffer(['Time', 'Value'], chunk_size=16)
+    reader = buffer.add_reader()
+    taken, read = [], []
+    stop = threading.Event()
+
+    def consumer():
+        while not stop.is_set():
+            taken.append(buffer.take())
+            read.append(buffer.read(reader))
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    fill(buffer, 0, 20000)
+    stop.set()
+    thread.join()
+    taken.append(buffer.take())
+    read.append(buffer.read(reader))
+    assert np.array_equal(np.concatenate(taken, axis=1)[0], np.arange(20000))
+    assert np.array_equal(np.concatenate(read, axis=1)[0], np.arange(20000))
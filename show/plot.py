@@ -2,8 +2,17 @@ from matplotlib import pyplot as plt
 from carla import Vector3D
 import numpy as np
 import csv
+import os
+import sys
 
-def plot_gnss(filename: str, experiment_dir: str):
+# a decimação é a mesma usada pelos gráficos do agentes/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agentes'))
+from modules.Decimation import decimate, decimate_indices
+
+MAX_POINTS = 4000 # pontos por série depois da decimação (None desativa)
+DECIMATION = 'minmax' # minmax (preserva picos) ou lttb
+
+def plot_gnss(filename: str, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
     time = []
     latitudes = []
     longitudes = []
@@ -19,15 +28,15 @@ def plot_gnss(filename: str, experiment_dir: str):
 
     fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
 
-    axs[0].plot(time, latitudes, label='Latitude', color='blue')
+    axs[0].plot(*decimate(time, latitudes, max_points, method), label='Latitude', color='blue')
     axs[0].set_ylabel('Latitude (°)')
     axs[0].legend()
 
-    axs[1].plot(time, longitudes, label='Longitude', color='orange')
+    axs[1].plot(*decimate(time, longitudes, max_points, method), label='Longitude', color='orange')
     axs[1].set_ylabel('Longitude (°)')
     axs[1].legend()
 
-    axs[2].plot(time, altitudes, label='Altitude', color='green')
+    axs[2].plot(*decimate(time, altitudes, max_points, method), label='Altitude', color='green')
     axs[2].set_xlabel('Time (s)')
     axs[2].set_ylabel('Altitude (m)')
     axs[2].legend()
@@ -36,7 +45,7 @@ def plot_gnss(filename: str, experiment_dir: str):
     plt.tight_layout()
     plt.savefig(f'{experiment_dir}/plots/gnss.png')
 
-def plot_accel(filename: str, experiment_dir: str):
+def plot_accel(filename: str, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
     time = []
     accel_x = []
     accel_y = []
@@ -52,15 +61,15 @@ def plot_accel(filename: str, experiment_dir: str):
 
     fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
 
-    axs[0].plot(time, accel_x, label='Accel X', color='red')
+    axs[0].plot(*decimate(time, accel_x, max_points, method), label='Accel X', color='red')
     axs[0].set_ylabel('Acceleration X (m/s²)')
     axs[0].legend()
 
-    axs[1].plot(time, accel_y, label='Accel Y', color='green')
+    axs[1].plot(*decimate(time, accel_y, max_points, method), label='Accel Y', color='green')
     axs[1].set_ylabel('Acceleration Y (m/s²)')
     axs[1].legend()
 
-    axs[2].plot(time, accel_z, label='Accel Z', color='blue')
+    axs[2].plot(*decimate(time, accel_z, max_points, method), label='Accel Z', color='blue')
     axs[2].set_xlabel('Time (s)')
     axs[2].set_ylabel('Acceleration Z (m/s²)')
     axs[2].legend()
@@ -69,7 +78,7 @@ def plot_accel(filename: str, experiment_dir: str):
     plt.tight_layout()
     plt.savefig(f'{experiment_dir}/plots/accel.png')
 
-def plot_gyro(filename: str, experiment_dir: str):
+def plot_gyro(filename: str, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
     time = []
     gyro_x = []
     gyro_y = []
@@ -85,15 +94,15 @@ def plot_gyro(filename: str, experiment_dir: str):
 
     fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
 
-    axs[0].plot(time, gyro_x, label='Gyro X', color='red')
+    axs[0].plot(*decimate(time, gyro_x, max_points, method), label='Gyro X', color='red')
     axs[0].set_ylabel('Angular Velocity X (rad/s)')
     axs[0].legend()
 
-    axs[1].plot(time, gyro_y, label='Gyro Y', color='green')
+    axs[1].plot(*decimate(time, gyro_y, max_points, method), label='Gyro Y', color='green')
     axs[1].set_ylabel('Angular Velocity Y (rad/s)')
     axs[1].legend()
 
-    axs[2].plot(time, gyro_z, label='Gyro Z', color='blue')
+    axs[2].plot(*decimate(time, gyro_z, max_points, method), label='Gyro Z', color='blue')
     axs[2].set_xlabel('Time (s)')
     axs[2].set_ylabel('Angular Velocity Z (rad/s)')
     axs[2].legend()
@@ -102,7 +111,7 @@ def plot_gyro(filename: str, experiment_dir: str):
     plt.tight_layout()
     plt.savefig(f'{experiment_dir}/plots/gyro.png')
 
-def plot_gps(filename: str, experiment_dir: str):
+def plot_gps(filename: str, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
     time = []
     gps_x = []
     gps_y = []
@@ -116,6 +125,11 @@ def plot_gps(filename: str, experiment_dir: str):
             gps_y.append(float(row['gps_y']))
             gps_z.append(float(row['gps_z']))
 
+    # os mesmos índices para X, Y, Z e tempo: a trajetória mantém os extremos de X e de Y
+    index = decimate_indices(time, [gps_x, gps_y, gps_z], max_points, method)
+    time = np.asarray(time)[index]
+    gps_x, gps_y, gps_z = np.asarray(gps_x)[index], np.asarray(gps_y)[index], np.asarray(gps_z)[index]
+
     fig, axs = plt.subplots(2, 1, figsize=(15, 15))
 
     # Gráfico de coordenadas GPS ao longo do tempo
@@ -155,7 +169,7 @@ def plot_gps(filename: str, experiment_dir: str):
     plt.tight_layout()
     plt.savefig(f'{experiment_dir}/plots/gps.png')
 
-def plot_compass(filename: str, experiment_dir: str):
+def plot_compass(filename: str, experiment_dir: str, max_points=MAX_POINTS, method=DECIMATION):
     time = []
     compass = []
 
@@ -167,7 +181,7 @@ def plot_compass(filename: str, experiment_dir: str):
 
     plt.figure(figsize=(15, 10))
 
-    plt.plot(time, compass, label='Compass', color='purple')
+    plt.plot(*decimate(time, compass, max_points, method), label='Compass', color='purple')
 
     plt.xlabel('Time (s)')
     plt.ylabel('Compass (degrees)')